@@ -4,6 +4,7 @@ from alembic import context
 from sqlalchemy import engine_from_config, pool
 
 from app.core.config import settings
+from app.db.session import sync_database_url
 from app.models.base import Base
 from app.models import models  # noqa: F401 - ensure models are imported for metadata
 
@@ -13,14 +14,16 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 # Inject runtime database URL from settings
-config.set_main_option("sqlalchemy.url", settings.database_url)
+config.set_main_option(
+    "sqlalchemy.url", sync_database_url(settings.database_url).render_as_string(hide_password=False)
+)
 target_metadata = Base.metadata
 
 
 def run_migrations_offline():
     """Run migrations in 'offline' mode."""
     context.configure(
-        url=settings.database_url,
+        url=config.get_main_option("sqlalchemy.url"),
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
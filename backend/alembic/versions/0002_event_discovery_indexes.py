@@ -0,0 +1,28 @@
+"""Add composite indexes for keyset-paginated event discovery
+
+Revision ID: 0002_event_discovery_indexes
+Revises: 0001_create_core_tables
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0002_event_discovery_indexes"
+down_revision = "0001_create_core_tables"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (city, date, id) matches the ORDER BY of GET /api/events, so each page is a
+    # single index range scan starting at the cursor.
+    op.create_index("ix_events_city_date_id", "events", ["city", "date", "id"])
+    # Date-window browsing across all cities.
+    op.create_index("ix_events_date_id", "events", ["date", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_events_date_id", table_name="events")
+    op.drop_index("ix_events_city_date_id", table_name="events")
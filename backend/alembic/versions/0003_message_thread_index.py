@@ -0,0 +1,29 @@
+"""Add composite index for keyset-paginated message threads
+
+Revision ID: 0003_message_thread_index
+Revises: 0002_event_discovery_indexes
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0003_message_thread_index"
+down_revision = "0002_event_discovery_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A thread is two (sender, receiver) ranges read newest first; id breaks
+    # created_at ties for the keyset cursor.
+    op.create_index(
+        "ix_messages_sender_receiver_created",
+        "messages",
+        ["sender_id", "receiver_id", "created_at", "id"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_messages_sender_receiver_created", table_name="messages")
@@ -0,0 +1,66 @@
+"""Add normalized event_tags table and prefix-search indexes
+
+Revision ID: 0004_event_tags
+Revises: 0003_message_thread_index
+Create Date: 2026-10-18
+"""
+
+import json
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0004_event_tags"
+down_revision = "0003_message_thread_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (tag, event_id) answers "events with tag X" from the primary key; the event_id
+    # index serves tag replacement when an event is rewritten.
+    op.create_table(
+        "event_tags",
+        sa.Column("tag", sa.String(), primary_key=True),
+        sa.Column(
+            "event_id",
+            sa.String(),
+            sa.ForeignKey("events.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+    )
+    op.create_index("ix_event_tags_event_id", "event_tags", ["event_id"])
+
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute(
+            "INSERT INTO event_tags (tag, event_id) "
+            "SELECT DISTINCT lower(tag), id FROM events, "
+            "json_array_elements_text(CASE WHEN json_typeof(tags) = 'array' THEN tags ELSE '[]'::json END) AS tag"
+        )
+        op.execute("CREATE INDEX ix_events_title_prefix ON events (lower(title) text_pattern_ops)")
+        op.execute("CREATE INDEX ix_events_venue_prefix ON events (lower(venue) text_pattern_ops)")
+    else:
+        rows = bind.execute(sa.text("SELECT id, tags FROM events WHERE tags IS NOT NULL"))
+        pairs = set()
+        for event_id, tags in rows:
+            if isinstance(tags, str):
+                tags = json.loads(tags)
+            for tag in tags or []:
+                pairs.add((str(tag).lower(), event_id))
+        if pairs:
+            bind.execute(
+                sa.text("INSERT INTO event_tags (tag, event_id) VALUES (:tag, :event_id)"),
+                [{"tag": tag, "event_id": event_id} for tag, event_id in pairs],
+            )
+        op.execute("CREATE INDEX ix_events_title_prefix ON events (lower(title))")
+        op.execute("CREATE INDEX ix_events_venue_prefix ON events (lower(venue))")
+
+
+def downgrade():
+    op.drop_index("ix_events_venue_prefix", table_name="events")
+    op.drop_index("ix_events_title_prefix", table_name="events")
+    op.drop_index("ix_event_tags_event_id", table_name="event_tags")
+    op.drop_table("event_tags")
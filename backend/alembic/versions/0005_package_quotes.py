@@ -0,0 +1,28 @@
+"""Denormalize quoted totals onto packages
+
+Revision ID: 0005_package_quotes
+Revises: 0004_event_tags
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0005_package_quotes"
+down_revision = "0004_event_tags"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Filled in by the application; run `python -m app.db.quotes` once after upgrading
+    # to quote existing packages.
+    op.add_column("packages", sa.Column("quoted_total", sa.Float(), nullable=True))
+    op.add_column("packages", sa.Column("quoted_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    op.drop_column("packages", "quoted_at")
+    op.drop_column("packages", "quoted_total")
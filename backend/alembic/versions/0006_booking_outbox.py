@@ -0,0 +1,39 @@
+"""Add the booking outbox and payment references
+
+Revision ID: 0006_booking_outbox
+Revises: 0005_package_quotes
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0006_booking_outbox"
+down_revision = "0005_package_quotes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("bookings", sa.Column("payment_reference", sa.String(), nullable=True))
+    op.create_table(
+        "booking_outbox",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("booking_id", sa.String(), sa.ForeignKey("bookings.id"), nullable=False, unique=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("available_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # Workers claim with status = 'pending' AND available_at <= now ORDER BY available_at
+    op.create_index("ix_booking_outbox_status_available", "booking_outbox", ["status", "available_at"])
+
+
+def downgrade():
+    op.drop_index("ix_booking_outbox_status_available", table_name="booking_outbox")
+    op.drop_table("booking_outbox")
+    op.drop_column("bookings", "payment_reference")
@@ -0,0 +1,100 @@
+"""Store booking, outbox and message keys as native UUIDs
+
+Revision ID: 0007_uuid7_keys
+Revises: 0006_booking_outbox
+Create Date: 2026-10-18
+
+Existing ids that are already UUID text convert as they are. Anything else (ids
+written by hand or by older tooling) becomes uuid3(LEGACY_ID_NAMESPACE, id), the
+mapping app.core.ids.parse_id applies to ids clients still hold. New rows get UUIDv7.
+"""
+
+import re
+import uuid
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0007_uuid7_keys"
+down_revision = "0006_booking_outbox"
+branch_labels = None
+depends_on = None
+
+# Must match app.core.ids.LEGACY_ID_NAMESPACE
+LEGACY_ID_NAMESPACE = uuid.UUID("6f1d3c52-9a4e-4d2b-8c47-2b1e5f0a9d11")
+# Must match app.core.ids.UUID_TEXT and the Postgres pattern below
+UUID_TEXT = re.compile(r"[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}", re.IGNORECASE)
+
+# (table, column); referenced keys before the columns that point at them
+KEY_COLUMNS = [
+    ("bookings", "id"),
+    ("booking_outbox", "id"),
+    ("booking_outbox", "booking_id"),
+    ("messages", "id"),
+]
+OUTBOX_FK = "booking_outbox_booking_id_fkey"
+
+
+def _parse(value: str) -> uuid.UUID:
+    if UUID_TEXT.fullmatch(value):
+        return uuid.UUID(value)
+    return uuid.uuid3(LEGACY_ID_NAMESPACE, value)
+
+
+def _rewrite_sqlite(table: str, column: str, convert):
+    bind = op.get_bind()
+    values = [row[0] for row in bind.execute(sa.text(f"SELECT {column} FROM {table}"))]
+    updates = [{"old": value, "new": convert(value)} for value in values if convert(value) != value]
+    if updates:
+        bind.execute(sa.text(f"UPDATE {table} SET {column} = :new WHERE {column} = :old"), updates)
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        # uuid3 by hand: md5 over namespace bytes + name, then the version and
+        # variant bits, so no extension is needed
+        op.execute(
+            f"""
+            CREATE FUNCTION pg_temp.legacy_id(value text) RETURNS uuid AS $$
+                SELECT CASE
+                    WHEN value ~* '^[0-9a-f]{{8}}-?[0-9a-f]{{4}}-?[0-9a-f]{{4}}-?[0-9a-f]{{4}}-?[0-9a-f]{{12}}$'
+                        THEN value::uuid
+                    ELSE (
+                        SELECT overlay(
+                            overlay(h PLACING '3' FROM 13)
+                            PLACING substr('89ab', (('x' || substr(h, 17, 1))::bit(4)::int & 3) + 1, 1) FROM 17
+                        )::uuid
+                        FROM (SELECT md5(decode('{LEGACY_ID_NAMESPACE.hex}', 'hex') || convert_to(value, 'UTF8')) AS h) digest
+                    )
+                END
+            $$ LANGUAGE sql IMMUTABLE
+            """
+        )
+        op.drop_constraint(OUTBOX_FK, "booking_outbox", type_="foreignkey")
+        for table, column in KEY_COLUMNS:
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE uuid USING pg_temp.legacy_id({column})")
+        op.create_foreign_key(OUTBOX_FK, "booking_outbox", "bookings", ["booking_id"], ["id"])
+        return
+
+    # SQLite stores UUIDs as 32 hex characters
+    for table, column in KEY_COLUMNS:
+        _rewrite_sqlite(table, column, lambda value: _parse(value).hex)
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(column, type_=sa.Uuid(), existing_nullable=False)
+
+
+def downgrade():
+    # Legacy string ids are not restored; rows keep their UUIDs in text form
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_constraint(OUTBOX_FK, "booking_outbox", type_="foreignkey")
+        for table, column in KEY_COLUMNS:
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE varchar USING {column}::text")
+        op.create_foreign_key(OUTBOX_FK, "booking_outbox", "bookings", ["booking_id"], ["id"])
+        return
+
+    for table, column in KEY_COLUMNS:
+        _rewrite_sqlite(table, column, lambda value: str(uuid.UUID(value)))
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(column, type_=sa.String(), existing_nullable=False)
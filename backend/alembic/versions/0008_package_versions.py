@@ -0,0 +1,24 @@
+"""Add a version counter to packages for optimistic concurrency
+
+Revision ID: 0008_package_versions
+Revises: 0007_uuid7_keys
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0008_package_versions"
+down_revision = "0007_uuid7_keys"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("packages", sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+
+def downgrade():
+    op.drop_column("packages", "version")
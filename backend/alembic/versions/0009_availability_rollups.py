@@ -0,0 +1,72 @@
+"""Add city/date availability rollups for discovery pages
+
+Revision ID: 0009_availability_rollups
+Revises: 0008_package_versions
+Create Date: 2026-10-18
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0009_availability_rollups"
+down_revision = "0008_package_versions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_lodgings_location_price_id", "lodgings", ["location", "price", "id"])
+    op.create_table(
+        "availability_days",
+        sa.Column("city", sa.String(), primary_key=True),
+        sa.Column("date", sa.Date(), primary_key=True),
+        sa.Column("event_count", sa.Integer(), nullable=False),
+        sa.Column("min_event_price", sa.Float(), nullable=False),
+        sa.Column("max_event_price", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_availability_days_date", "availability_days", ["date"])
+    op.create_table(
+        "availability_day_tags",
+        sa.Column("city", sa.String(), primary_key=True),
+        sa.Column("date", sa.Date(), primary_key=True),
+        sa.Column("tag", sa.String(), primary_key=True),
+        sa.Column("event_count", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_availability_day_tags_date", "availability_day_tags", ["date"])
+    op.create_table(
+        "availability_cities",
+        sa.Column("city", sa.String(), primary_key=True),
+        sa.Column("lodging_count", sa.Integer(), nullable=False),
+        sa.Column("min_lodging_price", sa.Float(), nullable=False),
+        sa.Column("max_lodging_price", sa.Float(), nullable=False),
+        sa.Column("cheapest_lodging_id", sa.String(), nullable=False),
+    )
+
+    # Same statements as app.db.availability.rebuild_availability
+    op.execute(
+        "INSERT INTO availability_days (city, date, event_count, min_event_price, max_event_price) "
+        "SELECT city, date, count(*), min(price), max(price) FROM events GROUP BY city, date"
+    )
+    op.execute(
+        "INSERT INTO availability_day_tags (city, date, tag, event_count) "
+        "SELECT e.city, e.date, t.tag, count(*) FROM events e JOIN event_tags t ON t.event_id = e.id "
+        "GROUP BY e.city, e.date, t.tag"
+    )
+    op.execute(
+        "INSERT INTO availability_cities "
+        "(city, lodging_count, min_lodging_price, max_lodging_price, cheapest_lodging_id) "
+        "SELECT location, count(*), min(price), max(price), "
+        "(SELECT c.id FROM lodgings c WHERE c.location = l.location ORDER BY c.price, c.id LIMIT 1) "
+        "FROM lodgings l GROUP BY location"
+    )
+
+
+def downgrade():
+    op.drop_table("availability_cities")
+    op.drop_index("ix_availability_day_tags_date", table_name="availability_day_tags")
+    op.drop_table("availability_day_tags")
+    op.drop_index("ix_availability_days_date", table_name="availability_days")
+    op.drop_table("availability_days")
+    op.drop_index("ix_lodgings_location_price_id", table_name="lodgings")
@@ -0,0 +1,37 @@
+"""Add coordinates and grid cell codes to events and lodgings
+
+Revision ID: 0010_geo_coordinates
+Revises: 0009_availability_rollups
+Create Date: 2026-10-18
+
+Existing rows have no coordinates until an admin write supplies them; geohash is
+derived from latitude/longitude by app.core.geo.encode on every write.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0010_geo_coordinates"
+down_revision = "0009_availability_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ("events", "lodgings"):
+        op.add_column(table, sa.Column("latitude", sa.Float(), nullable=True))
+        op.add_column(table, sa.Column("longitude", sa.Float(), nullable=True))
+        op.add_column(table, sa.Column("geohash", sa.BigInteger(), nullable=True))
+    op.create_index("ix_events_geohash", "events", ["geohash"])
+    op.create_index("ix_lodgings_geohash", "lodgings", ["geohash", "latitude", "longitude", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_lodgings_geohash", table_name="lodgings")
+    op.drop_index("ix_events_geohash", table_name="events")
+    for table in ("events", "lodgings"):
+        op.drop_column(table, "geohash")
+        op.drop_column(table, "longitude")
+        op.drop_column(table, "latitude")
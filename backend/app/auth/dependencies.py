@@ -2,7 +2,7 @@ from typing import Optional
 
 from fastapi import Depends, Header, HTTPException, status
 
-from app.auth.supabase_jwt import AuthError, decode_supabase_jwt, extract_user_ctx
+from app.auth.supabase_jwt import AuthError, extract_user_ctx, verify_token
 from app.core.config import settings
 
 
@@ -21,7 +21,7 @@ async def get_current_user(
     # Allow opt-out for local dev only
     if settings.allow_no_auth and not settings.supabase_jwt_secret:
         return {"id": "dev-user", "email": None, "role": "admin"}
-    claims = decode_supabase_jwt(token)
+    claims = await verify_token(token)
     return extract_user_ctx(claims)
 
 
@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import jwt
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# A key id we have never seen triggers a JWKS fetch at most this often, so a flood
+# of forged kids cannot turn into a flood of outbound requests.
+JWKS_MIN_REFETCH_SECONDS = 30
+ASYMMETRIC_ALGORITHMS = {"RS256", "RS384", "RS512", "ES256", "ES384", "ES512", "EdDSA"}
+
+
+class AuthError(HTTPException):
+    def __init__(self, detail: str):
+        super().__init__(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=detail,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+class UnknownSigningKey(AuthError):
+    def __init__(self):
+        super().__init__("Unknown signing key")
+
+
+class VerifiedTokenCache:
+    """LRU of already-verified tokens, keyed by token hash and dropped at ``exp``.
+
+    Only touched from the event loop, so no locking.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        claims, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def put(self, token: str, claims: dict):
+        expires_at = claims.get("exp")
+        if not self.maxsize or not isinstance(expires_at, (int, float)):
+            return
+        self._entries[self._key(token)] = (claims, expires_at)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+
+def _fetch_jwks(url: str) -> dict:
+    # file:// URLs work too, which is handy for a local JWKS stand-in.
+    with urllib.request.urlopen(url, timeout=5) as resp:
+        return json.load(resp)
+
+
+class JWKSKeySet:
+    """In-memory JWKS, refreshed every ``ttl`` seconds by a daemon thread."""
+
+    def __init__(self, url: str, ttl: float, fetcher: Optional[Callable[[str], dict]] = None):
+        self.url = url
+        self.ttl = ttl
+        self.refreshed_at: Optional[float] = None
+        self.refresh_failures = 0
+        self._miss_refresh_at = 0.0
+        self._fetcher = fetcher or _fetch_jwks
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self):
+        with self._lock:
+            try:
+                jwks = self._fetcher(self.url)
+            except Exception:
+                self.refresh_failures += 1
+                logger.exception("JWKS refresh from %s failed", self.url)
+                return
+            keys = {}
+            for data in jwks.get("keys", []):
+                try:
+                    key = jwt.PyJWK(data)
+                except jwt.PyJWTError:
+                    logger.warning("Skipping unusable JWKS key %s", data.get("kid"))
+                    continue
+                keys[data.get("kid")] = key
+            # Swap the whole dict so readers never see a half-built key set
+            self._keys = keys
+            self.refreshed_at = time.time()
+
+    def get_signing_key(self, kid: Optional[str]) -> jwt.PyJWK:
+        """Never fetches: an unknown kid raises UnknownSigningKey, see refresh_for_unknown_kid."""
+        if kid is not None and not isinstance(kid, str):
+            raise AuthError("Invalid token key id")
+        key = self._keys.get(kid)
+        if key is None:
+            raise UnknownSigningKey()
+        return key
+
+    async def refresh_for_unknown_kid(self) -> bool:
+        """Refetches the JWKS off the event loop, unless the keys were fetched within
+        JWKS_MIN_REFETCH_SECONDS; True when a fetch was made."""
+        now = time.time()
+        if now - max(self.refreshed_at or 0.0, self._miss_refresh_at) <= JWKS_MIN_REFETCH_SECONDS:
+            return False
+        # Claimed before the await so concurrent misses share one fetch
+        self._miss_refresh_at = now
+        await asyncio.to_thread(self.refresh)
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.ttl)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="jwks-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._keys),
+            "refreshed_at": self.refreshed_at,
+            "refresh_failures": self.refresh_failures,
+        }
+
+
+token_cache = VerifiedTokenCache(maxsize=settings.jwt_cache_size)
+jwks = (
+    JWKSKeySet(settings.supabase_jwks_url, ttl=settings.supabase_jwks_ttl_seconds)
+    if settings.supabase_jwks_url
+    else None
+)
+
+
+def _verification_key(header: dict):
+    alg = header.get("alg")
+    if not isinstance(alg, str):
+        raise AuthError("Unsupported token algorithm")
+    if alg in ASYMMETRIC_ALGORITHMS:
+        if jwks is None:
+            raise AuthError("Asymmetric tokens require SUPABASE_JWKS_URL")
+        key = jwks.get_signing_key(header.get("kid"))
+        if key.algorithm_name and key.algorithm_name != alg:
+            raise AuthError("Token algorithm does not match signing key")
+        return key.key
+    if alg.startswith("HS"):
+        if not settings.supabase_jwt_secret:
+            raise AuthError("HS tokens require SUPABASE_JWT_SECRET")
+        return settings.supabase_jwt_secret
+    raise AuthError("Unsupported token algorithm")
+
+
+def decode_supabase_jwt(token: str) -> dict:
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+
+    try:
+        header = jwt.get_unverified_header(token)
+        claims = jwt.decode(
+            token,
+            _verification_key(header),
+            algorithms=[header["alg"]],
+            audience=settings.supabase_jwt_audience,
+            options={"require": ["exp", "sub"], "verify_aud": bool(settings.supabase_jwt_audience)},
+        )
+    except jwt.PyJWTError as exc:
+        raise AuthError(f"Invalid token: {exc}")
+
+    token_cache.put(token, claims)
+    return claims
+
+
+async def verify_token(token: str) -> dict:
+    """decode_supabase_jwt for request handlers. A key id missing from the JWKS, most
+    likely a rotation that landed between background refreshes, refetches the keys
+    off the event loop and retries once. Synchronous callers just get the 401."""
+    try:
+        return decode_supabase_jwt(token)
+    except UnknownSigningKey:
+        if jwks is None or not await jwks.refresh_for_unknown_kid():
+            raise
+    return decode_supabase_jwt(token)
+
+
+def extract_user_ctx(claims: dict) -> dict:
+    app_metadata = claims.get("app_metadata") or {}
+    return {
+        "id": claims["sub"],
+        "email": claims.get("email"),
+        # Supabase sets "role" to "authenticated"; app roles live in a custom claim
+        "role": claims.get("user_role") or app_metadata.get("role") or claims.get("role"),
+    }
+
+
+def start_jwks_refresher():
+    if jwks is not None:
+        jwks.start()
+
+
+def stop_jwks_refresher():
+    if jwks is not None:
+        jwks.stop()
+
+
+def cache_stats() -> dict:
+    return {"tokens": token_cache.stats(), "jwks": jwks.stats() if jwks is not None else None}
@@ -0,0 +1,226 @@
+"""Admission control: per-identity token buckets, per-group concurrency caps and
+load shedding on connection pool pressure.
+
+Everything is decided before the request reaches routing, so a rejected request
+costs a header parse and a bucket update, never a database connection. Rejections
+carry ``Retry-After``: 429 when a caller is over their rate, 503 when the service
+is shedding load.
+"""
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from app.core.identity import caller_identity
+from app.db.pool import pool_metrics
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+_active: Optional["AdmissionMiddleware"] = None
+
+
+class LocalBucketStore:
+    """Token buckets in process memory; each worker enforces the rate on its own."""
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: float, now: float) -> float:
+        """Takes one token; returns 0 on success, else seconds until a token is available."""
+        tokens, updated = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite file shared by every worker on the host.
+
+    A stand-in for a shared store such as Redis: each take is one short
+    ``BEGIN IMMEDIATE`` transaction, so workers see a single bucket per identity.
+    Takes run in a thread, since another worker holding the write lock would
+    otherwise stall this worker's event loop for up to the busy timeout.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS admission_buckets "
+            "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    async def take(self, key: str, rate: float, burst: float, now: float) -> float:
+        return await asyncio.to_thread(self._take, key, rate, burst, now)
+
+    def _take(self, key: str, rate: float, burst: float, now: float) -> float:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM admission_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, updated = row if row else (burst, now)
+                tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / rate
+                self._conn.execute(
+                    "INSERT INTO admission_buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                    (key, tokens, now),
+                )
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return wait
+
+
+def build_bucket_store(name: str, shared_path: Optional[str] = None):
+    if name == "local":
+        return LocalBucketStore()
+    if name == "sqlite":
+        return SQLiteBucketStore(shared_path)
+    raise ValueError(f"Unknown admission store {name!r}")
+
+
+def parse_group_limits(spec: str) -> Dict[str, int]:
+    """``"bookings=32,messages=64"`` -> ``{"bookings": 32, "messages": 64}``."""
+    limits = {}
+    for item in spec.split(","):
+        if item.strip():
+            group, _, limit = item.partition("=")
+            limits[group.strip()] = int(limit)
+    return limits
+
+
+def _reject(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class AdmissionMiddleware:
+    """Rate limits by identity, caps in-flight writes per route group and sheds writes
+    to capped groups while the connection pool is backed up.
+
+    ``groups`` maps group names to router prefixes as in app.core.metrics; only
+    requests under ``api_prefix`` are considered, and ``exempt`` groups skip every check.
+    Caps count writes only: reads are short, and long-lived reads such as the message
+    stream would otherwise hold a slot for their whole lifetime.
+    """
+
+    def __init__(
+        self,
+        app,
+        groups: Dict[str, str],
+        api_prefix: str,
+        store,
+        rate: float,
+        burst: float,
+        group_limits: Dict[str, int],
+        max_pool_waiters: int,
+        max_pool_wait_ms: float,
+        retry_after: float = 1.0,
+        exempt: Tuple[str, ...] = ("admin",),
+    ):
+        self.app = app
+        self.prefixes = sorted(groups.items(), key=lambda item: len(item[1]), reverse=True)
+        self.api_prefix = api_prefix
+        self.store = store
+        self.rate = rate
+        self.burst = burst
+        self.group_limits = group_limits
+        self.max_pool_waiters = max_pool_waiters
+        self.max_pool_wait_ms = max_pool_wait_ms
+        self.retry_after = retry_after
+        self.exempt = set(exempt)
+        self.in_flight: Dict[str, int] = {group: 0 for group in group_limits}
+        self.rejected: Dict[str, int] = {"rate_limited": 0, "over_capacity": 0, "shed": 0}
+        global _active
+        _active = self
+
+    def _group(self, path: str) -> Optional[str]:
+        for name, prefix in self.prefixes:
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return name
+        return None
+
+    def _pool_backed_up(self) -> bool:
+        return (
+            pool_metrics.waiting >= self.max_pool_waiters
+            or pool_metrics.recent_wait_ms >= self.max_pool_wait_ms
+        )
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or not (
+            path == self.api_prefix or path.startswith(self.api_prefix.rstrip("/") + "/")
+        ):
+            await self.app(scope, receive, send)
+            return
+        group = self._group(path)
+        if group in self.exempt:
+            await self.app(scope, receive, send)
+            return
+
+        wait = await self.store.take(caller_identity(scope), self.rate, self.burst, time.time())
+        if wait:
+            self.rejected["rate_limited"] += 1
+            await _reject(429, "Rate limit exceeded", wait)(scope, receive, send)
+            return
+
+        limit = self.group_limits.get(group)
+        if limit is None or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+        if self._pool_backed_up():
+            self.rejected["shed"] += 1
+            await _reject(503, "Service busy, retry shortly", self.retry_after)(scope, receive, send)
+            return
+        if self.in_flight[group] >= limit:
+            self.rejected["over_capacity"] += 1
+            await _reject(503, "Service busy, retry shortly", self.retry_after)(scope, receive, send)
+            return
+
+        self.in_flight[group] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight[group] -= 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "in_flight": dict(self.in_flight),
+            "limits": dict(self.group_limits),
+            "rejected": dict(self.rejected),
+            "pool_waiting": pool_metrics.waiting,
+            "pool_recent_wait_ms": round(pool_metrics.recent_wait_ms, 3),
+        }
+
+
+def admission_stats() -> dict:
+    return _active.stats() if _active is not None else {"enabled": False}
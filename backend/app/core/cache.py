@@ -0,0 +1,228 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Size-bounded LRU whose entries also expire ``ttl`` seconds after insertion.
+
+    With ``maxweight`` the total ``weigh(value)`` of the entries is bounded as well, for
+    values such as encoded pages whose size varies by orders of magnitude.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        maxweight: Optional[int] = None,
+        weigh: Optional[Callable[[Any], int]] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxweight = maxweight
+        self._weigh = weigh if maxweight is not None else None
+        self.weight = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, int]]" = OrderedDict()
+
+    def get(self, key: Hashable, default=None):
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self._pop(key)
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        weight = self._weigh(value) if self._weigh is not None else 0
+        self._pop(key)
+        if self.maxweight is not None and weight > self.maxweight:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value, weight)
+        self.weight += weight
+        while len(self._entries) > self.maxsize or (
+            self.maxweight is not None and self.weight > self.maxweight
+        ):
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self.weight -= evicted
+
+    def _pop(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.weight -= entry[2]
+
+    def clear(self):
+        self._entries.clear()
+        self.weight = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class LocalInvalidation:
+    """Per-process generation counters; enough for a single worker."""
+
+    def __init__(self):
+        self._generations: Dict[str, int] = {}
+
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def bump(self, namespace: str):
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+
+class SQLiteInvalidation:
+    """Generation counters in a SQLite file shared by every worker on the host.
+
+    All SQLite I/O happens on a daemon thread, so generation() and bump() only touch
+    memory and never block the event loop. Local bumps are visible immediately and
+    written through on the thread; bumps from other workers are picked up every
+    ``poll_interval`` seconds, which bounds cross-worker staleness.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 1.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._generations: Dict[str, int] = {}
+        # Local bumps not yet written to the file, by namespace
+        self._pending: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_generations (namespace TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        self._poll()
+        self._thread = threading.Thread(target=self._run, name="cache-generations", daemon=True)
+        self._thread.start()
+
+    def _write_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        try:
+            for namespace, count in pending.items():
+                self._conn.execute(
+                    "INSERT INTO cache_generations (namespace, value) VALUES (?, ?) "
+                    "ON CONFLICT (namespace) DO UPDATE SET value = value + excluded.value",
+                    (namespace, count),
+                )
+        except sqlite3.Error:
+            # Rows already written are counted twice on retry; an extra bump only costs a miss
+            with self._lock:
+                for namespace, count in pending.items():
+                    self._pending[namespace] = self._pending.get(namespace, 0) + count
+            raise
+
+    def _poll(self):
+        stored = dict(self._conn.execute("SELECT namespace, value FROM cache_generations"))
+        with self._lock:
+            # Never step back: a local bump can be ahead of what the file holds
+            for namespace, value in stored.items():
+                self._generations[namespace] = max(value, self._generations.get(namespace, 0))
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self._write_pending()
+                self._poll()
+            except sqlite3.Error:
+                logger.exception("Cache generation sync with %s failed", self.path)
+
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def bump(self, namespace: str):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self._pending[namespace] = self._pending.get(namespace, 0) + 1
+        self._wake.set()
+
+
+class NamespacedCache:
+    """TTL/LRU cache whose namespaces can be invalidated wholesale through a backend.
+
+    Entries remember the generation they were stored under, so invalidating a namespace
+    is a counter bump and stale entries simply miss (and age out of the LRU).
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        backend=None,
+        maxweight: Optional[int] = None,
+        weigh: Optional[Callable[[Any], int]] = None,
+    ):
+        self.backend = backend or LocalInvalidation()
+        self._store = TTLCache(
+            maxsize, ttl, maxweight, (lambda entry: weigh(entry[1])) if weigh is not None else None
+        )
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+
+    def generation(self, namespace: str) -> int:
+        return self.backend.generation(namespace)
+
+    def get(self, namespace: str, key: Hashable, default=None):
+        entry = self._store.get((namespace, key))
+        if entry is not None and entry[0] == self.backend.generation(namespace):
+            self._hits[namespace] = self._hits.get(namespace, 0) + 1
+            return entry[1]
+        self._misses[namespace] = self._misses.get(namespace, 0) + 1
+        return default
+
+    def set(self, namespace: str, key: Hashable, value: Any, generation: Optional[int] = None):
+        """Stores ``value`` under ``generation``, read with generation() before the value
+        was loaded: an invalidation that lands in between then leaves the entry already
+        stale rather than stamped with the new generation. Defaults to the current one."""
+        if generation is None:
+            generation = self.backend.generation(namespace)
+        self._store.set((namespace, key), (generation, value))
+
+    def invalidate(self, namespace: str):
+        self.backend.bump(namespace)
+
+    def clear(self):
+        self._store.clear()
+
+    def stats(self) -> dict:
+        namespaces = {}
+        for namespace in sorted(set(self._hits) | set(self._misses)):
+            hits = self._hits.get(namespace, 0)
+            misses = self._misses.get(namespace, 0)
+            namespaces[namespace] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": hits / (hits + misses),
+                "generation": self.backend.generation(namespace),
+            }
+        hits = sum(self._hits.values())
+        lookups = hits + sum(self._misses.values())
+        return {
+            "size": len(self._store),
+            "maxsize": self._store.maxsize,
+            "weight": self._store.weight,
+            "maxweight": self._store.maxweight,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "namespaces": namespaces,
+        }
+
+
+def build_backend(name: str, shared_path: Optional[str] = None):
+    if name == "local":
+        return LocalInvalidation()
+    if name == "sqlite":
+        return SQLiteInvalidation(shared_path)
+    raise ValueError(f"Unknown cache backend {name!r}")
@@ -11,16 +11,108 @@ class Settings(BaseSettings):
     )
     api_prefix: str = Field(default="/api", env="API_PREFIX")
 
+    # Startup. Alembic owns the schema; DB_CREATE_ALL=true runs create_all in the
+    # lifespan hook (handy for local SQLite).
+    db_create_all: bool = Field(default=False, env="DB_CREATE_ALL")
+    db_startup_check: bool = Field(default=True, env="DB_STARTUP_CHECK")
+    db_startup_timeout_seconds: float = Field(default=5, env="DB_STARTUP_TIMEOUT_SECONDS")
+
+    # Connection pool. DB_PGBOUNCER_MODE disables server-side prepared statement
+    # caching so the app is safe behind a transaction-mode pooler.
+    db_pool_size: int = Field(default=5, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=30, env="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(default=1800, env="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(default=False, env="DB_POOL_PRE_PING")
+    db_pgbouncer_mode: bool = Field(default=False, env="DB_PGBOUNCER_MODE")
+
+    # Read replicas for read-only routes (comma-separated URLs; empty reads from the
+    # primary). A caller reads from the primary for DB_READ_YOUR_WRITES_SECONDS after
+    # a write, on any worker (a last_write cookie carries the time), and a replica that
+    # refuses connections is skipped for the cooldown.
+    database_replica_urls: str = Field(default="", env="DATABASE_REPLICA_URLS")
+    db_replica_failure_cooldown_seconds: float = Field(default=10, env="DB_REPLICA_FAILURE_COOLDOWN_SECONDS")
+    db_read_your_writes_seconds: float = Field(default=5, env="DB_READ_YOUR_WRITES_SECONDS")
+
     # Supabase / Auth
     supabase_url: str | None = Field(default=None, env="SUPABASE_URL")
     supabase_anon_key: str | None = Field(default=None, env="SUPABASE_ANON_KEY")
     supabase_jwt_secret: str | None = Field(default=None, env="SUPABASE_JWT_SECRET")
     supabase_jwks_url: str | None = Field(default=None, env="SUPABASE_JWKS_URL")
+    supabase_jwks_ttl_seconds: float = Field(default=600, env="SUPABASE_JWKS_TTL_SECONDS")
+    supabase_jwt_audience: str | None = Field(default="authenticated", env="SUPABASE_JWT_AUDIENCE")
+    jwt_cache_size: int = Field(default=10000, env="JWT_CACHE_SIZE")
     allow_no_auth: bool = Field(default=False, env="ALLOW_NO_AUTH")
 
+    # Instrumentation
+    enforce_query_budgets: bool = Field(default=False, env="ENFORCE_QUERY_BUDGETS")
+
+    # Catalog cache (events/lodgings). "sqlite" shares invalidation across workers
+    # through a file on the host.
+    catalog_cache_size: int = Field(default=50000, env="CATALOG_CACHE_SIZE")
+    catalog_cache_ttl_seconds: float = Field(default=300, env="CATALOG_CACHE_TTL_SECONDS")
+    catalog_cache_backend: str = Field(default="local", env="CATALOG_CACHE_BACKEND")
+    catalog_cache_shared_path: str = Field(
+        default="/tmp/partywknd-catalog-cache.sqlite", env="CATALOG_CACHE_SHARED_PATH"
+    )
+    # Encoded event pages are held apart from the catalog objects and bounded by size
+    catalog_page_cache_bytes: int = Field(default=64 * 1024 * 1024, env="CATALOG_PAGE_CACHE_BYTES")
+
+    # Event search: cities listed here (comma separated) always get an in-memory
+    # index; others are promoted after SEARCH_HOT_CITY_THRESHOLD searches.
+    search_hot_cities: str = Field(default="", env="SEARCH_HOT_CITIES")
+    search_hot_city_threshold: int = Field(default=20, env="SEARCH_HOT_CITY_THRESHOLD")
+    search_max_hot_cities: int = Field(default=16, env="SEARCH_MAX_HOT_CITIES")
+
+    # Package quotes: markup on the subtotal, tax on the marked-up amount
+    quote_markup_rate: float = Field(default=0.10, env="QUOTE_MARKUP_RATE")
+    quote_tax_rate: float = Field(default=0.08, env="QUOTE_TAX_RATE")
+    quote_default_nights: int = Field(default=2, env="QUOTE_DEFAULT_NIGHTS")
+
+    # Admission control. Token buckets per user (or client address) for every API
+    # route; writes to groups listed in ADMISSION_GROUP_LIMITS ("group=max,...") are
+    # capped in flight and shed while the connection pool is backed up.
+    admission_enabled: bool = Field(default=False, env="ADMISSION_ENABLED")
+    admission_rate_per_second: float = Field(default=10, env="ADMISSION_RATE_PER_SECOND")
+    admission_burst: int = Field(default=40, env="ADMISSION_BURST")
+    admission_group_limits: str = Field(default="bookings=32,messages=64", env="ADMISSION_GROUP_LIMITS")
+    admission_max_pool_waiters: int = Field(default=16, env="ADMISSION_MAX_POOL_WAITERS")
+    admission_max_pool_wait_ms: float = Field(default=500, env="ADMISSION_MAX_POOL_WAIT_MS")
+    admission_store: str = Field(default="local", env="ADMISSION_STORE")
+    admission_shared_path: str = Field(
+        default="/tmp/partywknd-admission.sqlite", env="ADMISSION_SHARED_PATH"
+    )
+
+    # Request profiling. Off means not installed at all; when on, admins profile a
+    # request by sending PROFILING_HEADER and PROFILING_SAMPLE_RATE of all requests
+    # are profiled. Profiles are kept in memory, newest PROFILING_BUFFER_SIZE per worker.
+    profiling_enabled: bool = Field(default=False, env="PROFILING_ENABLED")
+    profiling_header: str = Field(default="X-Profile", env="PROFILING_HEADER")
+    profiling_sample_rate: float = Field(default=0.0, env="PROFILING_SAMPLE_RATE")
+    profiling_interval_ms: float = Field(default=5, env="PROFILING_INTERVAL_MS")
+    profiling_buffer_size: int = Field(default=50, env="PROFILING_BUFFER_SIZE")
+    profiling_max_sql: int = Field(default=500, env="PROFILING_MAX_SQL")
+
+    # Message push fan-out: "local" (single worker) or "postgres" (LISTEN/NOTIFY)
+    pubsub_backend: str = Field(default="local", env="PUBSUB_BACKEND")
+    pubsub_channel: str = Field(default="partywknd_messages", env="PUBSUB_CHANNEL")
+
     # Stripe
     stripe_secret_key: str | None = Field(default=None, env="STRIPE_SECRET_KEY")
 
+    # Booking outbox. Bookings are accepted as "pending" and confirmed by a pool of
+    # in-process workers that capture payment; set OUTBOX_WORKERS=0 on web processes
+    # when a dedicated process drains the outbox (python -m app.db.outbox).
+    outbox_workers: int = Field(default=2, env="OUTBOX_WORKERS")
+    outbox_batch_size: int = Field(default=20, env="OUTBOX_BATCH_SIZE")
+    outbox_poll_interval_seconds: float = Field(default=1.0, env="OUTBOX_POLL_INTERVAL_SECONDS")
+    outbox_lease_seconds: float = Field(default=60, env="OUTBOX_LEASE_SECONDS")
+    outbox_max_attempts: int = Field(default=5, env="OUTBOX_MAX_ATTEMPTS")
+    outbox_retry_base_seconds: float = Field(default=2, env="OUTBOX_RETRY_BASE_SECONDS")
+    # Local stand-in for the payment provider
+    payments_latency_ms: float = Field(default=200, env="PAYMENTS_LATENCY_MS")
+    payments_failure_rate: float = Field(default=0.0, env="PAYMENTS_FAILURE_RATE")
+
     # CORS
     cors_allow_origins: str = Field(
         default="http://localhost:3000,http://127.0.0.1:3000,http://localhost:3001,http://127.0.0.1:3001",
@@ -0,0 +1,22 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Response
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Strong comparison against an If-None-Match / If-Match header value."""
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def json_response_with_etag(body: bytes, etag: str, if_none_match: Optional[str]) -> Response:
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
@@ -0,0 +1,87 @@
+"""Grid cells and distances for nearby-lodging queries, without PostGIS.
+
+A point's cell code is its geohash in integer form: 26 bits of longitude and 26 of
+latitude, interleaved longitude first, so ``code >> (52 - 5 * p)`` is the value of
+the p-character geohash. Every cell at any precision is then one contiguous range
+of codes, and a btree on the column answers "points in these cells" with a few
+range scans on Postgres and SQLite alike. A radius query covers its bounding box
+with at most MAX_CELLS cells of the finest precision that allows, reads the points
+in them, and keeps those within the radius by exact great-circle distance.
+"""
+import math
+from typing import List, Tuple
+
+AXIS_BITS = 26
+CODE_BITS = 2 * AXIS_BITS
+MAX_CELLS = 16
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+
+def _spread(value: int) -> int:
+    """Moves bit i of a 26-bit value to bit 2i."""
+    value = (value | (value << 16)) & 0x0000FFFF0000FFFF
+    value = (value | (value << 8)) & 0x00FF00FF00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value << 2)) & 0x3333333333333333
+    return (value | (value << 1)) & 0x5555555555555555
+
+
+def _index(degrees: float, span: float, bits: int) -> int:
+    cells = 1 << bits
+    return min(int((degrees + span / 2) / span * cells), cells - 1)
+
+
+def _interleave(lon_index: int, lat_index: int) -> int:
+    return (_spread(lon_index) << 1) | _spread(lat_index)
+
+
+def encode(latitude: float, longitude: float) -> int:
+    return _interleave(_index(longitude, 360.0, AXIS_BITS), _index(latitude, 180.0, AXIS_BITS))
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle (haversine) distance."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def cover(
+    latitude: float, longitude: float, radius_km: float, max_cells: int = MAX_CELLS
+) -> List[Tuple[int, int]]:
+    """Half-open code ranges [low, high) whose cells cover every point within ``radius_km``."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    lat_low, lat_high = max(latitude - dlat, -90.0), min(latitude + dlat, 90.0)
+    # Longitude degrees shrink towards the poles; at the widest latitude of the box
+    widest = max(abs(lat_low), abs(lat_high))
+    cos_widest = math.cos(math.radians(widest))
+    dlon = radius_km / (KM_PER_DEGREE_LAT * cos_widest) if cos_widest > 1e-9 else 180.0
+    whole_longitude = dlon >= 180.0
+
+    for bits in range(AXIS_BITS, -1, -1):
+        n = 1 << bits
+        lat_cells = range(_index(lat_low, 180.0, bits), _index(lat_high, 180.0, bits) + 1)
+        if whole_longitude:
+            lon_cells = range(n)
+        else:
+            # Indexes past either end wrap across the antimeridian
+            first = math.floor((longitude - dlon + 180.0) / 360.0 * n)
+            last = math.floor((longitude + dlon + 180.0) / 360.0 * n)
+            lon_cells = range(first, min(last, first + n - 1) + 1)
+        if len(lat_cells) * len(lon_cells) <= max_cells or bits == 0:
+            break
+
+    shift = 2 * (AXIS_BITS - bits)
+    prefixes = sorted({_interleave(lon % n, lat) for lon in lon_cells for lat in lat_cells})
+    ranges: List[Tuple[int, int]] = []
+    for prefix in prefixes:
+        low, high = prefix << shift, (prefix + 1) << shift
+        if ranges and ranges[-1][1] == low:
+            ranges[-1] = (ranges[-1][0], high)
+        else:
+            ranges.append((low, high))
+    return ranges
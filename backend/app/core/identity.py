@@ -0,0 +1,17 @@
+from app.auth.supabase_jwt import decode_supabase_jwt
+
+
+def caller_identity(scope) -> str:
+    """The caller's user id from a valid bearer token, else their address."""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                try:
+                    return "user:" + str(decode_supabase_jwt(token)["sub"])
+                except Exception:
+                    # Authentication is the endpoint's job; an invalid token falls back to the address
+                    pass
+            break
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
@@ -0,0 +1,70 @@
+"""Time-ordered UUIDs for server-generated keys.
+
+``uuid7`` puts a millisecond Unix timestamp in the top 48 bits (RFC 9562), so new
+keys land at the right-hand edge of the primary key index instead of on a random
+page, and ids sort by creation time. Within a millisecond a 12-bit counter keeps
+ids from one process strictly increasing.
+
+Rows created before the switch had free-form string ids; ``parse_id`` maps those to
+the same name-based UUID the 0007 migration gave them, so old links keep working.
+"""
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Optional
+
+# Namespace for name-based ids of legacy keys; see alembic 0007_uuid7_keys
+LEGACY_ID_NAMESPACE = uuid.UUID("6f1d3c52-9a4e-4d2b-8c47-2b1e5f0a9d11")
+# Text the 0007 migration cast as a UUID; uuid.UUID() alone also takes braces,
+# "urn:uuid:" and stray hyphens, which the migration maps as legacy ids
+UUID_TEXT = re.compile(r"[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}", re.IGNORECASE)
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7(at: Optional[datetime] = None, rand: Optional[int] = None) -> uuid.UUID:
+    """A version 7 UUID for now, or for ``at`` (no ordering guarantee then).
+
+    ``rand`` supplies the 80 random bits, for reproducible synthetic data.
+    """
+    global _last_ms, _counter
+    if rand is None:
+        rand = int.from_bytes(os.urandom(10), "big")
+    if at is not None:
+        ms, counter = int(at.timestamp() * 1000), rand >> 68
+    else:
+        ms = time.time_ns() // 1_000_000
+        with _lock:
+            if ms > _last_ms:
+                # Start low in the counter space so a burst rarely overflows it
+                _last_ms, _counter = ms, rand >> 69
+            else:
+                _counter += 1
+                if _counter > 0xFFF:
+                    _last_ms, _counter = _last_ms + 1, 0
+                ms = _last_ms
+            counter = _counter
+    value = (ms & 0xFFFF_FFFF_FFFF) << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | rand & (1 << 62) - 1
+    return uuid.UUID(int=value)
+
+
+def legacy_id(value: str) -> uuid.UUID:
+    return uuid.uuid3(LEGACY_ID_NAMESPACE, value)
+
+
+def parse_id(value: str) -> uuid.UUID:
+    """The key for an id as clients send it: a UUID, or a pre-UUID string id.
+
+    Raises ValueError for a value that can be neither: empty, or holding control
+    characters, which no URL path or cursor could have carried.
+    """
+    if UUID_TEXT.fullmatch(value):
+        return uuid.UUID(value)
+    if not value or not value.isprintable():
+        raise ValueError(f"Malformed id {value!r}")
+    return legacy_id(value)
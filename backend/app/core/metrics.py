@@ -0,0 +1,191 @@
+"""Prometheus instrumentation.
+
+Each worker aggregates into its own prometheus_client metrics; nothing is shared
+between requests beyond the per-series value, so the hot path is a dict lookup
+and an increment. When several workers run, set PROMETHEUS_MULTIPROC_DIR to an
+empty directory before start-up: prometheus_client then backs every value with
+an mmap'd per-process file and /metrics merges them on scrape.
+"""
+import os
+import time
+from typing import Dict, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.responses import Response
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SQL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5)
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by router group, route template and status",
+    ["group", "method", "route", "status"],
+)
+LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time from request start until the response body is sent",
+    ["group", "method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled",
+    ["group"],
+    multiprocess_mode="livesum",
+)
+SQL_DURATION = Histogram(
+    "db_statement_duration_seconds",
+    "SQL statement execution time by statement type",
+    ["operation"],
+    buckets=SQL_BUCKETS,
+)
+
+UNMATCHED = "unmatched"
+
+
+class _Children:
+    """Caches labelled children; ``labels()`` takes a lock and rebuilds the key on every call."""
+
+    def __init__(self, metric):
+        self.metric = metric
+        self.children: Dict[Tuple[str, ...], object] = {}
+
+    def get(self, *labels: str):
+        child = self.children.get(labels)
+        if child is None:
+            child = self.children[labels] = self.metric.labels(*labels)
+        return child
+
+
+_requests = _Children(REQUESTS)
+_latency = _Children(LATENCY)
+_in_flight = _Children(IN_FLIGHT)
+_sql = _Children(SQL_DURATION)
+
+
+def _route_template(scope, root_path: str) -> str:
+    """Full template of the matched route, e.g. ``/api/packages/{id}/change-request``."""
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED
+    # FastAPI releases that include routers lazily match the included router's own
+    # route, whose path is relative to the include prefix; the effective route carries
+    # the full one. Older releases copy routes with the prefix already applied.
+    effective = (scope.get("fastapi") or {}).get("effective_route_context")
+    path = getattr(effective, "path_format", None) or route.path_format
+    # Inside a mounted app paths are relative to the mount, which routing appends to root_path
+    return scope.get("root_path", "")[len(root_path):] + path
+
+
+class MetricsMiddleware:
+    """Records request count, latency and in-flight requests per router group.
+
+    ``groups`` maps a group label to the prefix its router is mounted at; a request
+    is attributed to the longest prefix matching its path. Route labels use the
+    route template so path parameters do not create new series.
+    """
+
+    def __init__(self, app, groups: Dict[str, str], default_group: str = "app"):
+        self.app = app
+        self.prefixes = sorted(groups.items(), key=lambda item: len(item[1]), reverse=True)
+        self.default_group = default_group
+        self._group_cache: Dict[str, Tuple[str, str]] = {}
+
+    def group_for(self, path: str) -> Tuple[str, str]:
+        """Returns ``(group, prefix)`` for a request path."""
+        match = self._group_cache.get(path)
+        if match is None:
+            match = (self.default_group, "")
+            for name, prefix in self.prefixes:
+                if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                    match = (name, prefix)
+                    break
+            if len(self._group_cache) < 10_000:
+                self._group_cache[path] = match
+        return match
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        group, _ = self.group_for(scope["path"])
+        root_path = scope.get("root_path", "")
+        method = scope["method"]
+        status = "500"
+        in_flight = _in_flight.get(group)
+        in_flight.inc()
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            template = _route_template(scope, root_path)
+            _requests.get(group, method, template, status).inc()
+            _latency.get(group, method, template).observe(elapsed)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["metrics_started"].pop()
+    operation = statement.lstrip()[:6].upper()
+    if operation not in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+        operation = "OTHER"
+    _sql.get(operation).observe(time.perf_counter() - started)
+
+
+def _handle_error(context):
+    stack = context.connection.info.get("metrics_started") if context.connection is not None else None
+    if stack:
+        stack.pop()
+
+
+def install_sql_metrics(engine: Engine):
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+def _multiprocess_dir():
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir")
+
+
+def metrics_response() -> Response:
+    if _multiprocess_dir():
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_worker_stopped():
+    """Drops this worker's live gauges from the shared directory on shutdown."""
+    if _multiprocess_dir():
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(os.getpid())
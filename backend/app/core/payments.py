@@ -0,0 +1,61 @@
+"""Payment capture.
+
+``LocalStripe`` stands in for the Stripe API with the parts the booking pipeline
+relies on: captures are keyed by an idempotency key, so repeating a capture after a
+timeout or a lost worker returns the original charge instead of charging twice;
+declines are permanent; and the provider is sometimes slow or briefly unavailable.
+Stripe's ``tok_chargeDeclined`` test token is declined.
+"""
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Dict, Optional
+from uuid import uuid4
+
+from app.core.config import settings
+
+DECLINED_TOKENS = {"tok_chargeDeclined"}
+
+
+class PaymentDeclined(Exception):
+    """The card was refused; retrying will not help."""
+
+
+class PaymentUnavailable(Exception):
+    """The provider could not be reached or failed; the capture may be retried."""
+
+
+@dataclass
+class Charge:
+    id: str
+    amount_cents: int
+    payment_token: str
+
+
+class LocalStripe:
+    def __init__(self, latency_ms: float = 0.0, failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._charges: Dict[str, Charge] = {}
+        self.captures = 0
+
+    async def capture(self, amount: float, payment_token: str, idempotency_key: str) -> Charge:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000 * self._random.uniform(0.5, 1.5))
+        if self._random.random() < self.failure_rate:
+            raise PaymentUnavailable("Payment provider unavailable")
+        charge = self._charges.get(idempotency_key)
+        if charge is not None:
+            return charge
+        if payment_token in DECLINED_TOKENS:
+            raise PaymentDeclined("Your card was declined")
+        self.captures += 1
+        charge = Charge(
+            id="ch_" + uuid4().hex[:24], amount_cents=round(amount * 100), payment_token=payment_token
+        )
+        self._charges[idempotency_key] = charge
+        return charge
+
+
+payments = LocalStripe(latency_ms=settings.payments_latency_ms, failure_rate=settings.payments_failure_rate)
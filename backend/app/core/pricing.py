@@ -0,0 +1,115 @@
+"""Package quoting.
+
+A quote is lodging nights + event tickets + addons, then markup on that subtotal
+and tax on the marked-up amount. Inputs are columnar (one slot per package, plus a
+flat list of event rows tagged with their package's slot) so a batch of any size
+is a handful of NumPy array operations. NumPy is imported on first use to keep it
+off the start-up path.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+
+def addon_total(addons: Optional[dict]) -> float:
+    """Sums priced addons.
+
+    A value is either a price (``{"parking": 25}``) or ``{"price": p, "quantity": n}``;
+    anything else (flags, notes) carries no charge.
+    """
+    total = 0.0
+    for value in (addons or {}).values():
+        if isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float)):
+            total += value
+        elif isinstance(value, dict) and isinstance(value.get("price"), (int, float)):
+            quantity = value.get("quantity", 1)
+            total += value["price"] * (quantity if isinstance(quantity, (int, float)) else 1)
+    return total
+
+
+@dataclass
+class QuoteInputs:
+    package_ids: List[str] = field(default_factory=list)
+    lodging_prices: List[float] = field(default_factory=list)
+    addon_totals: List[float] = field(default_factory=list)
+    # One entry per (package, event) pair
+    event_slots: List[int] = field(default_factory=list)
+    event_prices: List[float] = field(default_factory=list)
+    event_days: List[int] = field(default_factory=list)
+
+    def add_package(self, package_id: str, lodging_price: Optional[float], addons: Optional[dict]) -> int:
+        self.package_ids.append(package_id)
+        self.lodging_prices.append(lodging_price or 0.0)
+        self.addon_totals.append(addon_total(addons))
+        return len(self.package_ids) - 1
+
+    def add_event(self, slot: int, price: float, day: date):
+        self.event_slots.append(slot)
+        self.event_prices.append(price)
+        self.event_days.append(day.toordinal())
+
+
+@dataclass
+class QuoteBatch:
+    """Quoted amounts as arrays aligned with ``package_ids``."""
+
+    package_ids: List[str]
+    nights: Any
+    lodging: Any
+    events: Any
+    addons: Any
+    markup: Any
+    tax: Any
+    total: Any
+
+    def rows(self) -> List[Dict[str, Any]]:
+        columns = ("nights", "lodging", "events", "addons", "markup", "tax", "total")
+        values = [getattr(self, name).tolist() for name in columns]
+        return [
+            {"package_id": package_id, **dict(zip(columns, row))}
+            for package_id, row in zip(self.package_ids, zip(*values))
+        ]
+
+
+def quote_batch(
+    inputs: QuoteInputs,
+    markup_rate: Optional[float] = None,
+    tax_rate: Optional[float] = None,
+) -> QuoteBatch:
+    import numpy as np
+
+    markup_rate = settings.quote_markup_rate if markup_rate is None else markup_rate
+    tax_rate = settings.quote_tax_rate if tax_rate is None else tax_rate
+    size = len(inputs.package_ids)
+
+    slots = np.asarray(inputs.event_slots, dtype=np.intp)
+    days = np.asarray(inputs.event_days, dtype=np.int64)
+    tickets = np.bincount(slots, weights=np.asarray(inputs.event_prices, dtype=np.float64), minlength=size)
+
+    # Stay from the first event day through the night of the last one
+    first = np.full(size, np.iinfo(np.int64).max, dtype=np.int64)
+    last = np.full(size, np.iinfo(np.int64).min, dtype=np.int64)
+    np.minimum.at(first, slots, days)
+    np.maximum.at(last, slots, days)
+    has_events = np.bincount(slots, minlength=size) > 0
+    nights = np.where(has_events, last - first + 1, settings.quote_default_nights)
+
+    lodging = np.asarray(inputs.lodging_prices, dtype=np.float64) * nights
+    addons = np.asarray(inputs.addon_totals, dtype=np.float64)
+    subtotal = lodging + tickets + addons
+    markup = np.round(subtotal * markup_rate, 2)
+    tax = np.round((subtotal + markup) * tax_rate, 2)
+    return QuoteBatch(
+        package_ids=list(inputs.package_ids),
+        nights=nights,
+        lodging=np.round(lodging, 2),
+        events=np.round(tickets, 2),
+        addons=np.round(addons, 2),
+        markup=markup,
+        tax=tax,
+        total=np.round(subtotal + markup + tax, 2),
+    )
@@ -0,0 +1,272 @@
+"""On-demand request profiling.
+
+A request is captured when an admin sends the profiling header or when it falls in
+the sampled share of traffic. While it runs, a background thread samples its stack
+every ``interval_ms``: the live Python stack when the request's task is on the
+event loop, and the chain of suspended coroutines when it is waiting (a database
+round trip, a lock), so the profile is wall-clock rather than CPU time. SQL
+statements and their durations are recorded from engine events alongside.
+
+Finished profiles go into a bounded ring buffer, served by /api/admin/profiles; the
+folded form ("frame;frame;frame count" per line) feeds flamegraph.pl or speedscope.
+
+Nothing here is imported unless PROFILING_ENABLED is set, so with profiling off
+there is no middleware, no engine listener and no sampler thread.
+"""
+import asyncio
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.ids import uuid7
+
+WAITING = "(waiting)"
+
+_current: ContextVar[Optional["Capture"]] = ContextVar("profile_capture", default=None)
+_buffer: Optional[Deque["Capture"]] = None
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    parts = code.co_filename.replace("\\", "/").rsplit("/", 2)
+    return f"{'/'.join(parts[-2:])}:{code.co_qualname}"
+
+
+def _running_stack(frame) -> List[str]:
+    """Outermost-first frames of the running task, without the event loop underneath."""
+    stack = []
+    while frame is not None:
+        if frame.f_code.co_filename.endswith(("asyncio/events.py", "asyncio\\events.py")):
+            break
+        stack.append(_frame_name(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _suspended_stack(task: asyncio.Task) -> List[str]:
+    """Outermost-first frames of the coroutines the suspended task is awaiting through."""
+    stack = []
+    coro = task.get_coro()
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        stack.append(_frame_name(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    stack.append(WAITING)
+    return stack
+
+
+class Capture:
+    def __init__(self, method: str, path: str, trigger: str, task: asyncio.Task, max_sql: int):
+        self.id = str(uuid7())
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.task = task
+        self.loop = task.get_loop()
+        self.thread_id = threading.get_ident()
+        self.max_sql = max_sql
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status: Optional[int] = None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.sql: List[Tuple[str, float]] = []
+        self.sql_total_ms = 0.0
+        self.sql_count = 0
+
+    def sample(self, frames: Dict[int, object]):
+        try:
+            if asyncio.current_task(self.loop) is self.task:
+                stack = _running_stack(frames.get(self.thread_id))
+            else:
+                stack = _suspended_stack(self.task)
+        except Exception:
+            # The loop thread moved on while we were walking; skip this sample
+            return
+        self.stacks[tuple(stack)] += 1
+        self.samples += 1
+
+    def record_sql(self, statement: str, duration_ms: float):
+        self.sql_count += 1
+        self.sql_total_ms += duration_ms
+        if len(self.sql) < self.max_sql:
+            self.sql.append((" ".join(statement.split()), duration_ms))
+
+    def folded(self) -> str:
+        root = f"{self.method} {self.path}".replace(";", ":")
+        return "".join(
+            f"{';'.join((root, *stack))} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "samples": self.samples,
+            "sql_count": self.sql_count,
+            "sql_total_ms": round(self.sql_total_ms, 3),
+            "sql": [{"statement": statement, "duration_ms": round(ms, 3)} for statement, ms in self.sql],
+        }
+
+
+class Sampler:
+    """One daemon thread sampling every active capture; it exits when none are left."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._active: Dict[str, Capture] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, capture: Capture):
+        with self._lock:
+            self._active[capture.id] = capture
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def discard(self, capture: Capture):
+        with self._lock:
+            self._active.pop(capture.id, None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                captures = list(self._active.values())
+                if not captures:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            for capture in captures:
+                capture.sample(frames)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    capture = _current.get()
+    stack = conn.info.get("profile_started")
+    if capture is not None and stack:
+        capture.record_sql(statement, (time.perf_counter() - stack.pop()) * 1000)
+
+
+def _handle_error(context):
+    stack = context.connection.info.get("profile_started") if context.connection is not None else None
+    if stack and _current.get() is not None:
+        stack.pop()
+
+
+def install_sql_profiling(engine: Engine):
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+def _is_admin(scope, allow_no_auth: bool) -> bool:
+    if allow_no_auth:
+        return True
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return False
+            from app.auth.supabase_jwt import decode_supabase_jwt, extract_user_ctx
+
+            try:
+                return extract_user_ctx(decode_supabase_jwt(token)).get("role") == "admin"
+            except Exception:
+                return False
+    return False
+
+
+class ProfilingMiddleware:
+    """Profiles requests that carry ``header`` from an admin, and ``sample_rate`` of the rest.
+
+    Profiled responses carry ``X-Profile-Id``, the key to fetch the profile by.
+    """
+
+    def __init__(
+        self,
+        app,
+        header: str,
+        sample_rate: float,
+        interval_ms: float,
+        buffer_size: int,
+        max_sql: int,
+        allow_no_auth: bool = False,
+    ):
+        global _buffer
+        self.app = app
+        self.header = header.lower().encode("latin-1")
+        self.sample_rate = sample_rate
+        self.max_sql = max_sql
+        self.allow_no_auth = allow_no_auth
+        self.sampler = Sampler(interval_ms / 1000)
+        self.buffer: Deque[Capture] = deque(maxlen=buffer_size)
+        _buffer = self.buffer
+
+    def _trigger(self, scope) -> Optional[str]:
+        if any(name == self.header for name, _ in scope["headers"]):
+            return "header" if _is_admin(scope, self.allow_no_auth) else None
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        capture = Capture(scope["method"], scope["path"], trigger, asyncio.current_task(), self.max_sql)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                capture.status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", capture.id.encode())]
+            await send(message)
+
+        token = _current.set(capture)
+        self.sampler.add(capture)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.sampler.discard(capture)
+            _current.reset(token)
+            capture.duration_ms = round((time.perf_counter() - capture.started) * 1000, 3)
+            capture.task = None
+            self.buffer.append(capture)
+
+
+def recent_profiles() -> List[Capture]:
+    """Newest first; empty when profiling is off."""
+    return list(reversed(_buffer)) if _buffer is not None else []
+
+
+def find_profile(profile_id: str) -> Optional[Capture]:
+    for capture in recent_profiles():
+        if capture.id == profile_id:
+            return capture
+    return None
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Set
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 100
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+NOTIFY_PAYLOAD_LIMIT = 7900
+# Backoff between attempts to re-establish a lost LISTEN connection
+RECONNECT_BASE_SECONDS = 0.5
+RECONNECT_MAX_SECONDS = 30.0
+
+
+class LocalBroker:
+    """In-process fan-out: every subscriber of a channel gets its own bounded queue.
+
+    A subscriber that falls behind loses its oldest pending messages rather than
+    stalling the publisher.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def deliver(self, channel: str, message: dict):
+        for queue in self._subscribers.get(channel, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    async def publish(self, channel: str, message: dict):
+        self.deliver(channel, message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+
+class PostgresBroker(LocalBroker):
+    """Fan-out across workers through LISTEN/NOTIFY on a single Postgres channel.
+
+    Publishing only NOTIFYs; every worker, the publisher included, delivers to its
+    local subscribers when the notification comes back on its LISTEN connection.
+    A dropped LISTEN connection is re-established in the background with backoff;
+    notifications sent while it is down are lost, and stream clients catch up from
+    the thread. A dropped NOTIFY connection is replaced on the next publish.
+    """
+
+    def __init__(self, database_url: str, channel: str):
+        super().__init__()
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.channel = channel
+        self._listen_conn = None
+        self._notify_conn = None
+        self._notify_lock = asyncio.Lock()
+        self._reconnect_task = None
+        self._stopping = False
+
+    async def _connect(self):
+        import asyncpg
+
+        return await asyncpg.connect(self.dsn)
+
+    async def start(self):
+        self._stopping = False
+        self._notify_conn = await self._connect()
+        await self._listen()
+
+    async def _listen(self):
+        conn = await self._connect()
+        try:
+            await conn.add_listener(self.channel, self._on_notify)
+        except BaseException:
+            await conn.close()
+            raise
+        conn.add_termination_listener(self._on_listen_lost)
+        self._listen_conn = conn
+
+    def _on_listen_lost(self, connection):
+        # Also called for the close() in stop(), and for a connection already replaced
+        if self._stopping or connection is not self._listen_conn:
+            return
+        logger.warning("LISTEN connection on %s lost; reconnecting", self.channel)
+        self._listen_conn = None
+        self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self):
+        delay = RECONNECT_BASE_SECONDS
+        while not self._stopping:
+            try:
+                await self._listen()
+            except Exception as exc:
+                logger.warning("LISTEN reconnect failed (%s); retrying in %.1fs", exc, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+            else:
+                logger.info("LISTEN connection on %s re-established", self.channel)
+                return
+
+    async def stop(self):
+        self._stopping = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        for conn in (self._listen_conn, self._notify_conn):
+            if conn is not None:
+                await conn.close()
+        self._listen_conn = self._notify_conn = None
+
+    def _on_notify(self, connection, pid, channel, payload: str):
+        try:
+            envelope = json.loads(payload)
+            self.deliver(envelope["channel"], envelope["message"])
+        except (ValueError, KeyError):
+            logger.warning("Dropping malformed notification on %s", channel)
+
+    async def publish(self, channel: str, message: dict):
+        payload = json.dumps({"channel": channel, "message": message}, default=str)
+        if len(payload.encode()) > NOTIFY_PAYLOAD_LIMIT:
+            # Too big for NOTIFY: send a stub, the client fetches the full row
+            stub = {"id": message.get("id"), "truncated": True}
+            payload = json.dumps({"channel": channel, "message": stub})
+        async with self._notify_lock:
+            if self._notify_conn is None or self._notify_conn.is_closed():
+                self._notify_conn = await self._connect()
+            await self._notify_conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+
+def build_broker(backend: str, database_url: str, channel: str):
+    if backend == "local":
+        return LocalBroker()
+    if backend == "postgres":
+        return PostgresBroker(database_url, channel)
+    raise ValueError(f"Unknown pub/sub backend {backend!r}")
+
+
+broker = build_broker(settings.pubsub_backend, settings.database_url, settings.pubsub_channel)
@@ -0,0 +1,88 @@
+import logging
+import time
+from typing import TYPE_CHECKING, Optional
+
+# app.main imports this module first and the import clock starts below, so nothing
+# heavy (asyncio, SQLAlchemy) is imported at module level here
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimings:
+    """Cold-start milestones for one worker, in milliseconds since app.main began importing."""
+
+    def __init__(self):
+        self.import_started = time.perf_counter()
+        self.imported: Optional[float] = None
+        self.lifespan_started: Optional[float] = None
+        self.ready: Optional[float] = None
+        self.first_request: Optional[float] = None
+        self.db_ready: Optional[bool] = None
+        self.db_check_ms: Optional[float] = None
+        self.db_error: Optional[str] = None
+
+    def _ms(self, mark: Optional[float]) -> Optional[float]:
+        return None if mark is None else round((mark - self.import_started) * 1000, 1)
+
+    def mark(self, name: str):
+        setattr(self, name, time.perf_counter())
+
+    def as_dict(self) -> dict:
+        return {
+            "import_ms": self._ms(self.imported),
+            "lifespan_started_ms": self._ms(self.lifespan_started),
+            "ready_ms": self._ms(self.ready),
+            "first_request_ms": self._ms(self.first_request),
+            "db_ready": self.db_ready,
+            "db_check_ms": self.db_check_ms,
+            "db_error": self.db_error,
+        }
+
+
+timings = StartupTimings()
+
+
+async def check_database(engine: "AsyncEngine", timeout: float):
+    """SELECT 1 with a deadline; a failure is recorded and logged, never raised."""
+    import asyncio
+
+    from sqlalchemy import text
+
+    started = time.perf_counter()
+
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    try:
+        await asyncio.wait_for(ping(), timeout)
+        timings.db_ready = True
+    except Exception as exc:
+        timings.db_ready = False
+        timings.db_error = f"{type(exc).__name__}: {exc}"
+        logger.warning("Database not reachable at startup: %s", timings.db_error)
+    timings.db_check_ms = round((time.perf_counter() - started) * 1000, 1)
+
+
+class FirstRequestTimer:
+    """Records when the first HTTP response starts, then steps out of the way."""
+
+    def __init__(self, app):
+        self.app = app
+        self.pending = True
+
+    async def __call__(self, scope, receive, send):
+        if not self.pending or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if self.pending and message["type"] == "http.response.start":
+                self.pending = False
+                timings.mark("first_request")
+                logger.info("Startup timings: %s", timings.as_dict())
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,330 @@
+"""City/date availability rollups for discovery pages.
+
+availability_days and availability_day_tags hold, per (city, date), the event count,
+the event price range and the tag histogram; availability_cities holds the lodging
+count, price range and cheapest lodging per city. The admin write paths keep them
+current as part of the write: an event or lodging that is new to the catalog is
+added to its bucket with ON CONFLICT increments, and only a bucket that an existing
+row left or changed inside (its minimum may have gone with it) is recomputed, from
+the (city, date) and (location, price) indexes.
+
+    python -m app.db.availability    # rebuild from scratch, e.g. after a bulk load
+"""
+import asyncio
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import and_, case, delete, func, insert, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.db.search import normalize_tags
+from app.db.upsert import dialect_insert
+from app.models.models import (
+    Event,
+    Lodging,
+    availability_cities,
+    availability_day_tags,
+    availability_days,
+    event_tags,
+)
+
+Day = Tuple[str, date]
+
+
+@dataclass(frozen=True)
+class EventFacts:
+    """The parts of an event the rollups depend on."""
+
+    city: str
+    date: date
+    price: float
+    tags: Tuple[str, ...]
+
+    @classmethod
+    def of(cls, city: str, day: date, price: float, tags: Optional[Iterable[str]]) -> "EventFacts":
+        return cls(city, day, price, tuple(normalize_tags(tags)))
+
+    @property
+    def day(self) -> Day:
+        return self.city, self.date
+
+
+@dataclass(frozen=True)
+class LodgingFacts:
+    location: str
+    price: float
+
+
+def _least(db: AsyncSession, a, b):
+    # SQLite's two-argument min()/max() are the scalar forms of LEAST/GREATEST
+    return func.least(a, b) if db.get_bind().dialect.name == "postgresql" else func.min(a, b)
+
+
+def _greatest(db: AsyncSession, a, b):
+    return func.greatest(a, b) if db.get_bind().dialect.name == "postgresql" else func.max(a, b)
+
+
+# -- events -----------------------------------------------------------------
+
+
+async def previous_events(db: AsyncSession, event_ids: Sequence[str]) -> Dict[str, EventFacts]:
+    """Current facts for the events about to be overwritten, locked until commit."""
+    rows = await db.execute(
+        select(Event.id, Event.city, Event.date, Event.price, Event.tags)
+        .where(Event.id.in_(list(event_ids)))
+        .with_for_update()
+    )
+    return {event_id: EventFacts.of(city, day, price, tags) for event_id, city, day, price, tags in rows}
+
+
+async def _add_events(db: AsyncSession, added: List[EventFacts]):
+    days: Dict[Day, list] = {}
+    tags: Counter = Counter()
+    for facts in added:
+        bucket = days.get(facts.day)
+        if bucket is None:
+            days[facts.day] = [1, facts.price, facts.price]
+        else:
+            bucket[0] += 1
+            bucket[1] = min(bucket[1], facts.price)
+            bucket[2] = max(bucket[2], facts.price)
+        tags.update((facts.city, facts.date, tag) for tag in facts.tags)
+    if not days:
+        return
+
+    table = availability_days
+    stmt = dialect_insert(db, table)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["city", "date"],
+            set_={
+                "event_count": table.c.event_count + stmt.excluded.event_count,
+                "min_event_price": _least(db, table.c.min_event_price, stmt.excluded.min_event_price),
+                "max_event_price": _greatest(db, table.c.max_event_price, stmt.excluded.max_event_price),
+            },
+        ),
+        [
+            {"city": city, "date": day, "event_count": count, "min_event_price": low, "max_event_price": high}
+            for (city, day), (count, low, high) in days.items()
+        ],
+    )
+    if tags:
+        table = availability_day_tags
+        stmt = dialect_insert(db, table)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["city", "date", "tag"],
+                set_={"event_count": table.c.event_count + stmt.excluded.event_count},
+            ),
+            [
+                {"city": city, "date": day, "tag": tag, "event_count": count}
+                for (city, day, tag), count in tags.items()
+            ],
+        )
+
+
+async def _recompute_days(db: AsyncSession, days: Optional[Set[Day]]):
+    """Rewrites the rollup rows of ``days`` (every day when None) from events/event_tags."""
+    day_rows = select(Event.city, Event.date, func.count(), func.min(Event.price), func.max(Event.price))
+    tag_rows = select(Event.city, Event.date, event_tags.c.tag, func.count()).join(
+        event_tags, event_tags.c.event_id == Event.id
+    )
+    clear_days, clear_tags = delete(availability_days), delete(availability_day_tags)
+    if days is not None:
+        keys = list(days)
+        day_rows = day_rows.where(tuple_(Event.city, Event.date).in_(keys))
+        tag_rows = tag_rows.where(tuple_(Event.city, Event.date).in_(keys))
+        clear_days = clear_days.where(tuple_(availability_days.c.city, availability_days.c.date).in_(keys))
+        clear_tags = clear_tags.where(
+            tuple_(availability_day_tags.c.city, availability_day_tags.c.date).in_(keys)
+        )
+    await db.execute(clear_days)
+    await db.execute(clear_tags)
+    await db.execute(
+        insert(availability_days).from_select(
+            ["city", "date", "event_count", "min_event_price", "max_event_price"],
+            day_rows.group_by(Event.city, Event.date),
+        )
+    )
+    await db.execute(
+        insert(availability_day_tags).from_select(
+            ["city", "date", "tag", "event_count"],
+            tag_rows.group_by(Event.city, Event.date, event_tags.c.tag),
+        )
+    )
+
+
+async def apply_event_changes(db: AsyncSession, previous: Dict[str, EventFacts], rows: Sequence[dict]):
+    """Brings the rollups up to date with ``rows`` (id, city, date, price, tags) once they,
+    and their event_tags, have been written. ``previous`` holds the facts of the rows
+    that existed before, from previous_events or the ORM attribute history."""
+    added: List[EventFacts] = []
+    dirty: Set[Day] = set()
+    for row in rows:
+        facts = EventFacts.of(row["city"], row["date"], row["price"], row.get("tags"))
+        before = previous.get(row["id"])
+        if before is None:
+            added.append(facts)
+        elif before != facts:
+            dirty.update((before.day, facts.day))
+    # A recomputed day already counts the new events in it
+    await _add_events(db, [facts for facts in added if facts.day not in dirty])
+    if dirty:
+        await _recompute_days(db, dirty)
+
+
+# -- lodgings ---------------------------------------------------------------
+
+
+async def previous_lodgings(db: AsyncSession, lodging_ids: Sequence[str]) -> Dict[str, LodgingFacts]:
+    rows = await db.execute(
+        select(Lodging.id, Lodging.location, Lodging.price)
+        .where(Lodging.id.in_(list(lodging_ids)))
+        .with_for_update()
+    )
+    return {lodging_id: LodgingFacts(location, price) for lodging_id, location, price in rows}
+
+
+async def _add_lodgings(db: AsyncSession, added: List[Tuple[str, LodgingFacts]]):
+    cities: Dict[str, list] = {}
+    for lodging_id, facts in added:
+        city = cities.get(facts.location)
+        if city is None:
+            cities[facts.location] = [1, facts.price, facts.price, lodging_id]
+            continue
+        city[0] += 1
+        if (facts.price, lodging_id) < (city[1], city[3]):
+            city[1], city[3] = facts.price, lodging_id
+        city[2] = max(city[2], facts.price)
+    if not cities:
+        return
+
+    table = availability_cities
+    stmt = dialect_insert(db, table)
+    excluded = stmt.excluded
+    # Cheapest is by (price, id), the order _recompute_cities picks it in
+    cheaper = or_(
+        excluded.min_lodging_price < table.c.min_lodging_price,
+        and_(
+            excluded.min_lodging_price == table.c.min_lodging_price,
+            excluded.cheapest_lodging_id < table.c.cheapest_lodging_id,
+        ),
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["city"],
+            set_={
+                "lodging_count": table.c.lodging_count + excluded.lodging_count,
+                "min_lodging_price": _least(db, table.c.min_lodging_price, excluded.min_lodging_price),
+                "max_lodging_price": _greatest(db, table.c.max_lodging_price, excluded.max_lodging_price),
+                "cheapest_lodging_id": case(
+                    (cheaper, excluded.cheapest_lodging_id), else_=table.c.cheapest_lodging_id
+                ),
+            },
+        ),
+        [
+            {
+                "city": city,
+                "lodging_count": count,
+                "min_lodging_price": low,
+                "max_lodging_price": high,
+                "cheapest_lodging_id": cheapest,
+            }
+            for city, (count, low, high, cheapest) in cities.items()
+        ],
+    )
+
+
+async def _recompute_cities(db: AsyncSession, cities: Optional[Set[str]]):
+    cheapest = aliased(Lodging)
+    rows = select(
+        Lodging.location,
+        func.count(),
+        func.min(Lodging.price),
+        func.max(Lodging.price),
+        select(cheapest.id)
+        .where(cheapest.location == Lodging.location)
+        .order_by(cheapest.price, cheapest.id)
+        .limit(1)
+        .scalar_subquery(),
+    )
+    clear = delete(availability_cities)
+    if cities is not None:
+        rows = rows.where(Lodging.location.in_(list(cities)))
+        clear = clear.where(availability_cities.c.city.in_(list(cities)))
+    await db.execute(clear)
+    await db.execute(
+        insert(availability_cities).from_select(
+            ["city", "lodging_count", "min_lodging_price", "max_lodging_price", "cheapest_lodging_id"],
+            rows.group_by(Lodging.location),
+        )
+    )
+
+
+async def apply_lodging_changes(db: AsyncSession, previous: Dict[str, LodgingFacts], rows: Sequence[dict]):
+    """Lodging counterpart of apply_event_changes."""
+    added: List[Tuple[str, LodgingFacts]] = []
+    dirty: Set[str] = set()
+    for row in rows:
+        facts = LodgingFacts(row["location"], row["price"])
+        before = previous.get(row["id"])
+        if before is None:
+            added.append((row["id"], facts))
+        elif before != facts:
+            dirty.update((before.location, facts.location))
+    await _add_lodgings(db, [(lodging_id, facts) for lodging_id, facts in added if facts.location not in dirty])
+    if dirty:
+        await _recompute_cities(db, dirty)
+
+
+# -- reads ------------------------------------------------------------------
+
+
+async def load_availability(
+    db: AsyncSession, city: Optional[str], date_from: date, date_to: date
+) -> Tuple[list, Dict[Day, Dict[str, int]], Dict[str, tuple]]:
+    """Day rows, tag histograms by day and lodging rows by city, for ``date_from..date_to``."""
+    days_stmt = select(availability_days).where(availability_days.c.date.between(date_from, date_to))
+    tags_stmt = select(availability_day_tags).where(availability_day_tags.c.date.between(date_from, date_to))
+    cities_stmt = select(availability_cities)
+    if city is not None:
+        days_stmt = days_stmt.where(availability_days.c.city == city)
+        tags_stmt = tags_stmt.where(availability_day_tags.c.city == city)
+        cities_stmt = cities_stmt.where(availability_cities.c.city == city)
+    days = (await db.execute(days_stmt.order_by(availability_days.c.city, availability_days.c.date))).all()
+    if not days:
+        return [], {}, {}
+    tags: Dict[Day, Dict[str, int]] = {}
+    for row in await db.execute(tags_stmt):
+        tags.setdefault((row.city, row.date), {})[row.tag] = row.event_count
+    if city is None:
+        cities_stmt = cities_stmt.where(availability_cities.c.city.in_({row.city for row in days}))
+    lodgings = {row.city: row for row in await db.execute(cities_stmt)}
+    return days, tags, lodgings
+
+
+async def rebuild_availability(db: AsyncSession) -> dict:
+    """Recomputes every rollup row in one transaction."""
+    await _recompute_days(db, None)
+    await _recompute_cities(db, None)
+    await db.commit()
+    counts = {}
+    for table in (availability_days, availability_day_tags, availability_cities):
+        counts[table.name] = (await db.execute(select(func.count()).select_from(table))).scalar_one()
+    return counts
+
+
+async def _main():
+    from app.db.session import SessionLocal, engine
+
+    async with SessionLocal() as db:
+        for table, rows in (await rebuild_availability(db)).items():
+            print(f"{table}: {rows} rows")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
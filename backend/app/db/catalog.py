@@ -0,0 +1,85 @@
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import NamespacedCache, build_backend
+from app.core.config import settings
+from app.db.session import replicas
+from app.models.models import Event, Lodging
+from app.schemas.models import EventOut, LodgingOut
+
+EVENTS = "events"
+LODGINGS = "lodgings"
+
+# Events and lodgings only change through the admin router, which invalidates the
+# matching namespace after it commits. Values are schema objects, never ORM
+# instances, so they are safe to share across sessions.
+catalog_cache = NamespacedCache(
+    maxsize=settings.catalog_cache_size,
+    ttl=settings.catalog_cache_ttl_seconds,
+    backend=build_backend(settings.catalog_cache_backend, settings.catalog_cache_shared_path),
+)
+# Encoded (body, etag) pages. Shares the invalidation backend, so the same namespace
+# bumps retire them, but is bounded by the bytes it holds rather than by entry count.
+page_cache = NamespacedCache(
+    maxsize=settings.catalog_cache_size,
+    ttl=settings.catalog_cache_ttl_seconds,
+    backend=catalog_cache.backend,
+    maxweight=settings.catalog_page_cache_bytes,
+    weigh=lambda page: len(page[0]) + len(page[1]),
+)
+
+
+async def get_lodging(db: AsyncSession, lodging_id: str) -> Optional[LodgingOut]:
+    lodging = catalog_cache.get(LODGINGS, lodging_id)
+    if lodging is None:
+        generation = catalog_cache.generation(LODGINGS)
+        obj = await db.get(Lodging, lodging_id)
+        if obj is None:
+            return None
+        lodging = LodgingOut.model_validate(obj)
+        catalog_cache.set(LODGINGS, lodging_id, lodging, generation)
+    return lodging
+
+
+async def get_events(db: AsyncSession, event_ids: Iterable[str]) -> Dict[str, EventOut]:
+    """Events by id; ids that do not exist are absent from the result."""
+    found: Dict[str, EventOut] = {}
+    missing: List[str] = []
+    for event_id in event_ids:
+        event = catalog_cache.get(EVENTS, event_id)
+        if event is None:
+            missing.append(event_id)
+        else:
+            found[event_id] = event
+    if missing:
+        generation = catalog_cache.generation(EVENTS)
+        rows = await db.execute(select(Event).where(Event.id.in_(missing)))
+        for obj in rows.scalars():
+            event = EventOut.model_validate(obj)
+            catalog_cache.set(EVENTS, event.id, event, generation)
+            found[event.id] = event
+    return found
+
+
+def city_namespace(namespace: str, city: str) -> str:
+    """Generation of one city's rows, for structures built per city (search indexes,
+    suggestion catalogs) that would otherwise rebuild on a write anywhere."""
+    return f"{namespace}:{city}"
+
+
+def invalidate_events(cities: Iterable[str]):
+    """``cities``: every city an event was written in or moved out of."""
+    catalog_cache.invalidate(EVENTS)
+    for city in set(cities):
+        catalog_cache.invalidate(city_namespace(EVENTS, city))
+    replicas.pin_primary()
+
+
+def invalidate_lodgings(cities: Iterable[str]):
+    """``cities``: every location a lodging was written in or moved out of."""
+    catalog_cache.invalidate(LODGINGS)
+    for city in set(cities):
+        catalog_cache.invalidate(city_namespace(LODGINGS, city))
+    replicas.pin_primary()
@@ -0,0 +1,120 @@
+"""Streaming table exports for ops and finance.
+
+Rows are read through a server-side cursor in ``EXPORT_BATCH_SIZE`` partitions and
+encoded batch by batch, so memory stays flat however large the table is.
+"""
+import csv
+import io
+import zlib
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+import orjson
+from sqlalchemy import Table, select
+
+from app.db.session import read_session
+from app.models.models import Booking, Message, Package
+
+EXPORT_BATCH_SIZE = 1000
+
+# Column allow-lists; payment tokens and anything else not listed never leave the database
+EXPORTS: Dict[str, tuple] = {
+    "bookings": (Booking.__table__, ["id", "package_id", "user_id", "status", "created_at"]),
+    "messages": (
+        Message.__table__,
+        ["id", "sender_id", "receiver_id", "package_id", "message_text", "attachment_url", "created_at"],
+    ),
+    "packages": (
+        Package.__table__,
+        ["id", "lodging_id", "status", "addons", "quoted_total", "quoted_at", "created_at"],
+    ),
+}
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode()
+    return value
+
+
+class _CSVEncoder:
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def _drain(self) -> bytes:
+        data = self.buffer.getvalue().encode()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+    def header(self) -> bytes:
+        self.writer.writerow(self.columns)
+        return self._drain()
+
+    def rows(self, rows) -> bytes:
+        self.writer.writerows([_csv_value(value) for value in row] for row in rows)
+        return self._drain()
+
+
+class _NDJSONEncoder:
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+
+    def header(self) -> bytes:
+        return b""
+
+    def rows(self, rows) -> bytes:
+        columns = self.columns
+        return b"".join(
+            orjson.dumps(dict(zip(columns, row)), option=orjson.OPT_UTC_Z) + b"\n" for row in rows
+        )
+
+
+ENCODERS = {"ndjson": _NDJSONEncoder, "csv": _CSVEncoder}
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def export_statement(
+    table: Table, columns: List[str], created_from: Optional[datetime], created_to: Optional[datetime]
+):
+    stmt = select(*(table.c[name] for name in columns))
+    if created_from is not None:
+        stmt = stmt.where(table.c.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(table.c.created_at < created_to)
+    return stmt.execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+
+async def stream_export(
+    name: str,
+    fmt: str,
+    gzip: bool = False,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> AsyncIterator[bytes]:
+    table, columns = EXPORTS[name]
+    encoder = ENCODERS[fmt](columns)
+    # wbits=31 writes a gzip container
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+
+    def out(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor else data
+
+    # The response outlives the request's dependencies, so the export owns its session
+    async with read_session() as db:
+        header = out(encoder.header())
+        if header:
+            yield header
+        result = await db.stream(export_statement(table, columns, created_from, created_to))
+        async for partition in result.partitions():
+            chunk = out(encoder.rows(partition))
+            if chunk:
+                yield chunk
+    if compressor:
+        yield compressor.flush()
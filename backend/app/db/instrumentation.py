@@ -0,0 +1,122 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    """Statements run while the counter is current; an enclosing counter sees them too,
+    so a test's assert_max_queries still counts a request the middleware is counting."""
+
+    def __init__(self, parent: Optional["QueryCounter"] = None):
+        self.count = 0
+        self.statements: List[str] = []
+        self.parent = parent
+
+    def record(self, statement: str):
+        self.count += 1
+        self.statements.append(statement)
+        if self.parent is not None:
+            self.parent.record(statement)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+_current: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _current.get()
+    if counter is not None:
+        counter.record(statement)
+
+
+def install_query_counter(engine: Engine):
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+@contextmanager
+def count_queries():
+    counter = QueryCounter(parent=_current.get())
+    token = _current.set(counter)
+    try:
+        yield counter
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    with count_queries() as counter:
+        yield counter
+    if counter.count > limit:
+        raise QueryBudgetExceeded(
+            f"{counter.count} queries executed, budget is {limit}:\n" + "\n".join(counter.statements)
+        )
+
+
+def query_budget(limit: int):
+    """Route dependency declaring the maximum number of SQL statements the endpoint may issue."""
+
+    def declare(request: Request):
+        request.state.query_budget = limit
+
+    return declare
+
+
+class QueryCountMiddleware:
+    """Counts statements per request and reports them in the X-Query-Count header.
+
+    With ``settings.enforce_query_budgets`` enabled, a request that exceeds the budget
+    declared through ``query_budget`` fails with a 500 so N+1 regressions break CI.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter = QueryCounter(parent=_current.get())
+        token = _current.set(counter)
+        state = scope.setdefault("state", {})
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                budget = state.get("query_budget")
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-count", str(counter.count).encode()))
+                if budget is not None:
+                    headers.append((b"x-query-budget", str(budget).encode()))
+                    if counter.count > budget:
+                        logger.error(
+                            "Query budget exceeded for %s %s: %d > %d",
+                            scope["method"],
+                            scope["path"],
+                            counter.count,
+                            budget,
+                        )
+                        if settings.enforce_query_budgets:
+                            raise QueryBudgetExceeded(
+                                f"{scope['method']} {scope['path']} ran {counter.count} queries, budget is {budget}"
+                            )
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
@@ -0,0 +1,273 @@
+"""Booking outbox workers: capture payment for pending bookings, then confirm them.
+
+POST /bookings only writes the booking and its outbox row in one transaction, so
+the request never waits on the payment provider. Workers claim due rows in batches
+(``FOR UPDATE SKIP LOCKED`` on Postgres, so workers in other processes take
+different rows), capture concurrently, and settle the whole batch in one
+transaction. No database connection is held while captures are in flight: the
+claim commits and its session closes first, and the settlement opens a new one.
+A claim leases its rows for ``lease_seconds``; rows of a worker that died are
+picked up again after the lease, and the capture's idempotency key (the booking
+id) keeps the retry from charging twice.
+
+    python -m app.db.outbox    # drain the outbox from a dedicated process
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import bindparam, func, select, update
+
+from app.core.config import settings
+from app.core.payments import PaymentDeclined, PaymentUnavailable, payments
+from app.db.quotes import quote_packages
+from app.db.session import SessionLocal
+from app.models.models import Booking, BookingOutbox, Package
+
+logger = logging.getLogger(__name__)
+
+_bookings = Booking.__table__
+_outbox = BookingOutbox.__table__
+
+
+class OutboxWorkers:
+    def __init__(
+        self,
+        session_factory,
+        provider,
+        workers: int,
+        batch_size: int,
+        poll_interval: float,
+        lease_seconds: float,
+        max_attempts: int,
+        retry_base: float,
+    ):
+        self.session_factory = session_factory
+        self.provider = provider
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        # A capture must finish well inside the lease or another worker may take the row
+        self.capture_timeout = lease_seconds / 2
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self.processed: Dict[str, int] = {"confirmed": 0, "payment_failed": 0, "retried": 0, "skipped": 0}
+
+    def notify(self):
+        """Wakes idle workers, e.g. right after a booking commits."""
+        self._wakeup.set()
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self):
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception:
+                logger.exception("Outbox batch failed")
+                claimed = 0
+            if claimed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    def _backoff(self, attempts: int) -> timedelta:
+        return timedelta(seconds=self.retry_base * 2 ** (attempts - 1) * random.uniform(0.8, 1.2))
+
+    async def _claim(self, db, now: datetime) -> Dict[UUID, int]:
+        due = (
+            select(BookingOutbox.id)
+            .where(BookingOutbox.status == "pending", BookingOutbox.available_at <= now)
+            .order_by(BookingOutbox.available_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(_outbox)
+            .where(_outbox.c.id.in_(due))
+            .values(
+                available_at=now + timedelta(seconds=self.lease_seconds),
+                attempts=_outbox.c.attempts + 1,
+            )
+            .returning(_outbox.c.booking_id, _outbox.c.attempts)
+        )
+        return dict((await db.execute(stmt)).all())
+
+    async def _amounts(self, db, claimed: Dict[UUID, int]) -> List[Tuple[UUID, float, str]]:
+        """(booking_id, amount, payment_token) of the claimed bookings still pending."""
+        rows = (
+            await db.execute(
+                select(Booking.id, Booking.package_id, Booking.payment_token, Package.quoted_total)
+                .join(Package, Package.id == Booking.package_id)
+                .where(Booking.id.in_(list(claimed)), Booking.status == "pending")
+            )
+        ).all()
+        unquoted = [package_id for _, package_id, _, total in rows if total is None]
+        totals = {}
+        if unquoted:
+            batch = await quote_packages(db, unquoted)
+            totals = dict(zip(batch.package_ids, batch.total.tolist()))
+        return [
+            (booking_id, totals.get(package_id) if total is None else total, token)
+            for booking_id, package_id, token, total in rows
+        ]
+
+    async def _capture(self, booking_id: UUID, amount: float, payment_token: str):
+        try:
+            return await asyncio.wait_for(
+                self.provider.capture(amount, payment_token, idempotency_key=str(booking_id)),
+                self.capture_timeout,
+            )
+        except asyncio.TimeoutError:
+            raise PaymentUnavailable("Payment provider timed out")
+
+    async def run_once(self) -> int:
+        """Claims, captures and settles one batch; returns the number of rows claimed."""
+        async with self.session_factory() as db:
+            claimed = await self._claim(db, datetime.now(timezone.utc))
+            if not claimed:
+                return 0
+            captures = await self._amounts(db, claimed)
+            await db.commit()
+
+        results = await asyncio.gather(
+            *(self._capture(booking_id, amount, token) for booking_id, amount, token in captures),
+            return_exceptions=True,
+        )
+
+        now = datetime.now(timezone.utc)
+        confirmed, failed, retry, done = [], [], [], []
+        for (booking_id, *_), result in zip(captures, results):
+            if isinstance(result, PaymentDeclined):
+                failed.append({"b_id": booking_id, "error": str(result)})
+            elif isinstance(result, Exception):
+                if not isinstance(result, PaymentUnavailable):
+                    logger.error("Capture for booking %s failed", booking_id, exc_info=result)
+                if claimed[booking_id] >= self.max_attempts:
+                    failed.append({"b_id": booking_id, "error": str(result)})
+                else:
+                    retry.append(
+                        {
+                            "b_id": booking_id,
+                            "error": str(result),
+                            "available_at": now + self._backoff(claimed[booking_id]),
+                        }
+                    )
+            else:
+                confirmed.append({"b_id": booking_id, "reference": result.id})
+                done.append({"b_id": booking_id})
+        # Claimed rows whose booking is no longer pending were settled by an earlier attempt
+        settled = {capture[0] for capture in captures}
+        skipped = [{"b_id": booking_id} for booking_id in claimed if booking_id not in settled]
+        done.extend(skipped)
+        await self._settle(now, confirmed, failed, retry, done)
+
+        self.processed["confirmed"] += len(confirmed)
+        self.processed["payment_failed"] += len(failed)
+        self.processed["retried"] += len(retry)
+        self.processed["skipped"] += len(skipped)
+        return len(claimed)
+
+    async def _settle(self, now: datetime, confirmed: list, failed: list, retry: list, done: list):
+        """Writes a batch's outcomes in one transaction of a fresh session."""
+        async with self.session_factory() as db:
+            # Only pending bookings move, so a duplicate settlement is a no-op
+            if confirmed:
+                await db.execute(
+                    update(_bookings)
+                    .where(_bookings.c.id == bindparam("b_id"), _bookings.c.status == "pending")
+                    .values(status="confirmed", payment_reference=bindparam("reference")),
+                    confirmed,
+                )
+            if failed:
+                await db.execute(
+                    update(_bookings)
+                    .where(_bookings.c.id == bindparam("b_id"), _bookings.c.status == "pending")
+                    .values(status="payment_failed"),
+                    failed,
+                )
+                await db.execute(
+                    update(_outbox)
+                    .where(_outbox.c.booking_id == bindparam("b_id"))
+                    .values(status="failed", last_error=bindparam("error"), processed_at=now),
+                    failed,
+                )
+            if done:
+                await db.execute(
+                    update(_outbox)
+                    .where(_outbox.c.booking_id == bindparam("b_id"))
+                    .values(status="done", last_error=None, processed_at=now),
+                    done,
+                )
+            if retry:
+                await db.execute(
+                    update(_outbox)
+                    .where(_outbox.c.booking_id == bindparam("b_id"))
+                    .values(last_error=bindparam("error"), available_at=bindparam("available_at")),
+                    retry,
+                )
+            await db.commit()
+
+    async def stats(self) -> dict:
+        async with self.session_factory() as db:
+            counts = await db.execute(
+                select(BookingOutbox.status, func.count()).group_by(BookingOutbox.status)
+            )
+            oldest: Optional[datetime] = (
+                await db.execute(
+                    select(func.min(BookingOutbox.created_at)).where(BookingOutbox.status == "pending")
+                )
+            ).scalar()
+        return {
+            "workers": len(self._tasks),
+            "outbox": dict(counts.all()),
+            "oldest_pending": oldest,
+            "processed": dict(self.processed),
+        }
+
+
+outbox_workers = OutboxWorkers(
+    SessionLocal,
+    payments,
+    workers=settings.outbox_workers,
+    batch_size=settings.outbox_batch_size,
+    poll_interval=settings.outbox_poll_interval_seconds,
+    lease_seconds=settings.outbox_lease_seconds,
+    max_attempts=settings.outbox_max_attempts,
+    retry_base=settings.outbox_retry_base_seconds,
+)
+
+
+async def _main():
+    from app.db.session import engine
+
+    outbox_workers.workers = max(1, outbox_workers.workers)
+    outbox_workers.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await outbox_workers.stop()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,122 @@
+import bisect
+import time
+from typing import List
+from uuid import uuid4
+
+from sqlalchemy import exc
+from sqlalchemy.engine import URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import Settings
+
+# Checkout wait buckets, milliseconds
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Weight of the newest sample in the moving average of checkout waits, and how fast
+# that average fades when no checkouts happen (so shedding cannot latch on)
+RECENT_WAIT_ALPHA = 0.2
+RECENT_WAIT_HALF_LIFE_SECONDS = 1.0
+
+
+class PoolMetrics:
+    def __init__(self, buckets=WAIT_BUCKETS_MS):
+        self.buckets = buckets
+        self.reset()
+
+    def reset(self):
+        # counts[i] holds waits <= buckets[i]; the last slot is +Inf
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.wait_sum_ms = 0.0
+        self.checkouts = 0
+        self.timeouts = 0
+        # Live signals for admission control (app.core.admission)
+        self.waiting = 0
+        self._recent_wait_ms = 0.0
+        self._recent_at = time.monotonic()
+
+    def observe_wait(self, wait_ms: float):
+        self.counts[bisect.bisect_left(self.buckets, wait_ms)] += 1
+        self.wait_sum_ms += wait_ms
+        self.checkouts += 1
+        recent = self.recent_wait_ms
+        self._recent_wait_ms = recent + RECENT_WAIT_ALPHA * (wait_ms - recent)
+        self._recent_at = time.monotonic()
+
+    @property
+    def recent_wait_ms(self) -> float:
+        idle = time.monotonic() - self._recent_at
+        return self._recent_wait_ms * 0.5 ** (idle / RECENT_WAIT_HALF_LIFE_SECONDS)
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def connect(self):
+        started = time.perf_counter()
+        pool_metrics.waiting += 1
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            pool_metrics.timeouts += 1
+            raise
+        finally:
+            pool_metrics.waiting -= 1
+            pool_metrics.observe_wait((time.perf_counter() - started) * 1000)
+
+
+def _pgbouncer_connect_args() -> dict:
+    # Transaction-mode poolers hand each transaction a different server connection,
+    # so named prepared statements must be neither cached nor reused.
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
+
+
+def engine_options(url: URL, settings: Settings, timed: bool = True) -> dict:
+    """Pool options for an engine; ``timed`` engines feed pool_metrics (the primary only)."""
+    options = {"pool_pre_ping": settings.db_pool_pre_ping}
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory SQLite lives and dies with its single connection
+        return options
+    options.update(
+        poolclass=TimedQueuePool if timed else AsyncAdaptedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+    )
+    if settings.db_pgbouncer_mode and url.get_driver_name() == "asyncpg":
+        options["connect_args"] = _pgbouncer_connect_args()
+    return options
+
+
+def pool_status(pool) -> dict:
+    status = {"class": type(pool).__name__}
+    if isinstance(pool, TimedQueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            # overflow() counts down from 0 while the pool fills, so clamp
+            overflow_in_use=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout_seconds=pool.timeout(),
+        )
+    buckets = {}
+    cumulative = 0
+    for bound, count in zip(list(pool_metrics.buckets) + ["+Inf"], pool_metrics.counts):
+        cumulative += count
+        buckets[str(bound)] = cumulative
+    status["checkout_wait_ms"] = {
+        "count": pool_metrics.checkouts,
+        "sum": round(pool_metrics.wait_sum_ms, 3),
+        "buckets": buckets,
+    }
+    status["checkout_timeouts"] = pool_metrics.timeouts
+    status["waiting"] = pool_metrics.waiting
+    status["recent_wait_ms"] = round(pool_metrics.recent_wait_ms, 3)
+    return status
@@ -0,0 +1,101 @@
+"""Loading quote inputs from the database and keeping packages.quoted_total current.
+
+    python -m app.db.quotes    # requote every package, e.g. after changing rates
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pricing import QuoteBatch, QuoteInputs, quote_batch
+from app.models.models import Event, Lodging, Package, package_events
+
+REQUOTE_BATCH_SIZE = 5000
+
+
+async def load_quote_inputs(db: AsyncSession, package_filter) -> QuoteInputs:
+    """Columnar inputs for the packages matching ``package_filter``, in two statements."""
+    inputs = QuoteInputs()
+    slots = {}
+    packages = await db.execute(
+        select(Package.id, Lodging.price, Package.addons)
+        .outerjoin(Lodging, Lodging.id == Package.lodging_id)
+        .where(package_filter)
+    )
+    for package_id, lodging_price, addons in packages:
+        slots[package_id] = inputs.add_package(package_id, lodging_price, addons)
+    if not slots:
+        return inputs
+
+    events = await db.execute(
+        select(package_events.c.package_id, Event.price, Event.date)
+        .join(Event, Event.id == package_events.c.event_id)
+        .where(package_events.c.package_id.in_(list(slots)))
+    )
+    for package_id, price, day in events:
+        inputs.add_event(slots[package_id], price, day)
+    return inputs
+
+
+async def store_quotes(db: AsyncSession, batch: QuoteBatch):
+    if not batch.package_ids:
+        return
+    quoted_at = datetime.now(timezone.utc)
+    # Bulk UPDATE by primary key: a single executemany
+    await db.execute(
+        update(Package),
+        [
+            {"id": package_id, "quoted_total": total, "quoted_at": quoted_at}
+            for package_id, total in zip(batch.package_ids, batch.total.tolist())
+        ],
+    )
+
+
+async def quote_packages(db: AsyncSession, package_ids: List[str]) -> QuoteBatch:
+    return quote_batch(await load_quote_inputs(db, Package.id.in_(package_ids)))
+
+
+async def _requote(db: AsyncSession, package_filter) -> int:
+    batch = quote_batch(await load_quote_inputs(db, package_filter))
+    await store_quotes(db, batch)
+    return len(batch.package_ids)
+
+
+async def requote_for_events(db: AsyncSession, event_ids: Iterable[str]) -> int:
+    """Refreshes quoted_total for packages containing any of ``event_ids``."""
+    containing = select(package_events.c.package_id).where(package_events.c.event_id.in_(list(event_ids)))
+    return await _requote(db, Package.id.in_(containing))
+
+
+async def requote_for_lodgings(db: AsyncSession, lodging_ids: Iterable[str]) -> int:
+    """Refreshes quoted_total for packages staying at any of ``lodging_ids``."""
+    return await _requote(db, Package.lodging_id.in_(list(lodging_ids)))
+
+
+async def requote_all(db: AsyncSession, batch_size: int = REQUOTE_BATCH_SIZE) -> int:
+    requoted = 0
+    after: Optional[str] = None
+    while True:
+        stmt = select(Package.id).order_by(Package.id).limit(batch_size)
+        if after is not None:
+            stmt = stmt.where(Package.id > after)
+        package_ids = list((await db.execute(stmt)).scalars())
+        if not package_ids:
+            return requoted
+        requoted += await _requote(db, Package.id.in_(package_ids))
+        await db.commit()
+        after = package_ids[-1]
+
+
+async def _main():
+    from app.db.session import SessionLocal, engine
+
+    async with SessionLocal() as db:
+        print(f"Requoted {await requote_all(db)} packages")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,154 @@
+"""Read replica selection for app.db.session.get_read_db.
+
+Reads rotate over the replicas that are up. A replica that refuses a connection
+is skipped for ``failure_cooldown`` seconds and then tried again; with none up,
+reads fall back to the primary. Replicas lag the primary, so a caller who has just
+written reads from the primary for ``sticky_seconds`` to see their own write, and
+everyone does for a while after a catalog change, so the catalog caches and search
+indexes are never rebuilt from pre-change rows under the new generation.
+
+Every worker must honour a caller's write, not just the one that served it, so the
+write time travels with the caller: ReadYourWritesMiddleware sets a ``last_write``
+cookie (wall-clock seconds) on responses to writes, and any worker reading it sends
+the caller to the primary until ``sticky_seconds`` have passed. Hosts' clocks must
+agree to well within ``sticky_seconds``. Callers that drop cookies are still
+recognised by identity, but only by the worker that served the write. The
+catalog-wide pin after a catalog change is also per worker; other workers rely on
+``sticky_seconds`` exceeding the replication lag before their caches move to the new
+generation.
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+WRITE_COOKIE = "last_write"
+# How far ahead of this host's clock a write time may be and still be honoured
+MAX_CLOCK_SKEW_SECONDS = 5.0
+
+
+class ReplicaSet:
+    def __init__(
+        self,
+        engines: List[AsyncEngine],
+        failure_cooldown: float,
+        sticky_seconds: float,
+        max_sticky: int = 100_000,
+    ):
+        self.engines = engines
+        self.failure_cooldown = failure_cooldown
+        self.sticky_seconds = sticky_seconds
+        self.max_sticky = max_sticky
+        self._next = 0
+        self._down_until: List[float] = [0.0] * len(engines)
+        self._writers: "OrderedDict[str, float]" = OrderedDict()
+        self._pinned_until = 0.0
+        self.reads: Dict[str, int] = {"replica": 0, "sticky": 0, "fallback": 0}
+        self.failovers = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def note_write(self, identity: str):
+        self._writers[identity] = time.monotonic() + self.sticky_seconds
+        self._writers.move_to_end(identity)
+        while len(self._writers) > self.max_sticky:
+            self._writers.popitem(last=False)
+
+    def pin_primary(self):
+        """Sends every read to the primary for the stickiness window."""
+        self._pinned_until = time.monotonic() + self.sticky_seconds
+
+    def wrote_recently(self, wrote_at: Optional[float]) -> bool:
+        """Whether a write at ``wrote_at`` (wall clock, from WRITE_COOKIE) is still in its window."""
+        if wrote_at is None:
+            return False
+        age = time.time() - wrote_at
+        return -MAX_CLOCK_SKEW_SECONDS <= age < self.sticky_seconds
+
+    def is_sticky(self, identity: Optional[str], wrote_at: Optional[float] = None) -> bool:
+        now = time.monotonic()
+        if now < self._pinned_until or self.wrote_recently(wrote_at):
+            return True
+        until = self._writers.get(identity) if identity is not None else None
+        if until is None:
+            return False
+        if now >= until:
+            del self._writers[identity]
+            return False
+        return True
+
+    async def connect(self) -> Optional[AsyncConnection]:
+        """A connection to the next replica that is up, or None to use the primary."""
+        count = len(self.engines)
+        for _ in range(count):
+            index = self._next
+            self._next = (index + 1) % count
+            if time.monotonic() < self._down_until[index]:
+                continue
+            try:
+                conn = await self.engines[index].connect()
+            except (DBAPIError, OSError, asyncio.TimeoutError) as exc:
+                self._down_until[index] = time.monotonic() + self.failure_cooldown
+                self.failovers += 1
+                logger.warning(
+                    "Replica %d unavailable, skipping for %.0fs: %s", index, self.failure_cooldown, exc
+                )
+                continue
+            self.reads["replica"] += 1
+            return conn
+        self.reads["fallback"] += 1
+        return None
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "replicas": [
+                {"url": engine.url.render_as_string(hide_password=True), "up": now >= down_until}
+                for engine, down_until in zip(self.engines, self._down_until)
+            ],
+            "reads": dict(self.reads),
+            "failovers": self.failovers,
+            "sticky_callers": len(self._writers),
+            "pinned": now < self._pinned_until,
+        }
+
+
+def parse_write_cookie(value: Optional[str]) -> Optional[float]:
+    try:
+        wrote_at = float(value) if value else None
+    except ValueError:
+        return None
+    return wrote_at if wrote_at is not None and math.isfinite(wrote_at) else None
+
+
+class ReadYourWritesMiddleware:
+    """Sets WRITE_COOKIE on responses to requests that wrote to the primary.
+
+    app.db.session.get_db flags a writing request in its state; the cookie carries the
+    time the response started.
+    """
+
+    def __init__(self, app, sticky_seconds: float):
+        self.app = app
+        self.attributes = f"Max-Age={max(1, math.ceil(sticky_seconds))}; Path=/; HttpOnly; SameSite=Lax"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and scope.get("state", {}).get("wrote_primary"):
+                cookie = f"{WRITE_COOKIE}={time.time():.3f}; {self.attributes}".encode("latin-1")
+                message["headers"] = [*message.get("headers", ()), (b"set-cookie", cookie)]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,329 @@
+"""Event search: tag AND/OR, title/venue prefix and facet counts.
+
+Queries go to the database through event_tags and the lower(title)/lower(venue)
+prefix indexes. A search with no tag or prefix filter takes its facets from the
+availability rollups, one row per city and day, rather than counting every event in
+the range. Cities that are searched often get an in-memory inverted index instead,
+rebuilt lazily once an event in that city is written, so a search there costs no
+SQL at all.
+"""
+import asyncio
+import bisect
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import delete, func, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.catalog import EVENTS, catalog_cache, city_namespace
+from app.db.upsert import dialect_insert
+from app.models.models import Event, availability_day_tags, availability_days, event_tags
+from app.schemas.models import EventOut
+
+MAX_TAG_FACETS = 100
+# Cities whose search counts are tracked for promotion; past this, every count is
+# halved and cities that drop to zero are forgotten
+MAX_TRACKED_CITIES = 1000
+
+
+def normalize_tags(tags: Optional[Iterable[str]]) -> List[str]:
+    return sorted({tag.strip().lower() for tag in tags or () if tag and tag.strip()})
+
+
+async def replace_event_tags(db: AsyncSession, rows: Sequence[dict]):
+    """Rewrites event_tags for the given events in two statements."""
+    event_ids = [row["id"] for row in rows]
+    await db.execute(delete(event_tags).where(event_tags.c.event_id.in_(event_ids)))
+    pairs = [{"tag": tag, "event_id": row["id"]} for row in rows for tag in normalize_tags(row.get("tags"))]
+    if pairs:
+        await db.execute(dialect_insert(db, event_tags).on_conflict_do_nothing(), pairs)
+
+
+@dataclass
+class SearchQuery:
+    tags: List[str] = field(default_factory=list)
+    match_all: bool = True
+    prefix: Optional[str] = None
+    city: Optional[str] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    limit: int = 50
+    after: Optional[Tuple[date, str]] = None
+
+
+@dataclass
+class SearchResult:
+    items: List[EventOut]
+    has_more: bool
+    total: int
+    facets: Dict[str, Dict[str, int]]
+
+
+def _by_count(counts: Counter, limit: Optional[int] = None) -> Dict[str, int]:
+    # Ties broken by key so the SQL and in-memory paths produce identical bodies
+    return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit])
+
+
+def _facets(cities: Counter, tags: Counter, months: Counter) -> Dict[str, Dict[str, int]]:
+    return {
+        "city": _by_count(cities),
+        "tag": _by_count(tags, MAX_TAG_FACETS),
+        "month": dict(sorted(months.items())),
+    }
+
+
+# -- SQL path ---------------------------------------------------------------
+
+
+def _month(db: AsyncSession, column):
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(column, "YYYY-MM")
+    return func.strftime("%Y-%m", column)
+
+
+def _filters(query: SearchQuery) -> list:
+    filters = []
+    if query.city is not None:
+        filters.append(Event.city == query.city)
+    if query.date_from is not None:
+        filters.append(Event.date >= query.date_from)
+    if query.date_to is not None:
+        filters.append(Event.date <= query.date_to)
+    if query.prefix:
+        pattern = query.prefix.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        filters.append(
+            or_(
+                func.lower(Event.title).like(pattern, escape="\\"),
+                func.lower(Event.venue).like(pattern, escape="\\"),
+            )
+        )
+    if query.tags:
+        tagged = select(event_tags.c.event_id).where(event_tags.c.tag.in_(query.tags))
+        if query.match_all and len(query.tags) > 1:
+            tagged = tagged.group_by(event_tags.c.event_id).having(
+                func.count(event_tags.c.tag) == len(query.tags)
+            )
+        filters.append(Event.id.in_(tagged))
+    return filters
+
+
+async def _event_facets(db: AsyncSession, filters: list) -> Tuple[Counter, Counter, Counter]:
+    # City and month facets come from one GROUP BY; every event has exactly one city,
+    # so the total is their sum.
+    month = _month(db, Event.date)
+    grouped = await db.execute(
+        select(Event.city, month, func.count()).where(*filters).group_by(Event.city, month)
+    )
+    cities, months = Counter(), Counter()
+    for city, month_key, count in grouped:
+        cities[city] += count
+        months[month_key] += count
+
+    tag_rows = await db.execute(
+        select(event_tags.c.tag, func.count())
+        .join(Event, Event.id == event_tags.c.event_id)
+        .where(*filters)
+        .group_by(event_tags.c.tag)
+        .order_by(func.count().desc(), event_tags.c.tag)
+        .limit(MAX_TAG_FACETS)
+    )
+    return cities, Counter(dict(tag_rows.all())), months
+
+
+def _rollup_filters(columns, query: SearchQuery) -> list:
+    filters = []
+    if query.city is not None:
+        filters.append(columns.city == query.city)
+    if query.date_from is not None:
+        filters.append(columns.date >= query.date_from)
+    if query.date_to is not None:
+        filters.append(columns.date <= query.date_to)
+    return filters
+
+
+async def _rollup_facets(db: AsyncSession, query: SearchQuery) -> Tuple[Counter, Counter, Counter]:
+    """Facets of a city/date-only search, summed from the availability rollups."""
+    days = availability_days.c
+    month = _month(db, days.date)
+    grouped = await db.execute(
+        select(days.city, month, func.sum(days.event_count))
+        .where(*_rollup_filters(days, query))
+        .group_by(days.city, month)
+    )
+    cities, months = Counter(), Counter()
+    for city, month_key, count in grouped:
+        cities[city] += count
+        months[month_key] += count
+
+    day_tags = availability_day_tags.c
+    count = func.sum(day_tags.event_count)
+    tag_rows = await db.execute(
+        select(day_tags.tag, count)
+        .where(*_rollup_filters(day_tags, query))
+        .group_by(day_tags.tag)
+        .order_by(count.desc(), day_tags.tag)
+        .limit(MAX_TAG_FACETS)
+    )
+    return cities, Counter(dict(tag_rows.all())), months
+
+
+async def _search_sql(db: AsyncSession, query: SearchQuery) -> SearchResult:
+    filters = _filters(query)
+
+    page = select(Event).where(*filters)
+    if query.after is not None:
+        page = page.where(tuple_(Event.date, Event.id) > query.after)
+    page = page.order_by(Event.date, Event.id).limit(query.limit + 1)
+    events = (await db.execute(page)).scalars().all()
+
+    if query.tags or query.prefix:
+        cities, tags, months = await _event_facets(db, filters)
+    else:
+        cities, tags, months = await _rollup_facets(db, query)
+
+    return SearchResult(
+        items=[EventOut.model_validate(event) for event in events[: query.limit]],
+        has_more=len(events) > query.limit,
+        total=sum(cities.values()),
+        facets=_facets(cities, tags, months),
+    )
+
+
+# -- In-memory path ---------------------------------------------------------
+
+
+class CityIndex:
+    """Inverted index over one city's events.
+
+    Events are held in (date, id) order so posting lists are sets of positions and
+    a page is the smallest positions past the cursor. Prefix search bisects sorted
+    (lower(title), position) and (lower(venue), position) lists.
+    """
+
+    def __init__(self, events: List[EventOut]):
+        self.events = sorted(events, key=lambda event: (event.date, event.id))
+        self.postings: Dict[str, Set[int]] = {}
+        self.event_tags: List[List[str]] = []
+        titles, venues = [], []
+        for position, event in enumerate(self.events):
+            tags = normalize_tags(event.tags)
+            self.event_tags.append(tags)
+            for tag in tags:
+                self.postings.setdefault(tag, set()).add(position)
+            titles.append((event.title.lower(), position))
+            venues.append((event.venue.lower(), position))
+        self.titles = sorted(titles)
+        self.venues = sorted(venues)
+        self.dates = [event.date for event in self.events]
+        self.months = [event.date.strftime("%Y-%m") for event in self.events]
+
+    @staticmethod
+    def _prefix_range(entries: List[Tuple[str, int]], prefix: str) -> Set[int]:
+        start = bisect.bisect_left(entries, (prefix,))
+        end = bisect.bisect_left(entries, (prefix + "\U0010ffff",))
+        return {position for _, position in entries[start:end]}
+
+    def search(self, query: SearchQuery) -> SearchResult:
+        start = 0 if query.date_from is None else bisect.bisect_left(self.dates, query.date_from)
+        end = len(self.events) if query.date_to is None else bisect.bisect_right(self.dates, query.date_to)
+        candidates: Optional[Set[int]] = None
+
+        if query.tags:
+            lists = [self.postings.get(tag, set()) for tag in query.tags]
+            if query.match_all:
+                candidates = set.intersection(*sorted(lists, key=len))
+            else:
+                candidates = set().union(*lists)
+        if query.prefix:
+            prefix = query.prefix.lower()
+            matched = self._prefix_range(self.titles, prefix) | self._prefix_range(self.venues, prefix)
+            candidates = matched if candidates is None else candidates & matched
+
+        if candidates is None:
+            positions = range(start, end)
+        else:
+            positions = sorted(position for position in candidates if start <= position < end)
+
+        tags = Counter()
+        months = Counter(self.months[position] for position in positions)
+        page: List[EventOut] = []
+        has_more = False
+        for position in positions:
+            tags.update(self.event_tags[position])
+            if has_more:
+                continue
+            event = self.events[position]
+            if query.after is None or (event.date, event.id) > query.after:
+                if len(page) < query.limit:
+                    page.append(event)
+                else:
+                    has_more = True
+
+        total = sum(months.values())
+        cities = Counter({self.events[0].city: total}) if total else Counter()
+        return SearchResult(items=page, has_more=has_more, total=total, facets=_facets(cities, tags, months))
+
+
+class HotCityIndexes:
+    """Builds a CityIndex for configured cities and for cities searched often enough."""
+
+    def __init__(self, pinned: Iterable[str], threshold: int, max_cities: int):
+        self.pinned = set(pinned)
+        self.threshold = threshold
+        self.max_cities = max_cities
+        self._indexes: Dict[str, Tuple[int, CityIndex]] = {}
+        self._searches: Counter = Counter()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def is_hot(self, city: str) -> bool:
+        if city in self.pinned or city in self._indexes:
+            return True
+        self._searches[city] += 1
+        hot = self._searches[city] >= self.threshold and len(self._indexes) < self.max_cities
+        if len(self._searches) > MAX_TRACKED_CITIES:
+            self._searches = Counter({name: count // 2 for name, count in self._searches.items() if count > 1})
+        return hot
+
+    async def get(self, db: AsyncSession, city: str) -> CityIndex:
+        # Only writes to this city's events retire its index
+        generation = catalog_cache.generation(city_namespace(EVENTS, city))
+        entry = self._indexes.get(city)
+        if entry is not None and entry[0] == generation:
+            return entry[1]
+        lock = self._locks.setdefault(city, asyncio.Lock())
+        async with lock:
+            entry = self._indexes.get(city)
+            if entry is None or entry[0] != generation:
+                rows = await db.execute(select(Event).where(Event.city == city))
+                events = [EventOut.model_validate(event) for event in rows.scalars()]
+                entry = (generation, CityIndex(events))
+                if events or city in self.pinned:
+                    self._indexes[city] = entry
+                else:
+                    # No such city: do not let it hold one of the max_cities slots
+                    self._searches.pop(city, None)
+                    self._locks.pop(city, None)
+        return entry[1]
+
+    def stats(self) -> dict:
+        return {
+            city: {"generation": generation, "events": len(index.events)}
+            for city, (generation, index) in self._indexes.items()
+        }
+
+
+hot_cities = HotCityIndexes(
+    pinned=[city.strip() for city in settings.search_hot_cities.split(",") if city.strip()],
+    threshold=settings.search_hot_city_threshold,
+    max_cities=settings.search_max_hot_cities,
+)
+
+
+async def search_events(db: AsyncSession, query: SearchQuery) -> SearchResult:
+    if query.city is not None and hot_cities.is_hot(query.city):
+        index = await hot_cities.get(db, query.city)
+        return index.search(query)
+    return await _search_sql(db, query)
@@ -1,20 +1,110 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from fastapi import Request
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.core.config import settings
+from app.core.identity import caller_identity
+from app.db.instrumentation import install_query_counter
+from app.db.pool import engine_options
+from app.db.replicas import WRITE_COOKIE, ReplicaSet, parse_write_cookie
+
+# DATABASE_URL may name either driver flavour; the API always runs on the async one,
+# Alembic and scripts on the sync one.
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+SYNC_DRIVERS = {"postgresql": "psycopg2", "sqlite": "pysqlite"}
+
+
+def _with_driver(url: str, drivers: dict) -> URL:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in drivers:
+        return parsed
+    return parsed.set(drivername=f"{backend}+{drivers[backend]}")
+
+
+def async_database_url(url: str) -> URL:
+    return _with_driver(url, ASYNC_DRIVERS)
+
+
+def sync_database_url(url: str) -> URL:
+    return _with_driver(url, SYNC_DRIVERS)
+
 
 # Engine/session factory; expects DATABASE_URL env var for runtime
-engine = create_engine(settings.database_url, future=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
+_url = async_database_url(settings.database_url)
+engine = create_async_engine(_url, **engine_options(_url, settings))
+install_query_counter(engine.sync_engine)
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 
+def _replica_engine(url: str):
+    replica_url = async_database_url(url)
+    replica = create_async_engine(replica_url, **engine_options(replica_url, settings, timed=False))
+    install_query_counter(replica.sync_engine)
+    return replica
 
-def get_db():
-    db = SessionLocal()
+
+replicas = ReplicaSet(
+    [_replica_engine(url.strip()) for url in settings.database_replica_urls.split(",") if url.strip()],
+    failure_cooldown=settings.db_replica_failure_cooldown_seconds,
+    sticky_seconds=settings.db_read_your_writes_seconds,
+)
+# Replica sessions are bound per request to a connection from ReplicaSet.connect
+ReadSessionLocal = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+async def get_db(request: Request):
+    """Session on the primary, committed when the route returns."""
+    if replicas and request.method not in SAFE_METHODS:
+        # Before the route runs, so the flag is set before the response starts
+        request.state.wrote_primary = True
+    async with SessionLocal() as db:
+        try:
+            yield db
+            if replicas and request.method not in SAFE_METHODS:
+                replicas.note_write(caller_identity(request.scope))
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
+@asynccontextmanager
+async def read_session(
+    identity: Optional[str] = None, wrote_at: Optional[float] = None
+) -> AsyncIterator[AsyncSession]:
+    """Session for read-only work: a replica unless ``identity`` wrote recently, or the
+    caller's last write, at ``wrote_at``, is still within the stickiness window."""
+    if not replicas:
+        async with SessionLocal() as db:
+            yield db
+        return
+    if replicas.is_sticky(identity, wrote_at):
+        replicas.reads["sticky"] += 1
+        conn = None
+    else:
+        conn = await replicas.connect()
+    if conn is None:
+        async with SessionLocal() as db:
+            yield db
+        return
     try:
-        yield db
-        db.commit()
-    except Exception:
-        db.rollback()
-        raise
+        async with ReadSessionLocal(bind=conn) as db:
+            yield db
     finally:
-        db.close()
+        await conn.close()
+
+
+async def get_read_db(request: Request):
+    """Session for read-only routes; never commits."""
+    identity = wrote_at = None
+    if replicas:
+        identity = caller_identity(request.scope)
+        wrote_at = parse_write_cookie(request.cookies.get(WRITE_COOKIE))
+    async with read_session(identity, wrote_at) as db:
+        yield db
@@ -0,0 +1,225 @@
+"""Budget-constrained weekend bundles.
+
+Per city we keep the events sorted by date and the lodgings sorted by price, built
+from the catalog again only after a write to that city's events or lodgings. A suggestion request bisects the date
+window, keeps the best-scoring affordable events, and runs a depth-first search over
+event subsets pruned by both budget and the score still reachable, so the work is
+bounded by the candidate count, not by the size of the city.
+"""
+import asyncio
+import bisect
+import heapq
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.pricing import QuoteInputs, quote_batch
+from app.db.catalog import EVENTS, LODGINGS, catalog_cache, city_namespace
+from app.db.search import normalize_tags
+from app.models.models import Event, Lodging
+from app.schemas.models import EventOut, LodgingOut
+
+MAX_CANDIDATES = 40
+MAX_NODES = 50_000
+# City catalogs kept in memory, least recently used evicted first
+MAX_CITY_CATALOGS = 64
+
+
+class CityCatalog:
+    def __init__(self, events: List[EventOut], lodgings: List[LodgingOut]):
+        self.events = sorted(events, key=lambda event: (event.date, event.id))
+        self.dates = [event.date for event in self.events]
+        self.prices = [event.price for event in self.events]
+        self.tags: List[Set[str]] = [set(normalize_tags(event.tags)) for event in self.events]
+        self.lodgings = sorted(lodgings, key=lambda lodging: (lodging.price, lodging.id))
+        self.lodging_prices = [lodging.price for lodging in self.lodgings]
+
+    def window(self, date_from: date, date_to: date) -> range:
+        return range(bisect.bisect_left(self.dates, date_from), bisect.bisect_right(self.dates, date_to))
+
+    def best_lodging(
+        self, tickets: float, nights: int, budget: float, multiplier: float
+    ) -> Optional[LodgingOut]:
+        """The most expensive lodging for which the stay still fits the budget."""
+
+        def fits(i: int) -> bool:
+            return (tickets + self.lodging_prices[i] * nights) * multiplier <= budget
+
+        end = bisect.bisect_right(self.lodging_prices, (budget / multiplier - tickets) / nights)
+        # The nightly bound is rounded differently from the check; settle the boundary
+        # on the check itself, which is monotone in price
+        while end < len(self.lodgings) and fits(end):
+            end += 1
+        while end > 0 and not fits(end - 1):
+            end -= 1
+        return self.lodgings[end - 1] if end else None
+
+
+class CityCatalogs:
+    def __init__(self, maxsize: int = MAX_CITY_CATALOGS):
+        self.maxsize = maxsize
+        self._catalogs: "OrderedDict[str, Tuple[Tuple[int, int], CityCatalog]]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def _generation(city: str) -> Tuple[int, int]:
+        # Only writes to this city's events or lodgings retire its catalog
+        return (
+            catalog_cache.generation(city_namespace(EVENTS, city)),
+            catalog_cache.generation(city_namespace(LODGINGS, city)),
+        )
+
+    async def get(self, db: AsyncSession, city: str) -> CityCatalog:
+        generation = self._generation(city)
+        entry = self._catalogs.get(city)
+        if entry is not None and entry[0] == generation:
+            self._catalogs.move_to_end(city)
+            return entry[1]
+        async with self._locks.setdefault(city, asyncio.Lock()):
+            entry = self._catalogs.get(city)
+            if entry is None or entry[0] != generation:
+                events = (await db.execute(select(Event).where(Event.city == city))).scalars()
+                events = [EventOut.model_validate(event) for event in events]
+                lodgings = (await db.execute(select(Lodging).where(Lodging.location == city))).scalars()
+                lodgings = [LodgingOut.model_validate(lodging) for lodging in lodgings]
+                entry = (generation, CityCatalog(events, lodgings))
+                # Cities come from the caller; only ones in the catalog take a slot
+                if events or lodgings:
+                    self._store(city, entry)
+                else:
+                    self._catalogs.pop(city, None)
+        if city not in self._catalogs:
+            self._locks.pop(city, None)
+        return entry[1]
+
+    def _store(self, city: str, entry: Tuple[Tuple[int, int], CityCatalog]):
+        self._catalogs[city] = entry
+        self._catalogs.move_to_end(city)
+        while len(self._catalogs) > self.maxsize:
+            evicted, _ = self._catalogs.popitem(last=False)
+            self._locks.pop(evicted, None)
+
+
+city_catalogs = CityCatalogs()
+
+
+@dataclass
+class Suggestion:
+    score: int
+    events: List[EventOut]
+    lodging: Optional[LodgingOut]
+    quote: dict
+
+
+def _multiplier() -> float:
+    return (1 + settings.quote_markup_rate) * (1 + settings.quote_tax_rate)
+
+
+def _search(
+    catalog: CityCatalog,
+    candidates: List[Tuple[int, float, int]],
+    budget: float,
+    k: int,
+    max_events: int,
+) -> List[Tuple[int, float, Tuple[int, ...]]]:
+    """Top-k event subsets by (score desc, cost asc) whose cheapest stay fits the budget.
+
+    ``candidates`` are (score, price, position) sorted by score desc, price asc.
+    """
+    multiplier = _multiplier()
+    cheapest_night = catalog.lodgings[0].price if catalog.lodgings else 0.0
+    # heap of (score, -cost, subset); heap[0] is the current k-th best
+    best: List[Tuple[int, float, Tuple[int, ...]]] = []
+    nodes = 0
+
+    def cost(tickets: float, first: int, last: int) -> float:
+        return (tickets + cheapest_night * (last - first + 1)) * multiplier
+
+    def visit(start: int, chosen: Tuple[int, ...], score: int, tickets: float, first: int, last: int):
+        nonlocal nodes
+        nodes += 1
+        if chosen:
+            entry = (score, -cost(tickets, first, last), chosen)
+            if len(best) < k:
+                heapq.heappush(best, entry)
+            elif entry[:2] > best[0][:2]:
+                heapq.heapreplace(best, entry)
+        if len(chosen) == max_events or nodes >= MAX_NODES:
+            return
+        for i in range(start, len(candidates)):
+            # Candidates are score-sorted, so the next slots can add at most this much
+            reachable = score + sum(c[0] for c in candidates[i : i + max_events - len(chosen)])
+            if len(best) == k and reachable < best[0][0]:
+                return
+            event_score, price, position = candidates[i]
+            day = catalog.dates[position].toordinal()
+            new_first = min(first, day) if chosen else day
+            new_last = max(last, day) if chosen else day
+            lower_bound = cost(tickets + price, new_first, new_last)
+            if lower_bound > budget:
+                continue
+            # Costs only grow as events are added, so a tie on score that is already
+            # dearer than the k-th best cannot displace it
+            if len(best) == k and reachable == best[0][0] and lower_bound >= -best[0][1]:
+                continue
+            visit(i + 1, chosen + (i,), score + event_score, tickets + price, new_first, new_last)
+
+    visit(0, (), 0, 0.0, 0, 0)
+    return sorted(best, reverse=True)
+
+
+def suggest(
+    catalog: CityCatalog,
+    date_from: date,
+    date_to: date,
+    budget: float,
+    tags: List[str],
+    k: int,
+    max_events: int,
+) -> List[Suggestion]:
+    wanted = set(tags)
+    multiplier = _multiplier()
+    max_price = budget / multiplier
+    prices, event_tags = catalog.prices, catalog.tags
+    # With tags, score is the number of requested tags an event carries; without,
+    # every event scores 1 and the search fills the weekend.
+    ranked = [
+        (-len(event_tags[position] & wanted) if wanted else -1, prices[position], position)
+        for position in catalog.window(date_from, date_to)
+        if prices[position] <= max_price
+    ]
+    candidates = [
+        (-negative_score, price, position)
+        for negative_score, price, position in heapq.nsmallest(MAX_CANDIDATES, ranked)
+        if negative_score < 0
+    ]
+
+    found = _search(catalog, candidates, budget, k, max_events)
+    if not found:
+        return []
+
+    # Pair each subset with the most comfortable lodging that still fits, then quote
+    # exactly with the pricing engine.
+    suggestions = []
+    for score, _, chosen in found:
+        events = sorted((catalog.events[candidates[i][2]] for i in chosen), key=lambda e: (e.date, e.id))
+        nights = (events[-1].date - events[0].date).days + 1
+        tickets = sum(event.price for event in events)
+        lodging = catalog.best_lodging(tickets, nights, budget, multiplier)
+        if catalog.lodgings and lodging is None:
+            lodging = catalog.lodgings[0]
+        inputs = QuoteInputs()
+        slot = inputs.add_package("suggestion", lodging.price if lodging else None, None)
+        for event in events:
+            inputs.add_event(slot, event.price, event.date)
+        quote = quote_batch(inputs).rows()[0]
+        if quote["total"] > budget:
+            continue
+        del quote["package_id"]
+        suggestions.append(Suggestion(score=score, events=events, lodging=lodging, quote=quote))
+    return suggestions
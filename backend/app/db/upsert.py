@@ -0,0 +1,33 @@
+from typing import Iterable, List, Sequence
+
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def dialect_insert(db: AsyncSession, table: Table):
+    """INSERT construct for the session's dialect, which is what carries ON CONFLICT."""
+    dialect = db.get_bind().dialect.name
+    try:
+        return _INSERTS[dialect](table)
+    except KeyError:
+        raise NotImplementedError(f"ON CONFLICT is not supported for dialect {dialect!r}")
+
+
+def upsert(
+    db: AsyncSession,
+    table: Table,
+    rows: List[dict],
+    key: Sequence[str] = ("id",),
+    update_columns: Iterable[str] | None = None,
+):
+    """Multi-row INSERT ... ON CONFLICT (key) DO UPDATE for ``rows``."""
+    stmt = dialect_insert(db, table).values(rows)
+    if update_columns is None:
+        update_columns = [name for name in rows[0] if name not in key]
+    return stmt.on_conflict_do_update(
+        index_elements=list(key),
+        set_={name: stmt.excluded[name] for name in update_columns},
+    )
@@ -0,0 +1,18 @@
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.upsert import dialect_insert
+from app.models.models import User
+
+
+async def ensure_users(db: AsyncSession, user_ids: Iterable[str]):
+    """Create lightweight placeholder users to satisfy FK constraints, in one statement.
+
+    Existing users (and placeholder email collisions) are left untouched.
+    """
+    rows = [
+        {"id": user_id, "name": f"User {user_id}", "email": f"{user_id}@example.com", "is_active": True}
+        for user_id in dict.fromkeys(user_ids)
+    ]
+    await db.execute(dialect_insert(db, User.__table__).values(rows).on_conflict_do_nothing())
@@ -1,15 +1,55 @@
+from app.core.startup import FirstRequestTimer, check_database, timings  # first: starts the import clock
+
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
-from app.db.session import engine
+from app.core.metrics import MetricsMiddleware, install_sql_metrics, mark_worker_stopped, metrics_response
+from app.core.pubsub import broker
+from app.core.serialization import ORJSONResponse
+from app.db.instrumentation import QueryCountMiddleware
+from app.db.outbox import outbox_workers
+from app.db.session import engine, replicas
 from app.models.base import Base
-from app.routers import admin, bookings, edge, messages, packages
+from app.routers import admin, bookings, edge, events, lodgings, messages, packages
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    timings.mark("lifespan_started")
+    # Schema is Alembic's job; create_all is an opt-in shortcut for local SQLite
+    if settings.db_create_all:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    if settings.db_startup_check:
+        await check_database(engine, settings.db_startup_timeout_seconds)
+    if settings.supabase_jwks_url:
+        from app.auth.supabase_jwt import start_jwks_refresher
+
+        start_jwks_refresher()
+    await broker.start()
+    outbox_workers.start()
+    timings.mark("ready")
+    yield
+    await outbox_workers.stop()
+    await broker.stop()
+    if settings.supabase_jwks_url:
+        from app.auth.supabase_jwt import stop_jwks_refresher
 
-# Ensure metadata is available (migrations are preferred for production)
-Base.metadata.create_all(bind=engine)
+        stop_jwks_refresher()
+    await engine.dispose()
+    for replica in replicas.engines:
+        await replica.dispose()
+    mark_worker_stopped()
 
-app = FastAPI(title="PartyWKND API")
+
+install_sql_metrics(engine.sync_engine)
+for replica in replicas.engines:
+    install_sql_metrics(replica.sync_engine)
+
+app = FastAPI(title="PartyWKND API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,7 +58,60 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(QueryCountMiddleware)
+app.add_middleware(FirstRequestTimer)
+
+if replicas:
+    from app.db.replicas import ReadYourWritesMiddleware
+
+    app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=settings.db_read_your_writes_seconds)
+
+if settings.profiling_enabled:
+    from app.core.profiling import ProfilingMiddleware, install_sql_profiling
 
+    install_sql_profiling(engine.sync_engine)
+    for replica in replicas.engines:
+        install_sql_profiling(replica.sync_engine)
+    app.add_middleware(
+        ProfilingMiddleware,
+        header=settings.profiling_header,
+        sample_rate=settings.profiling_sample_rate,
+        interval_ms=settings.profiling_interval_ms,
+        buffer_size=settings.profiling_buffer_size,
+        max_sql=settings.profiling_max_sql,
+        allow_no_auth=settings.allow_no_auth,
+    )
+
+# Router groups by mount prefix, shared by metrics labels and admission control
+ROUTE_GROUPS = {
+    "events": f"{settings.api_prefix}/events",
+    "lodgings": f"{settings.api_prefix}/lodgings",
+    "packages": f"{settings.api_prefix}/packages",
+    "messages": f"{settings.api_prefix}/messages",
+    "bookings": f"{settings.api_prefix}/bookings",
+    "admin": f"{settings.api_prefix}/admin",
+    "edge": settings.api_prefix,
+}
+
+if settings.admission_enabled:
+    from app.core.admission import AdmissionMiddleware, build_bucket_store, parse_group_limits
+
+    app.add_middleware(
+        AdmissionMiddleware,
+        groups=ROUTE_GROUPS,
+        api_prefix=settings.api_prefix,
+        store=build_bucket_store(settings.admission_store, settings.admission_shared_path),
+        rate=settings.admission_rate_per_second,
+        burst=settings.admission_burst,
+        group_limits=parse_group_limits(settings.admission_group_limits),
+        max_pool_waiters=settings.admission_max_pool_waiters,
+        max_pool_wait_ms=settings.admission_max_pool_wait_ms,
+    )
+# Outermost, so shed and rate-limited responses are counted too
+app.add_middleware(MetricsMiddleware, groups=ROUTE_GROUPS)
+
+app.include_router(events.router, prefix=f"{settings.api_prefix}/events", tags=["Events"])
+app.include_router(lodgings.router, prefix=f"{settings.api_prefix}/lodgings", tags=["Lodgings"])
 app.include_router(packages.router, prefix=f"{settings.api_prefix}/packages", tags=["Packages"])
 app.include_router(messages.router, prefix=f"{settings.api_prefix}/messages", tags=["Messages"])
 app.include_router(bookings.router, prefix=f"{settings.api_prefix}/bookings", tags=["Bookings"])
@@ -27,5 +120,18 @@ app.include_router(edge.router, prefix=f"{settings.api_prefix}", tags=["Edge Cas
 
 
 @app.get("/health")
-def healthcheck():
+async def healthcheck():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
+
+
+@app.get("/health/startup")
+async def startup_timings():
+    return timings.as_dict()
+
+
+timings.mark("imported")
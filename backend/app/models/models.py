@@ -1,19 +1,38 @@
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     Date,
     DateTime,
     Float,
     ForeignKey,
+    Index,
+    Integer,
     JSON,
     String,
     Table,
+    Uuid,
 )
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.models.base import Base
 
+# SQLite stores server_default=func.now() as "YYYY-MM-DD HH:MM:SS"; bind datetimes in
+# the same text form so keyset comparisons against created_at order correctly there.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite",
+)
+
+# Server-generated keys (bookings, messages, outbox) are UUIDv7 from app.core.ids in a
+# native uuid column. Catalog, package and user ids are chosen by admins, clients and
+# the auth provider, so they stay strings.
+Key = Uuid(as_uuid=True)
+
 # Association table linking weekend packages to events
 package_events = Table(
     "package_events",
@@ -56,8 +75,41 @@ class Event(Base):
     date = Column(Date, nullable=False)
     price = Column(Float, nullable=False)
     tags = Column(JSON, nullable=True)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    # app.core.geo cell code of (latitude, longitude); null when either is unknown
+    geohash = Column(BigInteger, nullable=True)
     packages = relationship("Package", secondary=package_events, back_populates="events")
 
+    __table_args__ = (
+        # Keyset pagination for discovery (see app.routers.events)
+        Index("ix_events_city_date_id", "city", "date", "id"),
+        Index("ix_events_date_id", "date", "id"),
+        # Case-insensitive prefix search; text_pattern_ops lets LIKE 'abc%' use the btree
+        Index(
+            "ix_events_title_prefix",
+            func.lower(title).label("title_lower"),
+            postgresql_ops={"title_lower": "text_pattern_ops"},
+        ),
+        Index(
+            "ix_events_venue_prefix",
+            func.lower(venue).label("venue_lower"),
+            postgresql_ops={"venue_lower": "text_pattern_ops"},
+        ),
+        Index("ix_events_geohash", "geohash"),
+    )
+
+
+# Normalized copy of Event.tags (lower-cased) for indexed tag lookups. Maintained by
+# the admin write paths through app.db.search.replace_event_tags.
+event_tags = Table(
+    "event_tags",
+    Base.metadata,
+    Column("tag", String, primary_key=True),
+    Column("event_id", String, ForeignKey("events.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_event_tags_event_id", "event_id"),
+)
+
 
 class Lodging(Base):
     __tablename__ = "lodgings"
@@ -65,8 +117,52 @@ class Lodging(Base):
     name = Column(String, nullable=False)
     location = Column(String, nullable=False)
     price = Column(Float, nullable=False)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geohash = Column(BigInteger, nullable=True)
     packages = relationship("Package", back_populates="lodging")
 
+    __table_args__ = (
+        # Lodgings per city by price: suggestions and the availability rollup
+        Index("ix_lodgings_location_price_id", "location", "price", "id"),
+        # Covering, so nearby-lodging candidates are ranked from the index alone
+        Index("ix_lodgings_geohash", "geohash", "latitude", "longitude", "id"),
+    )
+
+
+# Discovery rollups, maintained by the admin write paths through app.db.availability.
+# Days without events and cities without lodgings have no row.
+availability_days = Table(
+    "availability_days",
+    Base.metadata,
+    Column("city", String, primary_key=True),
+    Column("date", Date, primary_key=True),
+    Column("event_count", Integer, nullable=False),
+    Column("min_event_price", Float, nullable=False),
+    Column("max_event_price", Float, nullable=False),
+    Index("ix_availability_days_date", "date"),
+)
+
+availability_day_tags = Table(
+    "availability_day_tags",
+    Base.metadata,
+    Column("city", String, primary_key=True),
+    Column("date", Date, primary_key=True),
+    Column("tag", String, primary_key=True),
+    Column("event_count", Integer, nullable=False),
+    Index("ix_availability_day_tags_date", "date"),
+)
+
+availability_cities = Table(
+    "availability_cities",
+    Base.metadata,
+    Column("city", String, primary_key=True),
+    Column("lodging_count", Integer, nullable=False),
+    Column("min_lodging_price", Float, nullable=False),
+    Column("max_lodging_price", Float, nullable=False),
+    Column("cheapest_lodging_id", String, nullable=False),
+)
+
 
 class Package(Base):
     __tablename__ = "packages"
@@ -74,7 +170,15 @@ class Package(Base):
     lodging_id = Column(String, ForeignKey("lodgings.id"), nullable=True)
     status = Column(String, default="draft", nullable=False)
     addons = Column(JSON, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
+    # Denormalized from app.core.pricing; refreshed on package and catalog price writes
+    quoted_total = Column(Float, nullable=True)
+    quoted_at = Column(Timestamp, nullable=True)
+    # Bumped by every client edit (PUT/PATCH) and matched by If-Match; requotes leave it
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    # Fetch server-generated created_at in the INSERT itself instead of a refresh
+    __mapper_args__ = {"eager_defaults": True}
 
     lodging = relationship("Lodging", back_populates="packages")
     events = relationship("Event", secondary=package_events, back_populates="packages")
@@ -84,25 +188,56 @@ class Package(Base):
 
 class Booking(Base):
     __tablename__ = "bookings"
-    id = Column(String, primary_key=True)
+    id = Column(Key, primary_key=True)
     package_id = Column(String, ForeignKey("packages.id"), nullable=False)
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     payment_token = Column(String, nullable=False)
+    # pending -> confirmed | payment_failed, moved on by app.db.outbox
     status = Column(String, default="pending", nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    payment_reference = Column(String, nullable=True)
+    created_at = Column(Timestamp, server_default=func.now())
+
+    __mapper_args__ = {"eager_defaults": True}
 
     package = relationship("Package", back_populates="bookings")
     user = relationship("User")
 
 
+class BookingOutbox(Base):
+    """Work written in the same transaction as its booking and drained by app.db.outbox.
+
+    ``available_at`` is both the retry time and the claim lease: a worker claiming a
+    row pushes it into the future, so a row whose worker died becomes claimable again.
+    """
+
+    __tablename__ = "booking_outbox"
+    id = Column(Key, primary_key=True)
+    booking_id = Column(Key, ForeignKey("bookings.id"), nullable=False, unique=True)
+    # pending -> done | failed
+    status = Column(String, default="pending", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    available_at = Column(Timestamp, server_default=func.now(), nullable=False)
+    last_error = Column(String, nullable=True)
+    created_at = Column(Timestamp, server_default=func.now())
+    processed_at = Column(Timestamp, nullable=True)
+
+    __table_args__ = (Index("ix_booking_outbox_status_available", "status", "available_at"),)
+
+
 class Message(Base):
     __tablename__ = "messages"
-    id = Column(String, primary_key=True)
+    id = Column(Key, primary_key=True)
     sender_id = Column(String, ForeignKey("users.id"), nullable=False)
     receiver_id = Column(String, ForeignKey("users.id"), nullable=False)
     package_id = Column(String, ForeignKey("packages.id"), nullable=True)
     message_text = Column(String, nullable=False)
     attachment_url = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
+
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # Conversation reads (see app.routers.messages.get_thread)
+        Index("ix_messages_sender_receiver_created", "sender_id", "receiver_id", "created_at", "id"),
+    )
 
     package = relationship("Package", back_populates="messages")
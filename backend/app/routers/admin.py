@@ -1,20 +1,64 @@
-from datetime import date
-from uuid import uuid4
-from typing import List, Optional
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Literal, Optional, Tuple, Type
 
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, computed_field, model_validator
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.auth.dependencies import require_role
+from app.auth.supabase_jwt import cache_stats
+from app.core import geo
+from app.core.config import settings
+from app.core.ids import uuid7
+from app.db.availability import (
+    EventFacts,
+    LodgingFacts,
+    apply_event_changes,
+    apply_lodging_changes,
+    previous_events,
+    previous_lodgings,
+)
+from app.db.catalog import catalog_cache, invalidate_events, invalidate_lodgings, page_cache
+from app.db.instrumentation import query_budget
+from app.db.export import EXPORTS, MEDIA_TYPES, stream_export
+from app.db.outbox import outbox_workers
+from app.db.pool import pool_status
+from app.db.quotes import requote_for_events, requote_for_lodgings
+from app.db.search import hot_cities, replace_event_tags
+from app.db.session import engine, get_db, replicas
+from app.db.upsert import upsert
 from app.models.models import Event, Lodging
-from app.schemas.models import EventOut, LodgingOut
+from app.schemas.models import BulkIngestResult, EventOut, LodgingOut
 
-router = APIRouter()
+# Every route here writes the catalog or exposes internals
+router = APIRouter(dependencies=[Depends(require_role("admin"))])
 
 
-class EventCreate(BaseModel):
-    id: Optional[str]
+BULK_CHUNK_SIZE = 1000
+BULK_MAX_LINE_BYTES = 64 * 1024
+BULK_MAX_REPORTED_ERRORS = 1000
+
+
+class Coordinates(BaseModel):
+    latitude: Optional[float] = Field(default=None, ge=-90, le=90)
+    longitude: Optional[float] = Field(default=None, ge=-180, le=180)
+
+    @model_validator(mode="after")
+    def _both_or_neither(self):
+        if (self.latitude is None) != (self.longitude is None):
+            raise ValueError("latitude and longitude must be given together")
+        return self
+
+    @computed_field
+    @property
+    def geohash(self) -> Optional[int]:
+        return geo.encode(self.latitude, self.longitude) if self.latitude is not None else None
+
+
+class EventCreate(Coordinates):
+    id: Optional[str] = None
     title: str
     city: str
     venue: str
@@ -23,41 +67,257 @@ class EventCreate(BaseModel):
     price: float
 
 
-class LodgingCreate(BaseModel):
-    id: Optional[str]
+class LodgingCreate(Coordinates):
+    id: Optional[str] = None
     name: str
     location: str
     price: float
 
 
-@router.post("/events", response_model=EventOut)
-def create_event(event: EventCreate, db: Session = Depends(get_db)):
-    event_id = event.id or str(uuid4())
-    obj = Event(
-        id=event_id,
-        title=event.title,
-        city=event.city,
-        venue=event.venue,
-        date=event.date,
-        price=event.price,
-        tags=event.tags,
-    )
-    db.merge(obj)
-    db.flush()
-    db.refresh(obj)
+def _changed(obj, *attributes: str) -> bool:
+    """True when a merged, already-persisted row had any of ``attributes`` modified."""
+    state = inspect(obj)
+    return state.persistent and any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+def _previous(obj, *attributes: str) -> Optional[tuple]:
+    """Values ``attributes`` had before a merge; None when the merge is inserting the row."""
+    state = inspect(obj)
+    if not state.persistent:
+        return None
+    histories = (state.attrs[name].history for name in attributes)
+    return tuple((history.deleted or history.unchanged)[0] for history in histories)
+
+
+async def _after_event_upsert(db: AsyncSession, rows: List[dict], previous: Dict[str, EventFacts]):
+    await replace_event_tags(db, rows)
+    await requote_for_events(db, [row["id"] for row in rows])
+    await apply_event_changes(db, previous, rows)
+
+
+async def _after_lodging_upsert(db: AsyncSession, rows: List[dict], previous: Dict[str, LodgingFacts]):
+    await requote_for_lodgings(db, [row["id"] for row in rows])
+    await apply_lodging_changes(db, previous, rows)
+
+
+def _invalidate_events(rows: List[dict], previous: Dict[str, EventFacts]):
+    invalidate_events([row["city"] for row in rows] + [facts.city for facts in previous.values()])
+
+
+def _invalidate_lodgings(rows: List[dict], previous: Dict[str, LodgingFacts]):
+    invalidate_lodgings([row["location"] for row in rows] + [facts.location for facts in previous.values()])
+
+
+@router.post("/events", response_model=EventOut, dependencies=[Depends(query_budget(11))])
+async def create_event(event: EventCreate, db: AsyncSession = Depends(get_db)):
+    event_id = event.id or str(uuid7())
+    row = {**event.model_dump(), "id": event_id}
+    obj = await db.merge(Event(**row))
+    before = _previous(obj, "city", "date", "price", "tags")
+    reprice = _changed(obj, "price", "date")
+    # event_tags references events; the merged row must be written first
+    await db.flush()
+    await replace_event_tags(db, [row])
+    if reprice:
+        await requote_for_events(db, [event_id])
+    previous = {event_id: EventFacts.of(*before)} if before else {}
+    await apply_event_changes(db, previous, [row])
+    await db.commit()
+    _invalidate_events([row], previous)
     return obj
 
 
-@router.post("/lodgings", response_model=LodgingOut)
-def create_lodging(lodging: LodgingCreate, db: Session = Depends(get_db)):
-    lodging_id = lodging.id or str(uuid4())
-    obj = Lodging(
-        id=lodging_id,
-        name=lodging.name,
-        location=lodging.location,
-        price=lodging.price,
-    )
-    db.merge(obj)
-    db.flush()
-    db.refresh(obj)
+@router.post("/lodgings", response_model=LodgingOut, dependencies=[Depends(query_budget(7))])
+async def create_lodging(lodging: LodgingCreate, db: AsyncSession = Depends(get_db)):
+    lodging_id = lodging.id or str(uuid7())
+    row = {**lodging.model_dump(), "id": lodging_id}
+    obj = await db.merge(Lodging(**row))
+    before = _previous(obj, "location", "price")
+    # Read before the flush, which resets the attribute history
+    reprice = _changed(obj, "price")
+    await db.flush()
+    if reprice:
+        await requote_for_lodgings(db, [lodging_id])
+    previous = {lodging_id: LodgingFacts(*before)} if before else {}
+    await apply_lodging_changes(db, previous, [row])
+    await db.commit()
+    _invalidate_lodgings([row], previous)
     return obj
+
+
+def _line_too_long(line_no: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Line {line_no} exceeds {BULK_MAX_LINE_BYTES} bytes")
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[Tuple[int, bytes]]:
+    buffer = b""
+    line_no = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if len(line) > BULK_MAX_LINE_BYTES:
+                raise _line_too_long(line_no)
+            if line.strip():
+                yield line_no, line
+        # The unfinished line, so one that never ends cannot grow without bound
+        if len(buffer) > BULK_MAX_LINE_BYTES:
+            raise _line_too_long(line_no + 1)
+    if buffer.strip():
+        yield line_no + 1, buffer
+
+
+async def _bulk_upsert(
+    request: Request,
+    db: AsyncSession,
+    schema: Type[BaseModel],
+    table,
+    invalidate: Callable[[List[dict], Any], None],
+    before_upsert: Optional[Callable[[AsyncSession, List[str]], Awaitable[Any]]] = None,
+    after_upsert: Optional[Callable[[AsyncSession, List[dict], Any], Awaitable[None]]] = None,
+) -> dict:
+    # Rows are validated and written one chunk at a time and each chunk is committed,
+    # so memory is bounded by BULK_CHUNK_SIZE however large the upload is.
+    result = {"received": 0, "upserted": 0, "failed": 0, "errors": []}
+    chunk: dict = {}
+
+    async def flush():
+        if chunk:
+            rows = list(chunk.values())
+            # Whatever before_upsert returns about the rows being replaced is handed to after_upsert
+            previous = await before_upsert(db, list(chunk)) if before_upsert is not None else None
+            await db.execute(upsert(db, table, rows))
+            if after_upsert is not None:
+                await after_upsert(db, rows, previous)
+            await db.commit()
+            invalidate(rows, previous)
+            result["upserted"] += len(chunk)
+            chunk.clear()
+
+    async for line_no, line in _ndjson_lines(request):
+        result["received"] += 1
+        try:
+            row = schema.model_validate_json(line).model_dump()
+        except ValidationError as exc:
+            result["failed"] += 1
+            if len(result["errors"]) < BULK_MAX_REPORTED_ERRORS:
+                errors = exc.errors(include_url=False, include_context=False, include_input=False)
+                result["errors"].append({"line": line_no, "errors": errors})
+            continue
+        row["id"] = row["id"] or str(uuid7())
+        # Last occurrence wins; ON CONFLICT cannot touch the same row twice in one statement
+        chunk.pop(row["id"], None)
+        chunk[row["id"]] = row
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await flush()
+    await flush()
+    return result
+
+
+@router.post("/events:bulk", response_model=BulkIngestResult)
+async def bulk_upsert_events(request: Request, db: AsyncSession = Depends(get_db)):
+    """Upsert events from an NDJSON body, one EventCreate object per line."""
+    return await _bulk_upsert(
+        request,
+        db,
+        EventCreate,
+        Event.__table__,
+        _invalidate_events,
+        before_upsert=previous_events,
+        after_upsert=_after_event_upsert,
+    )
+
+
+@router.post("/lodgings:bulk", response_model=BulkIngestResult)
+async def bulk_upsert_lodgings(request: Request, db: AsyncSession = Depends(get_db)):
+    """Upsert lodgings from an NDJSON body, one LodgingCreate object per line."""
+    return await _bulk_upsert(
+        request,
+        db,
+        LodgingCreate,
+        Lodging.__table__,
+        _invalidate_lodgings,
+        before_upsert=previous_lodgings,
+        after_upsert=_after_lodging_upsert,
+    )
+
+
+@router.get("/export/{table}")
+async def export_table(
+    table: str,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+):
+    """Stream every row of ``table`` (bookings, messages or packages), optionally
+    limited to ``created_from <= created_at < created_to``."""
+    if table not in EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown export {table!r}")
+    filename = f"{table}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        stream_export(table, format, gzip, created_from, created_to),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/auth/cache")
+async def auth_cache_stats():
+    return cache_stats()
+
+
+@router.get("/cache")
+async def catalog_cache_stats():
+    return {**catalog_cache.stats(), "pages": page_cache.stats()}
+
+
+@router.get("/search")
+async def search_index_stats():
+    return hot_cities.stats()
+
+
+@router.get("/admission")
+async def admission_status():
+    from app.core.admission import admission_stats
+
+    return admission_stats()
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """Captured request profiles, newest first, with their SQL statements."""
+    if not settings.profiling_enabled:
+        return {"enabled": False, "profiles": []}
+    from app.core.profiling import recent_profiles
+
+    return {"enabled": True, "profiles": [capture.summary() for capture in recent_profiles()]}
+
+
+@router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+async def folded_profile(profile_id: str):
+    """Folded stacks for flamegraph.pl, speedscope or inferno; one sample is ``PROFILING_INTERVAL_MS``."""
+    capture = None
+    if settings.profiling_enabled:
+        from app.core.profiling import find_profile
+
+        capture = find_profile(profile_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return capture.folded()
+
+
+@router.get("/outbox")
+async def outbox_status():
+    return await outbox_workers.stats()
+
+
+@router.get("/replicas")
+async def replica_status():
+    return replicas.stats()
+
+
+@router.get("/pool")
+async def connection_pool_status():
+    return pool_status(engine.sync_engine.pool)
@@ -1,39 +1,62 @@
-from uuid import uuid4
-
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-
-from app.db.session import get_db
-from app.models.models import Booking, Package, User
+from sqlalchemy import insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.ids import parse_id, uuid7
+from app.db.instrumentation import query_budget
+from app.db.outbox import outbox_workers
+from app.db.session import get_db, get_read_db
+from app.db.users import ensure_users
+from app.models.models import Booking, BookingOutbox, Package
 from app.schemas.models import BookingCreate, BookingOut
 
 router = APIRouter()
 
 
-def _ensure_user(db: Session, user_id: str) -> User:
-    user = db.get(User, user_id)
-    if not user:
-        user = User(id=user_id, name=f"User {user_id}", email=f"{user_id}@example.com")
-        db.add(user)
-    return user
-
-
-@router.post("", response_model=BookingOut)
-def create_booking(payload: BookingCreate, db: Session = Depends(get_db)):
-    package = db.get(Package, payload.package_id)
-    if not package:
+@router.post("", response_model=BookingOut, dependencies=[Depends(query_budget(3))])
+async def create_booking(payload: BookingCreate, db: AsyncSession = Depends(get_db)):
+    await ensure_users(db, [payload.user_id])
+
+    booking = {
+        "id": uuid7(),
+        "package_id": payload.package_id,
+        "user_id": payload.user_id,
+        "payment_token": payload.payment_token,
+        "status": "pending",
+    }
+    # INSERT ... SELECT FROM packages: the package check and the insert are one
+    # statement, and RETURNING hands back the server-side created_at.
+    source = select(
+        literal(booking["id"], Booking.__table__.c.id.type),
+        Package.id,
+        literal(booking["user_id"]),
+        literal(booking["payment_token"]),
+        literal(booking["status"]),
+    ).where(Package.id == payload.package_id)
+    stmt = (
+        insert(Booking)
+        .from_select(["id", "package_id", "user_id", "payment_token", "status"], source)
+        .returning(Booking.created_at)
+    )
+    created_at = (await db.execute(stmt)).scalar_one_or_none()
+    if created_at is None:
         raise HTTPException(status_code=404, detail="Package not found")
-
-    _ensure_user(db, payload.user_id)
-
-    booking = Booking(
-        id=str(uuid4()),
-        package_id=payload.package_id,
-        user_id=payload.user_id,
-        payment_token=payload.payment_token,
-        status="confirmed",
+    # Payment is captured by app.db.outbox; the outbox row commits with the booking
+    await db.execute(
+        insert(BookingOutbox).values(id=uuid7(), booking_id=booking["id"], status="pending", attempts=0)
     )
-    db.add(booking)
-    db.flush()
-    db.refresh(booking)
+    await db.commit()
+    outbox_workers.notify()
+    return {**booking, "created_at": created_at}
+
+
+@router.get("/{booking_id}", response_model=BookingOut, dependencies=[Depends(query_budget(1))])
+async def get_booking(booking_id: str, db: AsyncSession = Depends(get_read_db)):
+    try:
+        key = parse_id(booking_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Booking not found")
+    booking = await db.get(Booking, key)
+    if booking is None:
+        raise HTTPException(status_code=404, detail="Booking not found")
     return booking
@@ -0,0 +1,229 @@
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cursor import decode_cursor, encode_cursor
+from app.core.etag import json_response_with_etag, make_etag
+from app.core.serialization import RowSerializer, dumps
+from app.db.availability import load_availability
+from app.db.catalog import EVENTS, LODGINGS, page_cache
+from app.db.instrumentation import query_budget
+from app.db.search import SearchQuery, normalize_tags, search_events
+from app.db.session import get_read_db
+from app.models.models import Event
+from app.schemas.models import (
+    AvailabilityBucket,
+    AvailabilityPage,
+    EventOut,
+    EventPage,
+    EventSearchPage,
+    LodgingAvailability,
+)
+
+router = APIRouter()
+
+MAX_PAGE_SIZE = 200
+MAX_AVAILABILITY_DAYS = 366
+MAX_AVAILABILITY_TAGS = 20
+FRIDAY = 4
+
+event_rows = RowSerializer(EventOut)
+
+
+def _event_cursor(event: dict) -> str:
+    return encode_cursor([event["city"], event["date"].isoformat(), event["id"]])
+
+
+def _search_seek_key(cursor: str) -> tuple:
+    day, event_id = decode_cursor(cursor, 2)
+    try:
+        return date.fromisoformat(day), event_id
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _seek_key(cursor: str) -> tuple:
+    city, day, event_id = decode_cursor(cursor, 3)
+    try:
+        return city, date.fromisoformat(day), event_id
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def _query_page(
+    db: AsyncSession,
+    city: Optional[str],
+    date_from: Optional[date],
+    date_to: Optional[date],
+    max_price: Optional[float],
+    limit: int,
+    cursor: Optional[str],
+) -> tuple:
+    # Keyset pagination: seek past the last (city, date, id) seen instead of OFFSET,
+    # so every page is a bounded range scan on ix_events_city_date_id.
+    stmt = select(*event_rows.columns(Event.__table__.c))
+    if city is not None:
+        stmt = stmt.where(Event.city == city)
+    if date_from is not None:
+        stmt = stmt.where(Event.date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Event.date <= date_to)
+    if max_price is not None:
+        stmt = stmt.where(Event.price <= max_price)
+    if cursor:
+        stmt = stmt.where(tuple_(Event.city, Event.date, Event.id) > _seek_key(cursor))
+
+    stmt = stmt.order_by(Event.city, Event.date, Event.id).limit(limit + 1)
+    events = event_rows.dicts(await db.execute(stmt))
+
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = _event_cursor(events[-1])
+    body = dumps({"items": events, "next_cursor": next_cursor})
+    return body, make_etag(body)
+
+
+@router.get("", response_model=EventPage, dependencies=[Depends(query_budget(1))])
+async def list_events(
+    city: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    max_price: Optional[float] = Query(default=None, ge=0),
+    limit: int = Query(default=50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    # Whole pages are cached as encoded JSON + ETag until the next event write
+    page_key = ("page", city, date_from, date_to, max_price, limit, cursor)
+    cached = page_cache.get(EVENTS, page_key)
+    if cached is None:
+        # Read before the query, so a write racing it leaves this page already stale
+        generation = page_cache.generation(EVENTS)
+        cached = await _query_page(db, city, date_from, date_to, max_price, limit, cursor)
+        page_cache.set(EVENTS, page_key, cached, generation)
+    body, etag = cached
+    return json_response_with_etag(body, etag, if_none_match)
+
+
+# Declared after "" but must stay ahead of any future "/{event_id}" route
+@router.get("/search", response_model=EventSearchPage, dependencies=[Depends(query_budget(3))])
+async def search(
+    tag: List[str] = Query(default=[]),
+    match: Literal["all", "any"] = "all",
+    q: Optional[str] = Query(default=None, min_length=1, max_length=100),
+    city: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(default=50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Events matching every (``match=all``) or any (``match=any``) ``tag``, and/or whose
+    title or venue starts with ``q``, in (date, id) order with facet counts."""
+    tags = normalize_tags(tag)
+    page_key = ("search", tuple(tags), match, q and q.lower(), city, date_from, date_to, limit, cursor)
+    cached = page_cache.get(EVENTS, page_key)
+    if cached is None:
+        generation = page_cache.generation(EVENTS)
+        query = SearchQuery(
+            tags=tags,
+            match_all=match == "all",
+            prefix=q,
+            city=city,
+            date_from=date_from,
+            date_to=date_to,
+            limit=limit,
+            after=_search_seek_key(cursor) if cursor else None,
+        )
+        result = await search_events(db, query)
+        next_cursor = None
+        if result.has_more:
+            last = result.items[-1]
+            next_cursor = encode_cursor([last.date.isoformat(), last.id])
+        page = EventSearchPage(
+            items=result.items, next_cursor=next_cursor, total=result.total, facets=result.facets
+        )
+        body = page.model_dump_json().encode()
+        cached = (body, make_etag(body))
+        page_cache.set(EVENTS, page_key, cached, generation)
+    body, etag = cached
+    return json_response_with_etag(body, etag, if_none_match)
+
+
+def _availability_page(days, tags, lodgings, by: str) -> AvailabilityPage:
+    buckets: Dict[tuple, dict] = {}
+    for row in days:
+        if by == "weekend":
+            if row.date.weekday() < FRIDAY:
+                continue
+            start = row.date - timedelta(days=row.date.weekday() - FRIDAY)
+            end = start + timedelta(days=2)
+        else:
+            start = end = row.date
+        bucket = buckets.get((row.city, start))
+        if bucket is None:
+            bucket = buckets[(row.city, start)] = {
+                "city": row.city,
+                "date_from": start,
+                "date_to": end,
+                "event_count": 0,
+                "min_event_price": row.min_event_price,
+                "max_event_price": row.max_event_price,
+                "tags": Counter(),
+            }
+        bucket["event_count"] += row.event_count
+        bucket["min_event_price"] = min(bucket["min_event_price"], row.min_event_price)
+        bucket["max_event_price"] = max(bucket["max_event_price"], row.max_event_price)
+        bucket["tags"].update(tags.get((row.city, row.date), {}))
+
+    items = []
+    for bucket in buckets.values():
+        ranked = sorted(bucket["tags"].items(), key=lambda item: (-item[1], item[0]))
+        bucket["tags"] = dict(ranked[:MAX_AVAILABILITY_TAGS])
+        city = lodgings.get(bucket["city"])
+        if city is not None:
+            bucket["lodging"] = LodgingAvailability(
+                lodging_count=city.lodging_count,
+                min_price=city.min_lodging_price,
+                max_price=city.max_lodging_price,
+                cheapest_lodging_id=city.cheapest_lodging_id,
+            )
+        items.append(AvailabilityBucket(**bucket))
+    return AvailabilityPage(items=items)
+
+
+@router.get("/availability", response_model=AvailabilityPage, dependencies=[Depends(query_budget(3))])
+async def availability(
+    date_from: date,
+    date_to: date,
+    city: Optional[str] = None,
+    by: Literal["weekend", "day"] = "weekend",
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Event count, event price range and top tags per city and weekend (Friday to
+    Sunday) or day, with the city's lodging count, price range and cheapest lodging.
+    Served from the availability rollups; weekends cut by the range count only the
+    days inside it."""
+    if date_to < date_from or (date_to - date_from).days >= MAX_AVAILABILITY_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"date_from..date_to must span 1 to {MAX_AVAILABILITY_DAYS} days"
+        )
+    # Lodging writes move the lodgings generation, not the events one this is cached under
+    page_key = ("availability", page_cache.generation(LODGINGS), city, date_from, date_to, by)
+    cached = page_cache.get(EVENTS, page_key)
+    if cached is None:
+        generation = page_cache.generation(EVENTS)
+        days, tags, lodgings = await load_availability(db, city, date_from, date_to)
+        body = _availability_page(days, tags, lodgings, by).model_dump_json().encode()
+        cached = (body, make_etag(body))
+        page_cache.set(EVENTS, page_key, cached, generation)
+    body, etag = cached
+    return json_response_with_etag(body, etag, if_none_match)
@@ -0,0 +1,78 @@
+import heapq
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import geo
+from app.db.catalog import get_events
+from app.db.instrumentation import query_budget
+from app.db.session import get_read_db
+from app.models.models import Lodging
+from app.schemas.models import LodgingOut, NearbyLodging, NearbyLodgings
+
+router = APIRouter()
+
+MAX_RADIUS_KM = 200.0
+MAX_NEARBY = 200
+# Rings searched out to radius_km, each RING_GROWTH times wider than the last
+RINGS = 3
+RING_GROWTH = 4
+
+
+async def _nearest(db: AsyncSession, latitude: float, longitude: float, radius_km: float, limit: int) -> list:
+    """(distance, lodging_id) of the ``limit`` nearest lodgings within ``radius_km``.
+
+    Candidates come from range scans of the covering geohash index. A ring holding
+    ``limit`` lodgings already contains the nearest ones, so in dense areas the wider
+    rings are never read.
+    """
+    for ring in range(RINGS - 1, -1, -1):
+        ring_km = radius_km / RING_GROWTH**ring
+        cells = geo.cover(latitude, longitude, ring_km)
+        candidates = await db.execute(
+            select(Lodging.id, Lodging.latitude, Lodging.longitude).where(
+                or_(*(and_(Lodging.geohash >= low, Lodging.geohash < high) for low, high in cells))
+            )
+        )
+        nearest = heapq.nsmallest(
+            limit,
+            (
+                (distance, lodging_id)
+                for lodging_id, lodging_latitude, lodging_longitude in candidates
+                if (distance := geo.distance_km(latitude, longitude, lodging_latitude, lodging_longitude))
+                <= ring_km
+            ),
+        )
+        if len(nearest) == limit:
+            break
+    return nearest
+
+
+@router.get("/near", response_model=NearbyLodgings, dependencies=[Depends(query_budget(2 + RINGS))])
+async def lodgings_near(
+    event_id: str,
+    radius_km: float = Query(default=5.0, gt=0, le=MAX_RADIUS_KM),
+    limit: int = Query(default=50, ge=1, le=MAX_NEARBY),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Lodgings within ``radius_km`` of the event, nearest first."""
+    event = (await get_events(db, [event_id])).get(event_id)
+    if event is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    if event.latitude is None:
+        raise HTTPException(status_code=422, detail="Event has no coordinates")
+
+    nearest = await _nearest(db, event.latitude, event.longitude, radius_km, limit)
+    if not nearest:
+        return NearbyLodgings(event_id=event_id, radius_km=radius_km, items=[])
+
+    rows = await db.execute(select(Lodging).where(Lodging.id.in_([lodging_id for _, lodging_id in nearest])))
+    lodgings = {lodging.id: LodgingOut.model_validate(lodging) for lodging in rows.scalars()}
+    items: List[NearbyLodging] = [
+        NearbyLodging(**lodgings[lodging_id].model_dump(), distance_km=round(distance, 3))
+        for distance, lodging_id in nearest
+        if lodging_id in lodgings
+    ]
+    return NearbyLodgings(event_id=event_id, radius_km=radius_km, items=items)
@@ -1,45 +1,145 @@
-from uuid import uuid4
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, literal, select, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
-from app.models.models import Message, Package, User
-from app.schemas.models import MessageCreate, MessageOut
+from app.auth.dependencies import get_current_user
+from app.core.cursor import decode_cursor, encode_cursor
+from app.core.ids import parse_id, uuid7
+from app.core.pubsub import broker
+from app.core.serialization import ORJSONResponse, RowSerializer
+from app.db.instrumentation import query_budget
+from app.db.session import get_db, get_read_db
+from app.db.users import ensure_users
+from app.models.models import Message, Package
+from app.schemas.models import MessageCreate, MessageOut, MessagePage
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+MAX_PAGE_SIZE = 200
+STREAM_HEARTBEAT_SECONDS = 15
+
+message_rows = RowSerializer(MessageOut)
 
-def _ensure_user(db: Session, user_id: str) -> User:
-    if not user_id:
-        raise HTTPException(status_code=400, detail="user_id is required")
-    user = db.get(User, user_id)
-    if not user:
-        # Create a lightweight placeholder user to satisfy FK constraints
-        user = User(id=user_id, name=f"User {user_id}", email=f"{user_id}@example.com")
-        db.add(user)
-    return user
 
+def _user_channel(user_id: str) -> str:
+    return f"user:{user_id}"
 
-@router.post("", response_model=MessageOut)
-def send_message(payload: MessageCreate, db: Session = Depends(get_db)):
-    _ensure_user(db, payload.sender_id)
-    _ensure_user(db, payload.receiver_id)
 
+@router.post("", response_model=MessageOut, dependencies=[Depends(query_budget(2))])
+async def send_message(payload: MessageCreate, db: AsyncSession = Depends(get_db)):
+    if not payload.sender_id or not payload.receiver_id:
+        raise HTTPException(status_code=400, detail="user_id is required")
+    await ensure_users(db, [payload.sender_id, payload.receiver_id])
+
+    message = {
+        "id": uuid7(),
+        "sender_id": payload.sender_id,
+        "receiver_id": payload.receiver_id,
+        "package_id": payload.package_id,
+        "message_text": payload.message_text,
+        "attachment_url": payload.attachment_url,
+    }
+    columns = list(message)
+    source = select(*(literal(message[name], Message.__table__.c[name].type) for name in columns))
     if payload.package_id:
-        package = db.get(Package, payload.package_id)
-        if not package:
-            raise HTTPException(status_code=404, detail="Package not found")
-
-    message = Message(
-        id=str(uuid4()),
-        sender_id=payload.sender_id,
-        receiver_id=payload.receiver_id,
-        package_id=payload.package_id,
-        message_text=payload.message_text,
-        attachment_url=payload.attachment_url,
-    )
-    db.add(message)
-    db.flush()
-    db.refresh(message)
+        # Only produces a row when the package exists
+        source = source.where(Package.id == payload.package_id)
+    stmt = insert(Message).from_select(columns, source).returning(Message.created_at)
+    created_at = (await db.execute(stmt)).scalar_one_or_none()
+    if created_at is None:
+        raise HTTPException(status_code=404, detail="Package not found")
+    message["created_at"] = created_at
+
+    # Push only what is committed. The message is stored either way, so a failed push
+    # must not fail the request; stream clients catch up from the thread.
+    await db.commit()
+    pushed = MessageOut(**message).model_dump(mode="json")
+    for user_id in {payload.receiver_id, payload.sender_id}:
+        try:
+            await broker.publish(_user_channel(user_id), pushed)
+        except Exception:
+            logger.exception("Publishing message %s to %s failed", message["id"], user_id)
     return message
+
+
+@router.get(
+    "/threads/{peer_id}",
+    response_model=MessagePage,
+    dependencies=[Depends(query_budget(1))],
+)
+async def get_thread(
+    peer_id: str,
+    limit: int = Query(default=50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Conversation between the caller and ``peer_id``, newest first."""
+    user_id = user["id"]
+    seek = None
+    if cursor:
+        created_at, message_id = decode_cursor(cursor, 2)
+        try:
+            seek = (datetime.fromisoformat(created_at), parse_id(message_id))
+        except (TypeError, ValueError, AttributeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # One index range scan per direction on ix_messages_sender_receiver_created,
+    # each already in order and capped, merged by the outer ORDER BY.
+    def direction(sender: str, receiver: str):
+        stmt = select(Message).where(Message.sender_id == sender, Message.receiver_id == receiver)
+        if seek is not None:
+            stmt = stmt.where(tuple_(Message.created_at, Message.id) < seek)
+        stmt = stmt.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit + 1)
+        return select(stmt.subquery())
+
+    directions = [direction(user_id, peer_id)]
+    if peer_id != user_id:
+        directions.append(direction(peer_id, user_id))
+    merged = union_all(*directions).subquery()
+    stmt = (
+        select(*message_rows.columns(merged.c))
+        .order_by(merged.c.created_at.desc(), merged.c.id.desc())
+        .limit(limit + 1)
+    )
+    messages = message_rows.dicts(await db.execute(stmt))
+
+    next_cursor = None
+    if len(messages) > limit:
+        messages = messages[:limit]
+        last = messages[-1]
+        next_cursor = encode_cursor([last["created_at"].isoformat(), last["id"]])
+    # Rows come straight from messages; skip response_model validation
+    return ORJSONResponse({"items": messages, "next_cursor": next_cursor})
+
+
+@router.get("/stream")
+async def stream_messages(request: Request, user: dict = Depends(get_current_user)):
+    """Server-sent events: every message sent to or by the caller from now on."""
+    user_id = user["id"]
+
+    async def events():
+        async with broker.subscribe(_user_channel(user_id)) as queue:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: message\nid: {message['id']}\ndata: {json.dumps(message)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
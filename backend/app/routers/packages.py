@@ -1,46 +1,307 @@
-from typing import List
+from datetime import datetime, timezone
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Path
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Response
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.db.session import get_db
-from app.models.models import Event, Lodging, Package
-from app.schemas.models import PackageOut, PackageUpdate
+from app.core.etag import json_response_with_etag, make_etag
+from app.core.pricing import QuoteInputs, quote_batch
+from app.core.serialization import ORJSONResponse, dumps
+from app.db.catalog import get_events, get_lodging
+from app.db.instrumentation import query_budget
+from app.db.quotes import quote_packages
+from app.db.search import normalize_tags
+from app.db.suggest import city_catalogs, suggest
+from app.db.session import get_db, get_read_db
+from app.db.upsert import dialect_insert
+from app.models.models import Package, package_events
+from app.schemas.models import (
+    EventOut,
+    LodgingOut,
+    PackageOut,
+    PackagePatch,
+    PackageUpdate,
+    QuoteRequest,
+    QuoteResponse,
+    SuggestRequest,
+    SuggestResponse,
+)
 
 router = APIRouter()
 
 
-def _fetch_events(db: Session, event_ids: List[str]) -> List[Event]:
+async def _fetch_events(db: AsyncSession, event_ids: List[str]) -> List[EventOut]:
     if not event_ids:
         return []
-    events = db.query(Event).filter(Event.id.in_(event_ids)).all()
+    events = await get_events(db, event_ids)
     if len(events) != len(event_ids):
         raise HTTPException(status_code=404, detail="One or more events not found")
-    return events
+    return [events[event_id] for event_id in event_ids]
 
 
-@router.put("/{package_id}", response_model=PackageOut)
-def update_package(
+async def _package_event_ids(db: AsyncSession, package_id: str) -> List[str]:
+    stmt = select(package_events.c.event_id).where(package_events.c.package_id == package_id)
+    return list((await db.execute(stmt)).scalars())
+
+
+async def _replace_package_events(db: AsyncSession, package_id: str, event_ids: List[str]):
+    # Set-based replace: drop what is no longer wanted, insert what is new
+    await db.execute(
+        delete(package_events).where(
+            package_events.c.package_id == package_id,
+            package_events.c.event_id.not_in(event_ids),
+        )
+    )
+    if event_ids:
+        rows = [{"package_id": package_id, "event_id": event_id} for event_id in event_ids]
+        await db.execute(dialect_insert(db, package_events).values(rows).on_conflict_do_nothing())
+
+
+def _quote(
+    package_id: str, lodging: Optional[LodgingOut], addons: Optional[dict], events: List[EventOut]
+) -> float:
+    # Everything a quote needs is already in hand, so no extra statements
+    inputs = QuoteInputs()
+    slot = inputs.add_package(package_id, lodging.price if lodging else None, addons)
+    for event in events:
+        inputs.add_event(slot, event.price, event.date)
+    return quote_batch(inputs).total.item()
+
+
+def _requote(package: Package, lodging: Optional[LodgingOut], events: List[EventOut]):
+    package.quoted_total = _quote(package.id, lodging, package.addons, events)
+    package.quoted_at = datetime.now(timezone.utc)
+
+
+def _etag(version: int, body: bytes) -> str:
+    """``"<version>-<body digest>"``.
+
+    The digest covers the served body, so a requote or a catalog price change moves
+    the tag for If-None-Match even though the version stays; If-Match compares only
+    the version, since those changes are not edits a client could have overwritten.
+    """
+    return f'"{version}-{make_etag(body)[1:-1]}"'
+
+
+def _tag_version(tag: str) -> str:
+    return tag.strip().strip('"').partition("-")[0]
+
+
+def _conflict(detail: str, version: Optional[int] = None) -> HTTPException:
+    # The bare version is enough for the client's next If-Match
+    headers = {"ETag": f'"{version}"'} if version is not None else None
+    return HTTPException(status_code=409, detail=detail, headers=headers)
+
+
+def _check_if_match(if_match: Optional[str], version: int):
+    if if_match is None:
+        return
+    candidates = [value.strip() for value in if_match.split(",")]
+    if "*" not in candidates and str(version) not in map(_tag_version, candidates):
+        raise _conflict("Package has changed; reload it and retry", version)
+
+
+async def _bump_version(db: AsyncSession, package_id: str, version: int, **values) -> int:
+    """Moves the package from ``version`` to the next one, or 409s if another writer got there first.
+
+    The conditional UPDATE runs before any other write of the edit, and on Postgres
+    its row lock makes a concurrent edit of the same version wait and then miss.
+    """
+    table = Package.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == package_id, table.c.version == version)
+        .values(version=table.c.version + 1, **values)
+        .returning(table.c.version)
+    )
+    new_version = (await db.execute(stmt)).scalar_one_or_none()
+    if new_version is None:
+        raise _conflict("Package was changed by another request; reload it and retry")
+    return new_version
+
+
+def _package_body(package: Package, lodging: Optional[LodgingOut], events: List[EventOut]) -> bytes:
+    return dumps(
+        PackageOut(
+            id=package.id,
+            status=package.status,
+            version=package.version,
+            addons=package.addons,
+            created_at=package.created_at,
+            quoted_total=package.quoted_total,
+            lodging=lodging,
+            events=events,
+        )
+    )
+
+
+def _package_response(
+    package: Package,
+    lodging: Optional[LodgingOut],
+    events: List[EventOut],
+    if_none_match: Optional[str] = None,
+) -> Response:
+    body = _package_body(package, lodging, events)
+    return json_response_with_etag(body, _etag(package.version, body), if_none_match)
+
+
+@router.post("/quotes", response_model=QuoteResponse, dependencies=[Depends(query_budget(2))])
+async def quote(request: QuoteRequest, db: AsyncSession = Depends(get_read_db)):
+    """Fresh quotes for up to 5000 packages at current catalog prices."""
+    package_ids = list(dict.fromkeys(request.package_ids))
+    batch = await quote_packages(db, package_ids)
+    quoted = set(batch.package_ids)
+    # Up to 5000 rows of plain floats; encode them directly
+    return ORJSONResponse(
+        {
+            "quotes": batch.rows(),
+            "missing": [package_id for package_id in package_ids if package_id not in quoted],
+        }
+    )
+
+
+@router.post("/suggest", response_model=SuggestResponse, dependencies=[Depends(query_budget(2))])
+async def suggest_packages(request: SuggestRequest, db: AsyncSession = Depends(get_read_db)):
+    """Top-k event + lodging bundles in ``city`` that fit ``budget`` (quoted total),
+    ranked by how many requested tags they cover."""
+    if request.date_to < request.date_from:
+        raise HTTPException(status_code=400, detail="date_to is before date_from")
+    catalog = await city_catalogs.get(db, request.city)
+    suggestions = suggest(
+        catalog,
+        request.date_from,
+        request.date_to,
+        request.budget,
+        normalize_tags(request.tags),
+        request.k,
+        request.max_events,
+    )
+    return SuggestResponse(suggestions=[suggestion.__dict__ for suggestion in suggestions])
+
+
+@router.get("/{package_id}", response_model=PackageOut, dependencies=[Depends(query_budget(4))])
+async def get_package(
+    package_id: str = Path(...),
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    package = await db.get(Package, package_id)
+    if not package:
+        raise HTTPException(status_code=404, detail="Package not found")
+    events = await _fetch_events(db, await _package_event_ids(db, package_id))
+    # Lodging and events come from the catalog cache, not from relationship loads
+    lodging = await get_lodging(db, package.lodging_id) if package.lodging_id else None
+    return _package_response(package, lodging, events, if_none_match)
+
+
+@router.put("/{package_id}", response_model=PackageOut, dependencies=[Depends(query_budget(8))])
+async def update_package(
     package_id: str = Path(...),
     payload: PackageUpdate = None,
-    db: Session = Depends(get_db),
+    if_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_db),
 ):
-    package = db.get(Package, package_id)
+    """Creates or replaces the package. With If-Match, only if it is still at that version."""
+    package = await db.get(Package, package_id)
     if not package:
-        package = Package(id=package_id, status="draft")
+        if if_match is not None:
+            raise _conflict("Package does not exist")
+        package = Package(id=package_id, status="draft", version=1)
         db.add(package)
+    elif payload:
+        _check_if_match(if_match, package.version)
+        set_committed_value(package, "version", await _bump_version(db, package_id, package.version))
 
+    lodging = None
     if payload and payload.lodging_id:
-        lodging = db.get(Lodging, payload.lodging_id)
+        lodging = await get_lodging(db, payload.lodging_id)
         if not lodging:
             raise HTTPException(status_code=404, detail="Lodging not found")
-        package.lodging = lodging
+        package.lodging_id = payload.lodging_id
+    elif package.lodging_id:
+        lodging = await get_lodging(db, package.lodging_id)
 
     if payload:
-        package.events = _fetch_events(db, payload.event_ids)
+        event_ids = list(dict.fromkeys(payload.event_ids))
+        events = await _fetch_events(db, event_ids)
         package.addons = payload.addons
+        _requote(package, lodging, events)
+        await _flush_new(db)
+        await _replace_package_events(db, package_id, event_ids)
+    else:
+        await _flush_new(db)
+        events = await _fetch_events(db, await _package_event_ids(db, package_id))
+    return _package_response(package, lodging, events)
+
+
+async def _flush_new(db: AsyncSession):
+    try:
+        await db.flush()
+    except IntegrityError:
+        # Two PUTs created the same package id at once; this one lost
+        raise _conflict("Package was created by another request; reload it and retry")
+
+
+@router.patch("/{package_id}", response_model=PackageOut, dependencies=[Depends(query_budget(7))])
+async def patch_package(
+    patch: PackagePatch,
+    package_id: str = Path(...),
+    if_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Adds and removes events and addons without resending the package.
+
+    Only the package_events rows that actually change are written. With If-Match the
+    edit applies only to that version; without it, the edit applies to the version
+    read here, so a concurrent edit that commits first still turns it into a 409.
+    """
+    add_ids = list(dict.fromkeys(patch.add_event_ids))
+    remove_ids = set(patch.remove_event_ids)
+    if remove_ids.intersection(add_ids):
+        raise HTTPException(status_code=400, detail="An event cannot be both added and removed")
+
+    package = await db.get(Package, package_id)
+    if not package:
+        raise HTTPException(status_code=404, detail="Package not found")
+    _check_if_match(if_match, package.version)
+
+    current_ids = await _package_event_ids(db, package_id)
+    current = set(current_ids)
+    to_add = [event_id for event_id in add_ids if event_id not in current]
+    to_remove = [event_id for event_id in current_ids if event_id in remove_ids]
+    kept = [event_id for event_id in current_ids if event_id not in remove_ids]
+    events = await _fetch_events(db, kept + to_add)
+    lodging = await get_lodging(db, package.lodging_id) if package.lodging_id else None
+
+    addons = package.addons
+    if patch.set_addons or patch.remove_addons:
+        addons = {**(addons or {}), **patch.set_addons}
+        for key in patch.remove_addons:
+            addons.pop(key, None)
+    quoted_total = _quote(package_id, lodging, addons, events)
+
+    version = await _bump_version(
+        db,
+        package_id,
+        package.version,
+        addons=addons,
+        quoted_total=quoted_total,
+        quoted_at=datetime.now(timezone.utc),
+    )
+    if to_remove:
+        await db.execute(
+            delete(package_events).where(
+                package_events.c.package_id == package_id,
+                package_events.c.event_id.in_(to_remove),
+            )
+        )
+    if to_add:
+        rows = [{"package_id": package_id, "event_id": event_id} for event_id in to_add]
+        await db.execute(dialect_insert(db, package_events).values(rows).on_conflict_do_nothing())
 
-    db.add(package)
-    db.flush()
-    db.refresh(package)
-    return package
+    for name, value in (("version", version), ("addons", addons), ("quoted_total", quoted_total)):
+        set_committed_value(package, name, value)
+    return _package_response(package, lodging, events)
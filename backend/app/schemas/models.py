@@ -1,7 +1,8 @@
 from datetime import date, datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class EventOut(BaseModel):
@@ -12,9 +13,52 @@ class EventOut(BaseModel):
     date: date
     price: float
     tags: Optional[List[str]] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class EventPage(BaseModel):
+    items: List[EventOut]
+    next_cursor: Optional[str] = None
+
+
+class SearchFacets(BaseModel):
+    city: Dict[str, int] = {}
+    tag: Dict[str, int] = {}
+    month: Dict[str, int] = {}
+
+
+class EventSearchPage(BaseModel):
+    items: List[EventOut]
+    next_cursor: Optional[str] = None
+    # Facets and total cover every match, not just this page
+    total: int
+    facets: SearchFacets
+
+
+class LodgingAvailability(BaseModel):
+    lodging_count: int
+    min_price: float
+    max_price: float
+    cheapest_lodging_id: str
+
+
+class AvailabilityBucket(BaseModel):
+    city: str
+    # A single day, or Friday..Sunday when grouped by weekend
+    date_from: date
+    date_to: date
+    event_count: int
+    min_event_price: float
+    max_event_price: float
+    tags: Dict[str, int] = {}
+    lodging: Optional[LodgingAvailability] = None
+
+
+class AvailabilityPage(BaseModel):
+    items: List[AvailabilityBucket]
 
 
 class LodgingOut(BaseModel):
@@ -22,9 +66,33 @@ class LodgingOut(BaseModel):
     name: str
     location: str
     price: float
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class NearbyLodging(LodgingOut):
+    distance_km: float
+
 
-    class Config:
-        orm_mode = True
+class NearbyLodgings(BaseModel):
+    event_id: str
+    radius_km: float
+    items: List[NearbyLodging]
+
+
+class BulkRowError(BaseModel):
+    line: int
+    errors: List[dict]
+
+
+class BulkIngestResult(BaseModel):
+    received: int
+    upserted: int
+    failed: int
+    # Capped; ``failed`` carries the full count
+    errors: List[BulkRowError] = []
 
 
 class PackageUpdate(BaseModel):
@@ -33,16 +101,69 @@ class PackageUpdate(BaseModel):
     addons: Optional[dict] = None
 
 
+class PackagePatch(BaseModel):
+    add_event_ids: List[str] = []
+    remove_event_ids: List[str] = []
+    # Merged into addons key by key; remove_addons drops keys
+    set_addons: Dict[str, Any] = {}
+    remove_addons: List[str] = []
+
+
 class PackageOut(BaseModel):
     id: str
     status: str
+    version: int = 1
     addons: Optional[dict] = None
     created_at: Optional[datetime]
+    quoted_total: Optional[float] = None
     lodging: Optional[LodgingOut]
     events: List[EventOut] = []
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class QuoteRequest(BaseModel):
+    package_ids: List[str] = Field(..., min_length=1, max_length=5000)
+
+
+class QuoteBreakdown(BaseModel):
+    nights: int
+    lodging: float
+    events: float
+    addons: float
+    markup: float
+    tax: float
+    total: float
+
+
+class PackageQuote(QuoteBreakdown):
+    package_id: str
+
+
+class QuoteResponse(BaseModel):
+    quotes: List[PackageQuote]
+    missing: List[str] = []
+
+
+class SuggestRequest(BaseModel):
+    city: str
+    date_from: date
+    date_to: date
+    budget: float = Field(..., gt=0)
+    tags: List[str] = []
+    k: int = Field(default=5, ge=1, le=20)
+    max_events: int = Field(default=3, ge=1, le=6)
+
+
+class PackageSuggestion(BaseModel):
+    score: int
+    events: List[EventOut]
+    lodging: Optional[LodgingOut] = None
+    quote: QuoteBreakdown
+
+
+class SuggestResponse(BaseModel):
+    suggestions: List[PackageSuggestion]
 
 
 class BookingCreate(BaseModel):
@@ -52,14 +173,14 @@ class BookingCreate(BaseModel):
 
 
 class BookingOut(BaseModel):
-    id: str
+    id: UUID
     status: str
     package_id: str
     user_id: str
+    payment_reference: Optional[str] = None
     created_at: Optional[datetime]
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class MessageCreate(BaseModel):
@@ -71,7 +192,7 @@ class MessageCreate(BaseModel):
 
 
 class MessageOut(BaseModel):
-    id: str
+    id: UUID
     sender_id: str
     receiver_id: str
     package_id: Optional[str]
@@ -79,5 +200,9 @@ class MessageOut(BaseModel):
     attachment_url: Optional[str] = None
     created_at: Optional[datetime]
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MessagePage(BaseModel):
+    items: List[MessageOut]
+    next_cursor: Optional[str] = None
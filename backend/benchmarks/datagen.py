@@ -0,0 +1,230 @@
+"""Bulk-load a synthetic PartyWKND catalog for benchmarking.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.datagen --events 1000000 --packages 100000 --messages 10000000
+
+Rows are generated in batches and written with COPY on Postgres (asyncpg) or
+executemany elsewhere, so memory stays flat at any volume. Generation is
+deterministic for a given --seed; ids are "<kind>-<n>", except bookings and messages
+whose UUIDv7 keys are drawn from the seed at their created_at, so reruns with the
+same volumes are idempotent only on an empty database.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterator, List
+
+import orjson
+from sqlalchemy import JSON, insert
+
+from app.core import geo
+from app.core.ids import uuid7
+from app.db.availability import rebuild_availability
+from app.db.session import SessionLocal, engine
+from app.models.base import Base
+from app.models.models import Booking, Event, Lodging, Message, Package, User, event_tags, package_events
+
+CITIES = [
+    "Los Angeles", "New York", "Miami", "Austin", "Chicago", "Las Vegas", "Nashville",
+    "New Orleans", "Denver", "Seattle", "San Francisco", "Atlanta", "Boston", "Portland",
+]
+CITY_CENTERS = {
+    "Los Angeles": (34.05, -118.24), "New York": (40.71, -74.01), "Miami": (25.76, -80.19),
+    "Austin": (30.27, -97.74), "Chicago": (41.88, -87.63), "Las Vegas": (36.17, -115.14),
+    "Nashville": (36.16, -86.78), "New Orleans": (29.95, -90.07), "Denver": (39.74, -104.99),
+    "Seattle": (47.61, -122.33), "San Francisco": (37.77, -122.42), "Atlanta": (33.75, -84.39),
+    "Boston": (42.36, -71.06), "Portland": (45.52, -122.68),
+}
+# Points are spread up to this many degrees (~15 km) from the city center
+CITY_SPREAD_DEGREES = 0.15
+TAGS = [
+    "live-music", "rooftop", "vip", "comedy", "downtown", "brunch", "club", "jazz",
+    "outdoor", "festival", "sports", "food", "wine", "dance", "art", "late-night",
+]
+START_DATE = date(2026, 1, 2)
+
+
+def _batches(rows: Iterator[tuple], size: int) -> Iterator[List[tuple]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def users(rng: random.Random, n: int) -> Iterator[tuple]:
+    for i in range(n):
+        yield (f"user-{i}", f"User {i}", f"user-{i}@example.com", True)
+
+
+def _event_tags(seed: int, i: int) -> List[str]:
+    # Seeded per event so events() and event_tag_links() agree without holding tags in memory
+    tag_rng = random.Random(seed * 1_000_003 + i)
+    return tag_rng.sample(TAGS, tag_rng.randint(1, 4))
+
+
+def _point(rng: random.Random, city: str) -> tuple:
+    """(latitude, longitude, geohash) somewhere around ``city``."""
+    center_lat, center_lon = CITY_CENTERS[city]
+    latitude = round(center_lat + rng.uniform(-CITY_SPREAD_DEGREES, CITY_SPREAD_DEGREES), 6)
+    longitude = round(center_lon + rng.uniform(-CITY_SPREAD_DEGREES, CITY_SPREAD_DEGREES), 6)
+    return latitude, longitude, geo.encode(latitude, longitude)
+
+
+def events(rng: random.Random, n: int, seed: int) -> Iterator[tuple]:
+    for i in range(n):
+        city = rng.choice(CITIES)
+        yield (
+            f"event-{i}",
+            f"Event {i}",
+            city,
+            f"Venue {rng.randrange(2000)}",
+            START_DATE + timedelta(days=rng.randrange(365)),
+            round(rng.uniform(10, 400), 2),
+            _event_tags(seed, i),
+            *_point(rng, city),
+        )
+
+
+def event_tag_links(n: int, seed: int) -> Iterator[tuple]:
+    for i in range(n):
+        for tag in _event_tags(seed, i):
+            yield (tag, f"event-{i}")
+
+
+def lodgings(rng: random.Random, n: int) -> Iterator[tuple]:
+    for i in range(n):
+        city = rng.choice(CITIES)
+        yield (f"lodging-{i}", f"Lodging {i}", city, round(rng.uniform(60, 900), 2), *_point(rng, city))
+
+
+def packages(rng: random.Random, n: int, n_lodgings: int) -> Iterator[tuple]:
+    now = datetime.now(timezone.utc)
+    for i in range(n):
+        lodging_id = f"lodging-{rng.randrange(n_lodgings)}" if n_lodgings else None
+        yield (f"package-{i}", lodging_id, rng.choice(["draft", "active"]), None, now, None, None, 1)
+
+
+def package_event_links(rng: random.Random, n_packages: int, n_events: int) -> Iterator[tuple]:
+    for i in range(n_packages):
+        for event_index in rng.sample(range(n_events), min(n_events, rng.randint(1, 4))):
+            yield (f"package-{i}", f"event-{event_index}")
+
+
+def bookings(rng: random.Random, n: int, n_packages: int, n_users: int) -> Iterator[tuple]:
+    now = datetime.now(timezone.utc)
+    for i in range(n):
+        created_at = now - timedelta(seconds=rng.randrange(86400 * 180))
+        yield (
+            uuid7(created_at, rng.getrandbits(80)),
+            f"package-{rng.randrange(n_packages)}",
+            f"user-{rng.randrange(n_users)}",
+            "tok_synthetic",
+            "confirmed",
+            f"ch_synthetic_{i}",
+            created_at,
+        )
+
+
+def messages(rng: random.Random, n: int, n_users: int) -> Iterator[tuple]:
+    start = datetime.now(timezone.utc) - timedelta(days=180)
+    # Conversations cluster on a small set of peers per user, like real threads
+    for i in range(n):
+        sender = rng.randrange(n_users)
+        receiver = (sender + rng.randint(1, 8)) % n_users
+        created_at = start + timedelta(seconds=i * 180 * 86400 // max(n, 1))
+        yield (
+            uuid7(created_at, rng.getrandbits(80)),
+            f"user-{sender}",
+            f"user-{receiver}",
+            None,
+            f"Synthetic message {i}",
+            None,
+            created_at,
+        )
+
+
+def _encode_json(row: tuple, positions: List[int]) -> tuple:
+    values = list(row)
+    for i in positions:
+        if values[i] is not None:
+            values[i] = orjson.dumps(values[i]).decode()
+    return tuple(values)
+
+
+async def _copy(table, rows: Iterator[tuple], batch_size: int) -> int:
+    columns = [column.name for column in table.columns]
+    written = 0
+    async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            raw = (await conn.get_raw_connection()).driver_connection
+            # COPY skips the JSON bind processor; asyncpg wants json columns as text
+            json_columns = [i for i, column in enumerate(table.columns) if isinstance(column.type, JSON)]
+            if json_columns:
+                rows = (_encode_json(row, json_columns) for row in rows)
+            for batch in _batches(rows, batch_size):
+                await raw.copy_records_to_table(table.name, records=batch, columns=columns)
+                written += len(batch)
+        else:
+            for batch in _batches(rows, batch_size):
+                await conn.execute(insert(table), [dict(zip(columns, row)) for row in batch])
+                written += len(batch)
+    return written
+
+
+async def generate(args) -> dict:
+    rng = random.Random(args.seed)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    plan: List[tuple] = [
+        ("users", User.__table__, lambda: users(rng, args.users)),
+        ("events", Event.__table__, lambda: events(rng, args.events, args.seed)),
+        ("event_tags", event_tags, lambda: event_tag_links(args.events, args.seed)),
+        ("lodgings", Lodging.__table__, lambda: lodgings(rng, args.lodgings)),
+        ("packages", Package.__table__, lambda: packages(rng, args.packages, args.lodgings)),
+        ("package_events", package_events, lambda: package_event_links(rng, args.packages, args.events)),
+        ("bookings", Booking.__table__, lambda: bookings(rng, args.bookings, args.packages, args.users)),
+        ("messages", Message.__table__, lambda: messages(rng, args.messages, args.users)),
+    ]
+    report = {}
+    for name, table, rows in plan:
+        started = time.perf_counter()
+        written = await _copy(table, rows(), args.batch_size)
+        elapsed = time.perf_counter() - started
+        report[name] = {
+            "rows": written,
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(written / elapsed) if elapsed else None,
+        }
+        print(f"{name}: {written} rows in {elapsed:.1f}s", flush=True)
+    # COPY bypasses the admin write paths that keep the rollups current
+    started = time.perf_counter()
+    async with SessionLocal() as db:
+        rollups = await rebuild_availability(db)
+    report["availability"] = {"rows": rollups, "seconds": round(time.perf_counter() - started, 3)}
+    print(f"availability rollups rebuilt in {report['availability']['seconds']:.1f}s", flush=True)
+    await engine.dispose()
+    return report
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--lodgings", type=int, default=10_000)
+    parser.add_argument("--packages", type=int, default=10_000)
+    parser.add_argument("--bookings", type=int, default=10_000)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser
+
+
+if __name__ == "__main__":
+    asyncio.run(generate(_parser().parse_args()))
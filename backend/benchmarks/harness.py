@@ -0,0 +1,281 @@
+"""In-process ASGI load harness: p50/p95/p99 latency and requests/sec per router.
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.datagen --events 20000
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.harness --requests 2000 --output bench.json
+
+Requests go straight into app.main.app through httpx's ASGI transport, so the
+numbers cover routing, validation, the handlers and the database, not the network.
+Results are JSON keyed by scenario; compare two runs with --baseline. Scenarios that
+need a caller sign tokens with SUPABASE_JWT_SECRET, or run with ALLOW_NO_AUTH.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import random
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import jwt
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.models.models import Event, Lodging, Package, User
+from benchmarks.stats import emit, summarize
+
+API = settings.api_prefix
+
+
+@functools.lru_cache(maxsize=None)
+def bearer(sub: str, role: Optional[str] = None) -> Dict[str, str]:
+    """Authorization header for ``sub``, an HS256 token as Supabase issues them. Without
+    SUPABASE_JWT_SECRET any token will do, provided the app runs with ALLOW_NO_AUTH."""
+    if not settings.supabase_jwt_secret:
+        return {"Authorization": "Bearer dev"}
+    claims = {"sub": sub, "exp": int(time.time()) + 24 * 3600}
+    if settings.supabase_jwt_audience:
+        claims["aud"] = settings.supabase_jwt_audience
+    if role is not None:
+        claims["user_role"] = role
+    return {"Authorization": "Bearer " + jwt.encode(claims, settings.supabase_jwt_secret, algorithm="HS256")}
+
+
+class Fixtures:
+    """Ids sampled from the database so requests hit real rows."""
+
+    def __init__(self, events: List[Event], lodgings: List[str], packages: List[str], users: List[str]):
+        self.events = events
+        self.lodgings = lodgings or ["bench-lodging"]
+        self.packages = packages or ["bench-package"]
+        self.users = users or ["bench-user-0", "bench-user-1"]
+
+    @classmethod
+    async def load(cls, sample: int) -> "Fixtures":
+        async with SessionLocal() as db:
+            events = (await db.execute(select(Event).limit(sample))).scalars().all()
+            lodgings = (await db.execute(select(Lodging.id).limit(sample))).scalars().all()
+            packages = (await db.execute(select(Package.id).limit(sample))).scalars().all()
+            users = (await db.execute(select(User.id).limit(sample))).scalars().all()
+        return cls(list(events), list(lodgings), list(packages), list(users))
+
+
+Scenario = Callable[[httpx.AsyncClient, random.Random, Fixtures], Awaitable[httpx.Response]]
+
+
+async def events_list(client, rng, fx):
+    params = {"limit": 50}
+    if fx.events:
+        params["city"] = rng.choice(fx.events).city
+    return await client.get(f"{API}/events", params=params)
+
+
+async def events_search(client, rng, fx):
+    params = {"limit": 20}
+    if fx.events:
+        event = rng.choice(fx.events)
+        params["city"] = event.city
+        params["tag"] = (event.tags or [])[:2]
+    return await client.get(f"{API}/events/search", params=params)
+
+
+async def events_availability(client, rng, fx):
+    params = {"date_from": "2026-01-01", "date_to": "2026-03-31"}
+    if fx.events:
+        event = rng.choice(fx.events)
+        params = {
+            "city": event.city,
+            "date_from": event.date.isoformat(),
+            "date_to": (event.date + timedelta(days=rng.choice([7, 30, 90]))).isoformat(),
+        }
+    return await client.get(f"{API}/events/availability", params=params)
+
+
+async def lodgings_near(client, rng, fx):
+    params = {"event_id": rng.choice(fx.events).id, "radius_km": rng.choice([1, 5, 20])}
+    return await client.get(f"{API}/lodgings/near", params=params)
+
+
+async def packages_get(client, rng, fx):
+    return await client.get(f"{API}/packages/{rng.choice(fx.packages)}")
+
+
+async def packages_put(client, rng, fx):
+    event_ids = [e.id for e in rng.sample(fx.events, min(3, len(fx.events)))]
+    payload = {"lodging_id": None, "event_ids": event_ids}
+    return await client.put(f"{API}/packages/{rng.choice(fx.packages)}", json=payload)
+
+
+async def packages_patch(client, rng, fx):
+    # No If-Match: measures the edit path, not how often concurrent edits collide
+    event_id = rng.choice(fx.events).id
+    payload = {"add_event_ids": [event_id]} if rng.random() < 0.5 else {"remove_event_ids": [event_id]}
+    return await client.patch(f"{API}/packages/{rng.choice(fx.packages)}", json=payload)
+
+
+async def packages_quotes(client, rng, fx):
+    package_ids = rng.sample(fx.packages, min(100, len(fx.packages)))
+    return await client.post(f"{API}/packages/quotes", json={"package_ids": package_ids})
+
+
+async def packages_suggest(client, rng, fx):
+    event = rng.choice(fx.events)
+    payload = {
+        "city": event.city,
+        "date_from": event.date.isoformat(),
+        "date_to": (event.date + timedelta(days=2)).isoformat(),
+        "budget": rng.choice([300, 600, 1200]),
+        "tags": (event.tags or [])[:2],
+    }
+    return await client.post(f"{API}/packages/suggest", json=payload)
+
+
+async def bookings_post(client, rng, fx):
+    payload = {
+        "package_id": rng.choice(fx.packages),
+        "user_id": rng.choice(fx.users),
+        "payment_token": "tok_bench",
+    }
+    return await client.post(f"{API}/bookings", json=payload)
+
+
+async def messages_post(client, rng, fx):
+    sender, receiver = rng.choice(fx.users), rng.choice(fx.users)
+    payload = {"sender_id": sender, "receiver_id": receiver, "package_id": None, "message_text": "bench"}
+    return await client.post(f"{API}/messages", json=payload)
+
+
+async def messages_thread(client, rng, fx):
+    # Threads are the caller's, so the reader comes from the token
+    peer = rng.choice(fx.users)
+    return await client.get(f"{API}/messages/threads/{peer}", headers=bearer(rng.choice(fx.users)))
+
+
+async def admin_create_event(client, rng, fx):
+    payload = {
+        "title": "Bench event",
+        "city": "Benchville",
+        "venue": "Bench Hall",
+        "date": "2026-06-06",
+        "tags": ["bench"],
+        "price": round(rng.uniform(10, 200), 2),
+    }
+    return await client.post(f"{API}/admin/events", json=payload, headers=bearer("bench-admin", "admin"))
+
+
+async def edge_change_request(client, rng, fx):
+    package_id = rng.choice(fx.packages)
+    return await client.post(f"{API}/packages/{package_id}/change-request", json={"notes": "bench"})
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "events.list": events_list,
+    "events.search": events_search,
+    "events.availability": events_availability,
+    "lodgings.near": lodgings_near,
+    "packages.get": packages_get,
+    "packages.put": packages_put,
+    "packages.patch": packages_patch,
+    "packages.quotes": packages_quotes,
+    "packages.suggest": packages_suggest,
+    "bookings.create": bookings_post,
+    "messages.send": messages_post,
+    "messages.thread": messages_thread,
+    "admin.create_event": admin_create_event,
+    "edge.change_request": edge_change_request,
+}
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, fx: Fixtures, requests: int, concurrency: int, seed: int
+) -> dict:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    remaining = iter(range(requests))
+
+    async def worker(worker_id: int):
+        rng = random.Random(seed * 1000 + worker_id)
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await scenario(client, rng, fx)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    result = summarize(latencies, time.perf_counter() - started)
+    result["status_codes"] = {str(code): count for code, count in sorted(statuses.items())}
+    return result
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict) -> dict:
+    """Relative change per scenario; >1.0 means slower (latency) or faster (rps)."""
+    changes = {}
+    for name, result in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        changes[name] = {
+            key: result[key] / before[key] if before[key] else None
+            for key in ("p50_ms", "p95_ms", "p99_ms", "rps")
+        }
+    return changes
+
+
+async def main(args):
+    selected = args.scenario or list(SCENARIOS)
+    async with app.router.lifespan_context(app):
+        fx = await Fixtures.load(args.sample)
+        # Count server errors as 5xx responses instead of aborting the run
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name in selected:
+                # Warm caches and connections before measuring
+                await run_scenario(client, SCENARIOS[name], fx, args.warmup, args.concurrency, args.seed)
+            results = {
+                name: await run_scenario(client, SCENARIOS[name], fx, args.requests, args.concurrency, args.seed)
+                for name in selected
+            }
+
+    report = {
+        "revision": _git_revision(),
+        "database": engine.dialect.name,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "scenarios": results,
+    }
+    if args.baseline:
+        with open(args.baseline) as fh:
+            report["vs_baseline"] = compare(report, json.load(fh))
+    emit(report, args.output)
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--sample", type=int, default=1000, help="ids sampled from each table")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", help="earlier JSON result to compare against")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    return parser
+
+
+if __name__ == "__main__":
+    asyncio.run(main(_parser().parse_args()))
@@ -0,0 +1,128 @@
+"""Compare random uuid4 text keys with UUIDv7 native keys as a table grows.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.keys --rows 10000000
+
+Two scratch tables shaped like messages, one keyed by str(uuid4()) in a varchar
+column and one by app.core.ids.uuid7 in a native uuid column (CHAR(32) on
+SQLite), are filled one after the other in --batch-size transactions. Every --report-every
+rows it records each table's insert rate over the last interval and the size of its
+primary key index, so the slowdown of random inserts shows up as the index outgrows
+memory. The tables are dropped at the end unless --keep is given.
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+from uuid import uuid4
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Uuid, insert, text
+
+from app.core.ids import uuid7
+from app.db.session import engine
+from benchmarks.stats import emit
+
+metadata = MetaData()
+
+VARIANTS: Dict[str, tuple] = {
+    "uuid4_text": (
+        Table(
+            "bench_keys_uuid4_text",
+            metadata,
+            Column("id", String, primary_key=True),
+            Column("sender_id", String, nullable=False),
+            Column("created_at", DateTime(timezone=True), nullable=False),
+        ),
+        lambda: str(uuid4()),
+    ),
+    "uuid7_native": (
+        Table(
+            "bench_keys_uuid7_native",
+            metadata,
+            Column("id", Uuid(as_uuid=True), primary_key=True),
+            Column("sender_id", String, nullable=False),
+            Column("created_at", DateTime(timezone=True), nullable=False),
+        ),
+        uuid7,
+    ),
+}
+
+
+async def _index_bytes(conn, table: Table) -> Optional[int]:
+    if conn.dialect.name == "postgresql":
+        return (await conn.execute(text(f"SELECT pg_relation_size('{table.name}_pkey')"))).scalar()
+    try:
+        # dbstat is compiled into most SQLite builds, but not all
+        return (
+            await conn.execute(
+                text("SELECT SUM(pgsize) FROM dbstat WHERE name LIKE :name"),
+                {"name": f"sqlite_autoindex_{table.name}%"},
+            )
+        ).scalar()
+    except Exception:
+        return None
+
+
+async def _fill(table: Table, new_id: Callable, rows: int, batch_size: int, report_every: int) -> list:
+    checkpoints = []
+    written = 0
+    interval_started = time.perf_counter()
+    interval_rows = 0
+    while written < rows:
+        size = min(batch_size, rows - written)
+        now = datetime.now(timezone.utc)
+        batch = [
+            {"id": new_id(), "sender_id": f"user-{(written + i) % 10_000}", "created_at": now} for i in range(size)
+        ]
+        async with engine.begin() as conn:
+            await conn.execute(insert(table), batch)
+        written += size
+        interval_rows += size
+        if written % report_every < batch_size or written == rows:
+            elapsed = time.perf_counter() - interval_started
+            async with engine.connect() as conn:
+                index_bytes = await _index_bytes(conn, table)
+            checkpoints.append(
+                {
+                    "rows": written,
+                    "rows_per_second": round(interval_rows / elapsed, 1) if elapsed else None,
+                    "pk_index_bytes": index_bytes,
+                    "pk_bytes_per_row": round(index_bytes / written, 2) if index_bytes else None,
+                }
+            )
+            interval_started, interval_rows = time.perf_counter(), 0
+    return checkpoints
+
+
+async def main(args):
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.drop_all)
+        await conn.run_sync(metadata.create_all)
+    results = {"rows": args.rows, "batch_size": args.batch_size, "dialect": engine.dialect.name, "variants": {}}
+    try:
+        for name, (table, new_id) in VARIANTS.items():
+            started = time.perf_counter()
+            checkpoints = await _fill(table, new_id, args.rows, args.batch_size, args.report_every)
+            elapsed = time.perf_counter() - started
+            results["variants"][name] = {
+                "seconds": round(elapsed, 2),
+                "rows_per_second": round(args.rows / elapsed, 1),
+                "checkpoints": checkpoints,
+            }
+    finally:
+        if not args.keep:
+            async with engine.begin() as conn:
+                await conn.run_sync(metadata.drop_all)
+        await engine.dispose()
+    emit(results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--report-every", type=int, default=1_000_000)
+    parser.add_argument("--keep", action="store_true", help="leave the scratch tables in place")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    asyncio.run(main(parser.parse_args()))
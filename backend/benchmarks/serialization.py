@@ -0,0 +1,106 @@
+"""Compare the ORM + pydantic response path with row dicts + orjson.
+
+    python -m benchmarks.serialization --sizes 1 100 10000
+
+Runs against a private in-memory SQLite database, so no DATABASE_URL is needed.
+"query+encode" covers fetching the page and producing the response body, the way
+GET /api/events did before and does now; "encode" times only the body encoding of
+already-loaded rows.
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import date, timedelta
+from typing import Awaitable, Callable, List
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.serialization import RowSerializer, dumps
+from app.models.base import Base
+from app.models.models import Event
+from app.schemas.models import EventOut, EventPage
+from benchmarks.stats import emit, summarize
+
+event_rows = RowSerializer(EventOut)
+
+
+async def orm_pydantic(db: AsyncSession, size: int) -> bytes:
+    events = (await db.execute(select(Event).order_by(Event.id).limit(size))).scalars().all()
+    return EventPage.model_validate({"items": events, "next_cursor": None}).model_dump_json().encode()
+
+
+async def rows_orjson(db: AsyncSession, size: int) -> bytes:
+    stmt = select(*event_rows.columns(Event.__table__.c)).order_by(Event.id).limit(size)
+    return dumps({"items": event_rows.dicts(await db.execute(stmt)), "next_cursor": None})
+
+
+async def _time(fn: Callable[[], Awaitable[bytes]], repeats: int) -> dict:
+    await fn()  # warm-up
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        await fn()
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def main(sizes: List[int], output: str | None):
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        rows = [
+            {
+                "id": f"event-{i:06d}",
+                "title": f"Event {i}",
+                "city": "Miami",
+                "venue": f"Venue {i % 50}",
+                "date": date(2026, 1, 2) + timedelta(days=i % 365),
+                "price": 10 + (i % 390) * 1.25,
+                "tags": ["live-music", "rooftop"][: 1 + i % 2],
+            }
+            for i in range(max(sizes))
+        ]
+        await conn.execute(insert(Event), rows)
+
+    results = {}
+    for size in sizes:
+        repeats = max(5, min(500, 20_000 // size))
+        async with Session() as db:
+            assert await orm_pydantic(db, size) == await rows_orjson(db, size), "bodies differ"
+            loaded = (await db.execute(select(Event).order_by(Event.id).limit(size))).scalars().all()
+            plain = event_rows.dicts(
+                await db.execute(select(*event_rows.columns(Event.__table__.c)).order_by(Event.id).limit(size))
+            )
+
+            async def encode_pydantic():
+                return EventPage.model_validate({"items": loaded, "next_cursor": None}).model_dump_json()
+
+            async def encode_orjson():
+                return dumps({"items": plain, "next_cursor": None})
+
+            results[str(size)] = {
+                "query+encode": {
+                    "orm+pydantic": await _time(lambda: orm_pydantic(db, size), repeats),
+                    "rows+orjson": await _time(lambda: rows_orjson(db, size), repeats),
+                },
+                "encode": {
+                    "orm+pydantic": await _time(encode_pydantic, repeats),
+                    "rows+orjson": await _time(encode_orjson, repeats),
+                },
+            }
+            db.expunge_all()
+    await engine.dispose()
+    emit(results, output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10_000])
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.output))
@@ -0,0 +1,121 @@
+"""Compare the ORM write paths for bookings/messages with the set-based ones.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.write_paths --requests 5000 --concurrency 32
+
+Both variants run against the same database; each request is its own transaction.
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.core.ids import uuid7
+from app.db.session import SessionLocal, engine
+from app.models.base import Base
+from app.models.models import Booking, Message, Package, User
+from app.routers.bookings import create_booking
+from app.routers.messages import send_message
+from app.schemas.models import BookingCreate, MessageCreate
+from benchmarks.stats import emit, summarize
+
+PACKAGE_ID = "bench-write-package"
+
+
+async def _legacy_ensure_user(db, user_id):
+    user = await db.get(User, user_id)
+    if not user:
+        db.add(User(id=user_id, name=f"User {user_id}", email=f"{user_id}@example.com"))
+
+
+async def legacy_booking(db, payload: BookingCreate):
+    await db.get(Package, payload.package_id)
+    await _legacy_ensure_user(db, payload.user_id)
+    booking = Booking(
+        id=uuid7(),
+        package_id=payload.package_id,
+        user_id=payload.user_id,
+        payment_token=payload.payment_token,
+        status="confirmed",
+    )
+    db.add(booking)
+    await db.flush()
+    await db.refresh(booking)
+
+
+async def legacy_message(db, payload: MessageCreate):
+    await _legacy_ensure_user(db, payload.sender_id)
+    await _legacy_ensure_user(db, payload.receiver_id)
+    await db.get(Package, payload.package_id)
+    message = Message(
+        id=uuid7(),
+        sender_id=payload.sender_id,
+        receiver_id=payload.receiver_id,
+        package_id=payload.package_id,
+        message_text=payload.message_text,
+    )
+    db.add(message)
+    await db.flush()
+    await db.refresh(message)
+
+
+def _booking_payload(i: int) -> BookingCreate:
+    return BookingCreate(package_id=PACKAGE_ID, user_id=f"bench-user-{i % 500}", payment_token="tok_bench")
+
+
+def _message_payload(i: int) -> MessageCreate:
+    return MessageCreate(
+        sender_id=f"bench-user-{i % 500}",
+        receiver_id=f"bench-user-{(i + 1) % 500}",
+        package_id=PACKAGE_ID,
+        message_text="benchmark",
+    )
+
+
+async def _run(operation, make_payload, requests: int, concurrency: int) -> dict:
+    latencies = []
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            async with SessionLocal() as db:
+                await operation(make_payload(i), db)
+                await db.commit()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def main(requests: int, concurrency: int, output: str | None):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with SessionLocal() as db:
+        await db.merge(Package(id=PACKAGE_ID, status="active"))
+        await db.commit()
+
+    results = {"database": engine.dialect.name, "requests": requests, "concurrency": concurrency}
+    cases = {
+        "create_booking": (lambda p, db: legacy_booking(db, p), create_booking, _booking_payload),
+        "send_message": (lambda p, db: legacy_message(db, p), send_message, _message_payload),
+    }
+    for name, (legacy, current, make_payload) in cases.items():
+        before = await _run(legacy, make_payload, requests, concurrency)
+        after = await _run(current, make_payload, requests, concurrency)
+        results[name] = {
+            "orm": before,
+            "set_based": after,
+            "rps_change": after["rps"] / before["rps"] if before["rps"] else None,
+        }
+    await engine.dispose()
+    emit(results, output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.output))
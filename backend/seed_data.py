@@ -1,15 +1,20 @@
+import asyncio
 import datetime
 
+from app.core import geo
+from app.db.availability import rebuild_availability
+from app.db.search import replace_event_tags
 from app.db.session import SessionLocal, engine
 from app.models.base import Base
 from app.models.models import Event, Lodging, Package
 
 
-def seed():
+async def seed():
     """
     Minimal seed to make discovery pages non-empty.
     """
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
     db = SessionLocal()
 
     events = [
@@ -21,8 +26,9 @@ def seed():
             date=datetime.date(2025, 12, 24),
             price=120.0,
             tags=["live-music", "rooftop", "vip"],
-            source="seed",
-            external_url="https://example.com/events/skyline",
+            latitude=34.0407,
+            longitude=-118.2468,
+            geohash=geo.encode(34.0407, -118.2468),
         ),
         Event(
             id="event-comedy",
@@ -32,8 +38,9 @@ def seed():
             date=datetime.date(2025, 12, 25),
             price=75.0,
             tags=["comedy", "downtown"],
-            source="seed",
-            external_url="https://example.com/events/comedy",
+            latitude=40.7290,
+            longitude=-73.9990,
+            geohash=geo.encode(40.7290, -73.9990),
         ),
     ]
 
@@ -43,37 +50,42 @@ def seed():
             name="City Hotel",
             location="New York",
             price=220.0,
-            source="seed",
-            external_url="https://example.com/lodgings/city-hotel",
+            latitude=40.7128,
+            longitude=-74.0060,
+            geohash=geo.encode(40.7128, -74.0060),
         ),
         Lodging(
             id="lodging-02",
             name="Beach Bungalow",
             location="Los Angeles",
             price=320.0,
-            source="seed",
-            external_url="https://example.com/lodgings/beach-bungalow",
+            latitude=33.9850,
+            longitude=-118.4695,
+            geohash=geo.encode(33.9850, -118.4695),
         ),
     ]
 
-    for event in events:
-        db.merge(event)
-    for lodging in lodgings:
-        db.merge(lodging)
-
-    pkg = Package(
-        id="package-demo",
-        lodging_id=lodgings[0].id,
-        status="active",
-        total_price=499.0,
-        markup_percentage=0.15,
+    events = [await db.merge(event) for event in events]
+    lodgings = [await db.merge(lodging) for lodging in lodgings]
+    pkg = await db.merge(
+        Package(
+            id="package-demo",
+            lodging_id=lodgings[0].id,
+            status="active",
+        )
     )
+    # SessionLocal does not autoflush; flush so the events collection can be loaded
+    await db.flush()
+    await db.refresh(pkg, ["events"])
     pkg.events = events
-    db.merge(pkg)
 
-    db.commit()
-    db.close()
+    await replace_event_tags(db, [{"id": event.id, "tags": event.tags} for event in events])
+
+    await db.commit()
+    await rebuild_availability(db)
+    await db.close()
+    await engine.dispose()
 
 
 if __name__ == "__main__":
-    seed()
+    asyncio.run(seed())
@@ -0,0 +1,124 @@
+"""Shared fixtures: the app on a scratch SQLite database through aiosqlite.
+
+Settings are read at import, so the environment is fixed here before anything
+imports the app. Each test starts from empty tables and empty in-memory caches.
+"""
+import os
+import tempfile
+import time
+from datetime import date
+
+_scratch = tempfile.mkdtemp(prefix="partywknd-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_scratch}/primary.db",
+    DATABASE_REPLICA_URLS="",
+    DB_CREATE_ALL="true",
+    ENFORCE_QUERY_BUDGETS="true",
+    OUTBOX_WORKERS="0",
+    PAYMENTS_LATENCY_MS="0",
+    SUPABASE_JWKS_URL="",
+    PROFILING_ENABLED="false",
+    ADMISSION_ENABLED="false",
+    CATALOG_CACHE_BACKEND="local",
+    PUBSUB_BACKEND="local",
+)
+os.environ.setdefault("SUPABASE_JWT_SECRET", "devsecret")
+
+import httpx  # noqa: E402
+import jwt  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.auth.supabase_jwt import token_cache  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.db.catalog import catalog_cache, page_cache  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.models import Event, Lodging, Package, User, package_events  # noqa: E402
+
+API = settings.api_prefix
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _enforce_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores foreign keys unless asked; Postgres always enforces them
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def scratch_dir() -> str:
+    return _scratch
+
+
+@pytest.fixture
+def make_token():
+    """HS256 tokens signed with SUPABASE_JWT_SECRET, as Supabase issues them."""
+
+    def make(sub: str, role: str | None = None, ttl: float = 3600, **claims) -> str:
+        payload = {"sub": sub, "aud": settings.supabase_jwt_audience, "exp": int(time.time() + ttl), **claims}
+        if role is not None:
+            payload["user_role"] = role
+        return jwt.encode(payload, settings.supabase_jwt_secret, algorithm="HS256")
+
+    return make
+
+
+@pytest.fixture
+def admin(make_token) -> dict:
+    """Headers for a caller with the admin role."""
+    return {"Authorization": f"Bearer {make_token('root', role='admin')}"}
+
+
+@pytest.fixture
+async def client():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    catalog_cache.clear()
+    page_cache.clear()
+    token_cache.clear()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            yield http
+
+
+@pytest.fixture
+async def catalog(client):
+    """Two users, three events in one city, two lodgings and a package over two of the events."""
+    async with SessionLocal() as db:
+        db.add_all(
+            [
+                User(id="alice", name="Alice", email="alice@example.com"),
+                User(id="bob", name="Bob", email="bob@example.com"),
+                Lodging(id="lodging-1", name="City Hotel", location="Austin", price=200.0),
+                Lodging(id="lodging-2", name="Hostel", location="Austin", price=60.0),
+            ]
+        )
+        for i in range(3):
+            db.add(
+                Event(
+                    id=f"event-{i}",
+                    title=f"Show {i}",
+                    city="Austin",
+                    venue="Hall",
+                    date=date(2026, 5, 1 + i),
+                    price=20.0 + i,
+                    tags=["music"],
+                )
+            )
+        db.add(Package(id="package-1", lodging_id="lodging-1", status="active"))
+        await db.flush()
+        await db.execute(
+            package_events.insert(),
+            [{"package_id": "package-1", "event_id": event_id} for event_id in ("event-0", "event-1")],
+        )
+        await db.commit()
+    return {"package": "package-1", "events": ["event-0", "event-1", "event-2"], "users": ["alice", "bob"]}
@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from tests.conftest import API
+
+pytestmark = pytest.mark.anyio
+
+EVENT = {"title": "Jazz night", "city": "Austin", "venue": "Hall", "date": "2026-05-01", "price": 20}
+
+
+async def _search_ids(client, tag: str) -> list:
+    response = await client.get(f"{API}/events/search", params={"tag": tag})
+    return [event["id"] for event in response.json()["items"]]
+
+
+async def test_foreign_keys_are_enforced(client):
+    async with SessionLocal() as db:
+        assert (await db.execute(text("PRAGMA foreign_keys"))).scalar_one() == 1
+
+
+async def test_create_tagged_event(client, admin):
+    payload = {**EVENT, "id": "jazz", "tags": ["Music", "jazz"]}
+    response = await client.post(f"{API}/admin/events", json=payload, headers=admin)
+    assert response.status_code == 200
+    assert response.json()["id"] == "jazz"
+    assert await _search_ids(client, "music") == ["jazz"]
+
+    # Retagging an existing event replaces its tags
+    payload["tags"] = ["late"]
+    assert (await client.post(f"{API}/admin/events", json=payload, headers=admin)).status_code == 200
+    assert await _search_ids(client, "late") == ["jazz"]
+    assert await _search_ids(client, "music") == []
+
+
+async def test_create_event_generates_an_id(client, admin):
+    response = await client.post(f"{API}/admin/events", json={**EVENT, "tags": ["music"]}, headers=admin)
+    assert response.status_code == 200
+    assert response.json()["id"]
+
+
+async def test_create_lodging(client, admin):
+    payload = {"id": "inn", "name": "Inn", "location": "Austin", "price": 90}
+    response = await client.post(f"{API}/admin/lodgings", json=payload, headers=admin)
+    assert response.status_code == 200
+    assert response.json()["price"] == 90
+    response = await client.post(f"{API}/admin/lodgings", json={**payload, "price": 95}, headers=admin)
+    assert response.json()["price"] == 95
@@ -0,0 +1,47 @@
+import os
+
+import httpx
+import pytest
+
+from app.core.admission import AdmissionMiddleware, LocalBucketStore, SQLiteBucketStore
+
+pytestmark = pytest.mark.anyio
+
+
+async def ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _admission(store) -> AdmissionMiddleware:
+    return AdmissionMiddleware(
+        ok,
+        groups={"events": "/api/events"},
+        api_prefix="/api",
+        store=store,
+        rate=0.001,
+        burst=2,
+        group_limits={},
+        max_pool_waiters=10,
+        max_pool_wait_ms=1000,
+    )
+
+
+@pytest.fixture(params=["local", "sqlite"])
+def store(request, scratch_dir):
+    if request.param == "local":
+        return LocalBucketStore()
+    path = os.path.join(scratch_dir, "admission.sqlite")
+    if os.path.exists(path):
+        os.remove(path)
+    return SQLiteBucketStore(path)
+
+
+async def test_rate_limit(store):
+    transport = httpx.ASGITransport(app=_admission(store))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        assert [(await http.get("/api/events")).status_code for _ in range(3)] == [200, 200, 429]
+        assert (await http.get("/api")).status_code == 429
+        # Outside the API prefix, even when it shares its leading characters
+        assert (await http.get("/apidocs")).status_code == 200
+        assert (await http.get("/health")).status_code == 200
@@ -0,0 +1,163 @@
+"""Token verification: the verified-token cache and JWKS keys from a local stand-in."""
+import asyncio
+import json
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+from jwt.utils import base64url_encode
+
+from app.auth import supabase_jwt
+from app.auth.supabase_jwt import (
+    AuthError,
+    JWKSKeySet,
+    VerifiedTokenCache,
+    decode_supabase_jwt,
+    token_cache,
+    verify_token,
+)
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+class LocalJWKS:
+    """Stands in for the provider's JWKS endpoint; counts fetches and can be slowed down."""
+
+    def __init__(self):
+        self.private_keys = {}
+        self.published = []
+        self.fetches = 0
+        self.delay = 0.0
+
+    def rotate_in(self, kid: str):
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.private_keys[kid] = key
+        self.published.append({**RSAAlgorithm.to_jwk(key.public_key(), as_dict=True), "kid": kid, "alg": "RS256"})
+
+    def retire(self, kid: str):
+        self.published = [key for key in self.published if key["kid"] != kid]
+
+    def __call__(self, url: str) -> dict:
+        self.fetches += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return {"keys": list(self.published)}
+
+    def token(self, kid: str, sub: str = "user-1", ttl: float = 3600) -> str:
+        claims = {"sub": sub, "aud": settings.supabase_jwt_audience, "exp": int(time.time() + ttl)}
+        return jwt.encode(claims, self.private_keys[kid], algorithm="RS256", headers={"kid": kid})
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    stand_in = LocalJWKS()
+    stand_in.rotate_in("key-1")
+    key_set = JWKSKeySet("https://auth.invalid/jwks", ttl=600, fetcher=stand_in)
+    key_set.refresh()
+    monkeypatch.setattr(supabase_jwt, "jwks", key_set)
+    token_cache.clear()
+    yield stand_in
+    token_cache.clear()
+
+
+def test_cache_hit_and_miss():
+    cache = VerifiedTokenCache(maxsize=2)
+    claims = {"sub": "a", "exp": time.time() + 60}
+    assert cache.get("token-a") is None
+    cache.put("token-a", claims)
+    assert cache.get("token-a") == claims
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_cache_is_bounded():
+    cache = VerifiedTokenCache(maxsize=2)
+    for name in ("a", "b", "c"):
+        cache.put(name, {"sub": name, "exp": time.time() + 60})
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+
+
+def test_cache_drops_entry_at_exp(monkeypatch):
+    cache = VerifiedTokenCache(maxsize=10)
+    now = time.time()
+    cache.put("token", {"sub": "a", "exp": now + 5})
+    monkeypatch.setattr(supabase_jwt.time, "time", lambda: now + 4)
+    assert cache.get("token") is not None
+    monkeypatch.setattr(supabase_jwt.time, "time", lambda: now + 5)
+    assert cache.get("token") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_expired_token_is_rejected(make_token):
+    token_cache.clear()
+    with pytest.raises(AuthError) as error:
+        decode_supabase_jwt(make_token("user-1", ttl=-10))
+    assert error.value.status_code == 401
+
+
+def test_verified_token_is_served_from_cache(make_token):
+    token_cache.clear()
+    token = make_token("user-1")
+    decode_supabase_jwt(token)
+    misses = token_cache.stats()["misses"]
+    assert decode_supabase_jwt(token)["sub"] == "user-1"
+    assert token_cache.stats()["misses"] == misses
+
+
+@pytest.mark.parametrize("kid", [["key-1"], {"k": 1}, 7])
+def test_malformed_kid_is_401(provider, kid):
+    # PyJWT will not encode such a header, so assemble the token by hand
+    header = {"alg": "RS256", "typ": "JWT", "kid": kid}
+    claims = {"sub": "u", "aud": settings.supabase_jwt_audience, "exp": int(time.time() + 60)}
+    token = ".".join(base64url_encode(json.dumps(part).encode()).decode() for part in (header, claims)) + ".c2ln"
+    with pytest.raises(AuthError) as error:
+        decode_supabase_jwt(token)
+    assert error.value.status_code == 401
+
+
+async def test_known_key_verifies_without_fetching(provider):
+    fetches = provider.fetches
+    assert (await verify_token(provider.token("key-1")))["sub"] == "user-1"
+    assert provider.fetches == fetches
+
+
+async def test_rotation_is_picked_up_on_first_unknown_kid(provider, monkeypatch):
+    monkeypatch.setattr(supabase_jwt, "JWKS_MIN_REFETCH_SECONDS", 0)
+    provider.rotate_in("key-2")
+    provider.retire("key-1")
+    assert (await verify_token(provider.token("key-2", sub="rotated")))["sub"] == "rotated"
+    with pytest.raises(AuthError):
+        await verify_token(provider.token("key-1"))
+
+
+async def test_unknown_kid_refetches_at_most_once_per_window(provider):
+    # The fixture's initial fetch is inside the window
+    fetches = provider.fetches
+    provider.rotate_in("key-2")
+    for _ in range(5):
+        with pytest.raises(AuthError):
+            await verify_token(provider.token("key-2"))
+    assert provider.fetches == fetches
+
+
+async def test_unknown_kid_fetch_does_not_block_the_event_loop(provider, monkeypatch):
+    monkeypatch.setattr(supabase_jwt, "JWKS_MIN_REFETCH_SECONDS", 0)
+    provider.delay = 0.3
+    provider.rotate_in("key-2")
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticking = asyncio.create_task(ticker())
+    try:
+        assert (await verify_token(provider.token("key-2")))["sub"] == "user-1"
+    finally:
+        ticking.cancel()
+    assert ticks >= 10
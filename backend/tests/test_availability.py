@@ -0,0 +1,122 @@
+import json
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app.db.availability import rebuild_availability
+from app.db.session import SessionLocal
+from app.models.models import availability_cities, availability_day_tags, availability_days
+from tests.conftest import API
+
+pytestmark = pytest.mark.anyio
+
+MAY_1, MAY_2 = date(2026, 5, 1), date(2026, 5, 2)
+
+
+def _event(event_id: str, city: str, day: date, price: float, tags=("music",)) -> dict:
+    return {
+        "id": event_id,
+        "title": event_id,
+        "city": city,
+        "venue": "Hall",
+        "date": day.isoformat(),
+        "price": price,
+        "tags": list(tags),
+    }
+
+
+def _lodging(lodging_id: str, location: str, price: float) -> dict:
+    return {"id": lodging_id, "name": lodging_id, "location": location, "price": price}
+
+
+async def _bulk(client, admin, kind: str, rows: list):
+    body = "\n".join(json.dumps(row) for row in rows)
+    response = await client.post(f"{API}/admin/{kind}:bulk", content=body, headers=admin)
+    assert response.json()["upserted"] == len(rows)
+
+
+async def _rollups() -> dict:
+    async with SessionLocal() as db:
+        return {
+            table.name: sorted(tuple(row) for row in await db.execute(select(table)))
+            for table in (availability_days, availability_day_tags, availability_cities)
+        }
+
+
+async def _assert_matches_rebuild():
+    incremental = await _rollups()
+    async with SessionLocal() as db:
+        await rebuild_availability(db)
+    assert await _rollups() == incremental
+
+
+async def test_new_events_are_added_to_their_days(client, admin):
+    await _bulk(
+        client,
+        admin,
+        "events",
+        [_event("a", "Austin", MAY_1, 30), _event("b", "Austin", MAY_1, 10, ["music", "jazz"])],
+    )
+    await client.post(f"{API}/admin/events", json=_event("c", "Austin", MAY_1, 50, ["jazz"]), headers=admin)
+    rollups = await _rollups()
+    assert rollups["availability_days"] == [("Austin", MAY_1, 3, 10.0, 50.0)]
+    assert rollups["availability_day_tags"] == [("Austin", MAY_1, "jazz", 2), ("Austin", MAY_1, "music", 2)]
+    await _assert_matches_rebuild()
+
+
+async def test_moved_event_recomputes_both_days(client, admin):
+    await _bulk(client, admin, "events", [_event("a", "Austin", MAY_1, 10), _event("b", "Austin", MAY_1, 30)])
+    # The cheapest event leaves May 1 for Denver on May 2
+    await client.post(f"{API}/admin/events", json=_event("a", "Denver", MAY_2, 10, ["late"]), headers=admin)
+    rollups = await _rollups()
+    assert rollups["availability_days"] == [("Austin", MAY_1, 1, 30.0, 30.0), ("Denver", MAY_2, 1, 10.0, 10.0)]
+    assert rollups["availability_day_tags"] == [("Austin", MAY_1, "music", 1), ("Denver", MAY_2, "late", 1)]
+    await _assert_matches_rebuild()
+
+    # Moving the last event out drops the day
+    await client.post(f"{API}/admin/events", json=_event("b", "Denver", MAY_2, 30), headers=admin)
+    assert [row[:3] for row in (await _rollups())["availability_days"]] == [("Denver", MAY_2, 2)]
+    await _assert_matches_rebuild()
+
+
+async def test_price_change_recomputes_the_range(client, admin):
+    await _bulk(client, admin, "events", [_event("a", "Austin", MAY_1, 10), _event("b", "Austin", MAY_1, 30)])
+    await client.post(f"{API}/admin/events", json=_event("a", "Austin", MAY_1, 40), headers=admin)
+    assert (await _rollups())["availability_days"] == [("Austin", MAY_1, 2, 30.0, 40.0)]
+    await _assert_matches_rebuild()
+
+
+async def test_new_event_in_a_recomputed_day_is_counted_once(client, admin):
+    await _bulk(client, admin, "events", [_event("a", "Austin", MAY_1, 10), _event("b", "Austin", MAY_2, 20)])
+    await _bulk(client, admin, "events", [_event("a", "Austin", MAY_2, 10), _event("c", "Austin", MAY_2, 5)])
+    assert (await _rollups())["availability_days"] == [("Austin", MAY_2, 3, 5.0, 20.0)]
+    await _assert_matches_rebuild()
+
+
+async def test_lodging_changes(client, admin):
+    await _bulk(
+        client,
+        admin,
+        "lodgings",
+        [_lodging("l-b", "Austin", 80), _lodging("l-a", "Austin", 80), _lodging("l-c", "Denver", 120)],
+    )
+    # Ties on price go to the lower id
+    assert (await _rollups())["availability_cities"] == [
+        ("Austin", 2, 80.0, 80.0, "l-a"),
+        ("Denver", 1, 120.0, 120.0, "l-c"),
+    ]
+    await _assert_matches_rebuild()
+
+    await client.post(f"{API}/admin/lodgings", json=_lodging("l-b", "Austin", 60), headers=admin)
+    await client.post(f"{API}/admin/lodgings", json=_lodging("l-d", "Austin", 200), headers=admin)
+    assert (await _rollups())["availability_cities"][0] == ("Austin", 3, 60.0, 200.0, "l-b")
+    await _assert_matches_rebuild()
+
+    # The cheapest lodging moves away, and Denver's only lodging leaves with it
+    await _bulk(client, admin, "lodgings", [_lodging("l-b", "Miami", 60), _lodging("l-c", "Miami", 120)])
+    assert (await _rollups())["availability_cities"] == [
+        ("Austin", 2, 80.0, 200.0, "l-a"),
+        ("Miami", 2, 60.0, 120.0, "l-b"),
+    ]
+    await _assert_matches_rebuild()
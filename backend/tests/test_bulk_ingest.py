@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from app.routers.admin import BULK_MAX_LINE_BYTES
+from tests.conftest import API
+
+pytestmark = pytest.mark.anyio
+
+
+def _event(i: int, **fields) -> str:
+    row = {"id": f"bulk-{i}", "title": "t", "city": "Austin", "venue": "v", "date": "2026-05-01", "tags": []}
+    return json.dumps({**row, "price": 10, **fields})
+
+
+async def test_bulk_upsert_reports_invalid_lines(client, admin):
+    body = "\n".join([_event(0), "{not json", _event(1)])
+    response = await client.post(f"{API}/admin/events:bulk", content=body, headers=admin)
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["received"], result["upserted"], result["failed"]) == (3, 2, 1)
+    assert result["errors"][0]["line"] == 2
+
+
+@pytest.mark.parametrize("terminated", [True, False])
+async def test_oversized_line_is_rejected(client, admin, terminated):
+    # A complete line inside a single chunk is checked as well as the trailing partial one
+    huge = _event(1, title="x" * BULK_MAX_LINE_BYTES)
+    body = "\n".join([_event(0), huge, _event(2)]) if terminated else "\n".join([_event(0), huge])
+    response = await client.post(f"{API}/admin/events:bulk", content=body, headers=admin)
+    assert response.status_code == 413
+    assert "Line 2" in response.json()["detail"]
@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+
+import pytest
+
+from app.core.cache import NamespacedCache, SQLiteInvalidation, TTLCache
+from app.db.catalog import EVENTS, invalidate_events
+from app.db.instrumentation import assert_max_queries
+from app.routers import events
+from tests.conftest import API
+
+pytestmark = pytest.mark.anyio
+
+
+def test_entries_are_evicted_by_weight():
+    cache = TTLCache(maxsize=100, ttl=60, maxweight=10, weigh=len)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.set("c", b"1234")
+    assert cache.get("a") is None
+    assert (cache.get("b"), cache.get("c"), cache.weight) == (b"1234", b"1234", 8)
+    cache.set("b", b"12")
+    assert cache.weight == 6
+    # Larger than the whole cache: not stored, and nothing else evicted for it
+    cache.set("d", b"x" * 11)
+    assert (cache.get("d"), len(cache), cache.weight) == (None, 2, 6)
+
+
+def test_entry_stored_under_an_old_generation_misses():
+    cache = NamespacedCache(maxsize=10, ttl=60)
+    generation = cache.generation(EVENTS)
+    cache.invalidate(EVENTS)
+    cache.set(EVENTS, "page", "stale", generation)
+    assert cache.get(EVENTS, "page") is None
+    cache.set(EVENTS, "page", "fresh")
+    assert cache.get(EVENTS, "page") == "fresh"
+
+
+
+def _eventually(check, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not check():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_sqlite_generations_are_shared_between_workers(scratch_dir):
+    path = os.path.join(scratch_dir, "generations-shared.db")
+    first = SQLiteInvalidation(path, poll_interval=0.05)
+    second = SQLiteInvalidation(path, poll_interval=0.05)
+    first.bump(EVENTS)
+    first.bump(EVENTS)
+    # Visible locally at once, and to the other worker by the next poll
+    assert first.generation(EVENTS) == 2
+    assert _eventually(lambda: second.generation(EVENTS) == 2)
+    second.bump(EVENTS)
+    assert _eventually(lambda: first.generation(EVENTS) == 3)
+
+
+def test_sqlite_generations_stay_off_the_calling_thread(scratch_dir, monkeypatch):
+    backend = SQLiteInvalidation(os.path.join(scratch_dir, "generations-threads.db"), poll_interval=0.05)
+    conn, callers = backend._conn, []
+
+    class Recording:
+        def execute(self, *args):
+            callers.append(threading.get_ident())
+            return conn.execute(*args)
+
+    monkeypatch.setattr(backend, "_conn", Recording())
+    backend.bump(EVENTS)
+    assert backend.generation(EVENTS) == 1
+    assert _eventually(lambda: len(callers) >= 2)
+    assert threading.get_ident() not in callers
+
+
+async def test_repeated_page_is_served_from_the_cache(client, catalog):
+    first = await client.get(f"{API}/events", params={"city": "Austin"})
+    with assert_max_queries(0):
+        second = await client.get(f"{API}/events", params={"city": "Austin"})
+    assert second.status_code == 200
+    assert (second.content, second.headers["etag"]) == (first.content, first.headers["etag"])
+
+
+async def test_write_racing_a_page_query_is_not_cached(client, catalog, monkeypatch):
+    query_page = events._query_page
+
+    async def racing(*args):
+        page = await query_page(*args)
+        # An admin write commits after the page was read but before it is cached
+        invalidate_events(["Austin"])
+        return page
+
+    monkeypatch.setattr(events, "_query_page", racing)
+    first = await client.get(f"{API}/events", params={"city": "Austin"})
+    monkeypatch.setattr(events, "_query_page", query_page)
+    second = await client.get(f"{API}/events", params={"city": "Austin"})
+    assert first.status_code == second.status_code == 200
+    # Served by a fresh query rather than the page read before the write
+    assert second.headers["x-query-count"] == "1"
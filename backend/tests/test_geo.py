@@ -0,0 +1,136 @@
+import math
+import random
+
+import pytest
+
+from app.core import geo
+from tests.conftest import API
+
+pytestmark = pytest.mark.anyio
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+AUSTIN = (30.2672, -97.7431)
+
+
+def _geohash(latitude: float, longitude: float, precision: int) -> str:
+    """The textbook bisection encoding, for comparison."""
+    bounds = {True: [-180.0, 180.0], False: [-90.0, 90.0]}
+    value, bits, chars, even = 0, 0, [], True
+    while len(chars) < precision:
+        low, high = bounds[even]
+        middle = (low + high) / 2
+        degrees = longitude if even else latitude
+        value <<= 1
+        if degrees >= middle:
+            value |= 1
+            bounds[even][0] = middle
+        else:
+            bounds[even][1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            value, bits = 0, 0
+    return "".join(chars)
+
+
+def _chars(code: int, precision: int) -> str:
+    value = code >> (geo.CODE_BITS - 5 * precision)
+    return "".join(BASE32[(value >> (5 * i)) & 31] for i in reversed(range(precision)))
+
+
+def _offset(latitude: float, longitude: float, km: float, bearing: float) -> tuple:
+    """A point ``km`` away along ``bearing`` degrees."""
+    phi, lam, delta = math.radians(latitude), math.radians(longitude), km / geo.EARTH_RADIUS_KM
+    theta = math.radians(bearing)
+    phi2 = math.asin(math.sin(phi) * math.cos(delta) + math.cos(phi) * math.sin(delta) * math.cos(theta))
+    lam2 = lam + math.atan2(
+        math.sin(theta) * math.sin(delta) * math.cos(phi), math.cos(delta) - math.sin(phi) * math.sin(phi2)
+    )
+    return math.degrees(phi2), (math.degrees(lam2) + 540) % 360 - 180
+
+
+def test_codes_are_geohashes():
+    rng = random.Random(3)
+    for _ in range(500):
+        latitude, longitude = rng.uniform(-90, 90), rng.uniform(-180, 180)
+        code = geo.encode(latitude, longitude)
+        assert _chars(code, 10) == _geohash(latitude, longitude, 10)
+    assert _chars(geo.encode(*AUSTIN), 5) == "9v6kp"
+
+
+def test_codes_at_the_bounds():
+    assert geo.encode(-90, -180) == 0
+    assert geo.encode(90, 180) == (1 << geo.CODE_BITS) - 1
+    assert geo.encode(0, 0) == 0b11 << (geo.CODE_BITS - 2)
+
+
+def test_distance():
+    assert geo.distance_km(*AUSTIN, *AUSTIN) == 0
+    assert geo.distance_km(0, 0, 1, 0) == pytest.approx(geo.KM_PER_DEGREE_LAT)
+    assert geo.distance_km(0, 179.5, 0, -179.5) == pytest.approx(geo.KM_PER_DEGREE_LAT)
+    # Austin to Dallas, about 293 km
+    assert geo.distance_km(*AUSTIN, 32.7767, -96.7970) == pytest.approx(293, abs=2)
+
+
+@pytest.mark.parametrize(
+    "center",
+    [AUSTIN, (0.0, 179.99), (0.0, -179.99), (89.9, 10.0), (-89.95, -120.0), (51.5, 0.0)],
+)
+@pytest.mark.parametrize("radius_km", [0.05, 1.0, 25.0, 200.0])
+def test_cover_holds_every_point_in_the_radius(center, radius_km):
+    rng = random.Random(f"{center}-{radius_km}")
+    ranges = geo.cover(*center, radius_km)
+    assert 0 < len(ranges) <= geo.MAX_CELLS
+    assert all(low < high for low, high in ranges)
+    assert all(a[1] < b[0] for a, b in zip(ranges, ranges[1:]))
+    for _ in range(300):
+        # Mostly on the boundary, where a missed cell would show
+        distance = radius_km * (1 if rng.random() < 0.5 else rng.random())
+        point = _offset(*center, distance * 0.999, rng.uniform(0, 360))
+        code = geo.encode(*point)
+        assert any(low <= code < high for low, high in ranges), point
+
+
+def test_cover_is_tight_for_small_radii():
+    # 1 km around Austin needs nowhere near a whole 5-character cell (about 5 km)
+    covered = sum(high - low for low, high in geo.cover(*AUSTIN, 1.0))
+    assert covered < 1 << (geo.CODE_BITS - 25)
+
+
+@pytest.fixture
+async def nearby(client, admin):
+    event = {"id": "gig", "title": "Gig", "city": "Austin", "venue": "Hall", "date": "2026-05-01", "price": 20}
+    event.update(tags=[], latitude=AUSTIN[0], longitude=AUSTIN[1])
+    assert (await client.post(f"{API}/admin/events", json=event, headers=admin)).status_code == 200
+    untagged = {**event, "id": "somewhere", "latitude": None, "longitude": None}
+    assert (await client.post(f"{API}/admin/events", json=untagged, headers=admin)).status_code == 200
+    for lodging_id, km, bearing in [("l-3", 3, 90), ("l-1", 1, 200), ("l-8", 8, 10), ("l-0", 0.2, 300)]:
+        latitude, longitude = _offset(*AUSTIN, km, bearing)
+        lodging = {"id": lodging_id, "name": lodging_id, "location": "Austin", "price": 100}
+        lodging.update(latitude=latitude, longitude=longitude)
+        assert (await client.post(f"{API}/admin/lodgings", json=lodging, headers=admin)).status_code == 200
+    no_point = {"id": "l-none", "name": "l-none", "location": "Austin", "price": 100}
+    assert (await client.post(f"{API}/admin/lodgings", json=no_point, headers=admin)).status_code == 200
+
+
+async def test_lodgings_near_are_nearest_first(client, nearby):
+    response = await client.get(f"{API}/lodgings/near", params={"event_id": "gig", "radius_km": 5})
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [item["id"] for item in items] == ["l-0", "l-1", "l-3"]
+    assert [item["distance_km"] for item in items] == pytest.approx([0.2, 1, 3], abs=0.01)
+
+    response = await client.get(f"{API}/lodgings/near", params={"event_id": "gig", "radius_km": 10, "limit": 2})
+    assert [item["id"] for item in response.json()["items"]] == ["l-0", "l-1"]
+    response = await client.get(f"{API}/lodgings/near", params={"event_id": "gig", "radius_km": 10})
+    assert [item["id"] for item in response.json()["items"]] == ["l-0", "l-1", "l-3", "l-8"]
+
+
+async def test_lodgings_near_errors(client, nearby):
+    near = f"{API}/lodgings/near"
+    assert (await client.get(near, params={"event_id": "nope"})).status_code == 404
+    assert (await client.get(near, params={"event_id": "somewhere"})).status_code == 422
+    assert (await client.get(near, params={"event_id": "gig", "radius_km": 500})).status_code == 422
+    response = await client.get(near, params={"event_id": "gig", "radius_km": 0.1})
+    assert response.json()["items"] == []
@@ -0,0 +1,76 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core import ids
+from app.core.ids import LEGACY_ID_NAMESPACE, parse_id, uuid7
+from tests.conftest import API
+
+pytestmark = pytest.mark.anyio
+
+AT = datetime(2026, 5, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+
+
+def test_uuid7_layout():
+    rand = (1 << 80) - 1 - 0x5A5A
+    value = uuid7(AT, rand)
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+    assert value.int >> 80 == int(AT.timestamp() * 1000)
+    # 12 counter bits from the top of rand, then its low 62 bits
+    assert (value.int >> 64) & 0xFFF == rand >> 68
+    assert value.int & ((1 << 62) - 1) == rand & ((1 << 62) - 1)
+    assert uuid7(AT, rand) == value
+
+
+def test_uuid7_orders_by_time():
+    earlier = uuid7(datetime(2026, 5, 1, tzinfo=timezone.utc))
+    assert earlier < uuid7(AT) < uuid7()
+
+
+def test_uuid7_increases_within_a_millisecond(monkeypatch):
+    # A frozen clock: every id lands in one millisecond until the counter overflows
+    monkeypatch.setattr(ids.time, "time_ns", lambda: 1_777_000_000_000 * 1_000_000)
+    monkeypatch.setattr(ids, "_last_ms", 0)
+    values = [uuid7() for _ in range(10_000)]
+    assert values == sorted(values) and len(set(values)) == len(values)
+    # Past 0xFFF the counter borrows the next millisecond rather than wrapping
+    assert values[-1].int >> 80 > values[0].int >> 80
+
+
+def test_parse_id_takes_uuids():
+    value = uuid7()
+    for text in (str(value), value.hex, str(value).upper()):
+        assert parse_id(text) == value
+
+
+@pytest.mark.parametrize(
+    "legacy",
+    [
+        "b-1",
+        "booking-42",
+        "héllo",
+        # UUID-like text the migration did not cast as a UUID
+        "{12345678-1234-1234-1234-123456789abc}",
+        "urn:uuid:12345678-1234-1234-1234-123456789abc",
+        "1234-5678-1234-1234-1234-123456789abc",
+        "12345678-1234-1234-1234-123456789ab",
+    ],
+)
+def test_parse_id_maps_legacy_ids(legacy):
+    assert parse_id(legacy) == uuid.uuid3(LEGACY_ID_NAMESPACE, legacy)
+
+
+@pytest.mark.parametrize("malformed", ["", "b-1\n", "tab\there", "nul\x00"])
+def test_parse_id_rejects_malformed_ids(malformed):
+    with pytest.raises(ValueError):
+        parse_id(malformed)
+
+
+async def test_booking_lookup(client, catalog):
+    payload = {"package_id": catalog["package"], "user_id": "alice", "payment_token": "tok"}
+    booking_id = (await client.post(f"{API}/bookings", json=payload)).json()["id"]
+    assert (await client.get(f"{API}/bookings/{uuid.UUID(booking_id).hex}")).json()["id"] == booking_id
+    assert (await client.get(f"{API}/bookings/no-such-booking")).status_code == 404
+    assert (await client.get(f"{API}/bookings/bad%09id")).status_code == 404
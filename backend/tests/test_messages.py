@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from app.core import pubsub
+from app.db.instrumentation import assert_max_queries
+from app.routers import messages
+from tests.conftest import API
+
+pytestmark = pytest.mark.anyio
+
+
+async def _send(client, sender: str, receiver: str, text: str):
+    payload = {"sender_id": sender, "receiver_id": receiver, "package_id": None, "message_text": text}
+    response = await client.post(f"{API}/messages", json=payload)
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_thread_is_the_callers(client, catalog, make_token):
+    await _send(client, "alice", "bob", "hi bob")
+    await _send(client, "bob", "carol", "hi carol")
+
+    assert (await client.get(f"{API}/messages/threads/bob")).status_code == 401
+    # A user_id in the query string no longer selects whose thread is read
+    response = await client.get(
+        f"{API}/messages/threads/bob",
+        params={"user_id": "alice"},
+        headers={"Authorization": f"Bearer {make_token('carol')}"},
+    )
+    assert [message["message_text"] for message in response.json()["items"]] == ["hi carol"]
+
+
+async def test_thread_pages(client, catalog, make_token):
+    for i in range(5):
+        payload = {"sender_id": "alice", "receiver_id": "bob", "package_id": None, "message_text": f"hi {i}"}
+        with assert_max_queries(2):
+            response = await client.post(f"{API}/messages", json=payload)
+        assert response.status_code == 200
+
+    headers = {"Authorization": f"Bearer {make_token('alice')}"}
+    with assert_max_queries(1):
+        response = await client.get(f"{API}/messages/threads/bob", params={"limit": 3}, headers=headers)
+    assert response.status_code == 200
+    page = response.json()
+    assert [message["message_text"] for message in page["items"]] == ["hi 4", "hi 3", "hi 2"]
+
+    with assert_max_queries(1):
+        response = await client.get(
+            f"{API}/messages/threads/bob", params={"cursor": page["next_cursor"]}, headers=headers
+        )
+    assert [message["message_text"] for message in response.json()["items"]] == ["hi 1", "hi 0"]
+
+
+async def test_stream_requires_a_token(client):
+    assert (await client.get(f"{API}/messages/stream", params={"user_id": "alice"})).status_code == 401
+
+
+async def test_failed_publish_does_not_fail_the_send(client, catalog, monkeypatch):
+    async def publish(channel, message):
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(messages.broker, "publish", publish)
+    message = await _send(client, "alice", "bob", "still stored")
+    assert message["message_text"] == "still stored"
+
+
+class FakeConnection:
+    def __init__(self):
+        self.listeners = []
+        self.on_terminate = []
+        self.closed = False
+
+    async def add_listener(self, channel, callback):
+        self.listeners.append(channel)
+
+    def add_termination_listener(self, callback):
+        self.on_terminate.append(callback)
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+        for callback in self.on_terminate:
+            callback(self)
+
+    async def execute(self, *args):
+        pass
+
+
+async def test_postgres_broker_reconnects_listen(monkeypatch):
+    monkeypatch.setattr(pubsub, "RECONNECT_BASE_SECONDS", 0.01)
+    broker = pubsub.PostgresBroker("postgresql+asyncpg://localhost/test", "chan")
+    connections = []
+    failures = [ConnectionError("refused")]
+
+    async def connect():
+        if len(connections) == 2 and failures:
+            raise failures.pop()
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(broker, "_connect", connect)
+    await broker.start()
+    notify, listen = connections
+
+    # Server-side termination of the LISTEN connection
+    await listen.close()
+    for _ in range(100):
+        if broker._listen_conn is not None and broker._listen_conn is not listen:
+            break
+        await asyncio.sleep(0.01)
+    assert broker._listen_conn is connections[-1] and broker._listen_conn.listeners == ["chan"]
+    assert not failures
+
+    notify.closed = True
+    await broker.publish("user:alice", {"id": "1"})
+    assert broker._notify_conn is connections[-1] and not broker._notify_conn.closed
+
+    await broker.stop()
+    assert all(conn.closed for conn in connections)
+    assert broker._reconnect_task is None
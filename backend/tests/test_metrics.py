@@ -0,0 +1,60 @@
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI
+
+from app.core.metrics import REQUESTS, UNMATCHED, MetricsMiddleware
+from tests.conftest import API
+
+pytestmark = pytest.mark.anyio
+
+
+def _requests(group: str, method: str, route: str, status: str) -> float:
+    return REQUESTS.labels(group, method, route, status)._value.get()
+
+
+async def test_edge_route_is_labelled_with_its_full_template(client):
+    before = _requests("packages", "POST", f"{API}/packages/{{id}}/change-request", "200")
+    response = await client.post(f"{API}/packages/p-1/change-request", json={"notes": "later"})
+    assert response.status_code == 200
+    assert _requests("packages", "POST", f"{API}/packages/{{id}}/change-request", "200") == before + 1
+
+
+async def test_mounted_and_unmatched_routes():
+    inner = FastAPI()
+    inner.get("/items/{item_id}")(lambda item_id: {"id": item_id})
+    router = APIRouter()
+    router.get("/{thing_id}")(lambda thing_id: {"id": thing_id})
+    outer = FastAPI()
+    outer.include_router(router, prefix="/v2/things")
+    outer.mount("/v2/shop", inner)
+    app = MetricsMiddleware(outer, groups={"things": "/v2/things", "shop": "/v2/shop"})
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+        before = [
+            _requests("shop", "GET", "/v2/shop/items/{item_id}", "200"),
+            _requests("things", "GET", "/v2/things/{thing_id}", "200"),
+            _requests("app", "GET", UNMATCHED, "404"),
+        ]
+        assert (await http.get("/v2/shop/items/1")).status_code == 200
+        assert (await http.get("/v2/things/1")).status_code == 200
+        assert (await http.get("/nowhere")).status_code == 404
+    assert [
+        _requests("shop", "GET", "/v2/shop/items/{item_id}", "200"),
+        _requests("things", "GET", "/v2/things/{thing_id}", "200"),
+        _requests("app", "GET", UNMATCHED, "404"),
+    ] == [count + 1 for count in before]
+
+
+async def test_nested_included_routers():
+    inner = APIRouter()
+    inner.get("/{leaf_id}")(lambda leaf_id: {"id": leaf_id})
+    outer_router = APIRouter()
+    outer_router.include_router(inner, prefix="/leaves")
+    outer = FastAPI()
+    outer.include_router(outer_router, prefix="/v3/trees")
+    app = MetricsMiddleware(outer, groups={"trees": "/v3/trees"})
+
+    before = _requests("trees", "GET", "/v3/trees/leaves/{leaf_id}", "200")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+        assert (await http.get("/v3/trees/leaves/1")).status_code == 200
+    assert _requests("trees", "GET", "/v3/trees/leaves/{leaf_id}", "200") == before + 1
@@ -0,0 +1,81 @@
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.core.payments import LocalStripe
+from app.db.instrumentation import assert_max_queries
+from app.db.outbox import OutboxWorkers
+from app.db.session import SessionLocal
+from tests.conftest import API
+
+pytestmark = pytest.mark.anyio
+
+
+class TrackedSessions:
+    """SessionLocal that counts the sessions currently open."""
+
+    def __init__(self):
+        self.open = 0
+
+    @asynccontextmanager
+    async def __call__(self):
+        self.open += 1
+        try:
+            async with SessionLocal() as db:
+                yield db
+        finally:
+            self.open -= 1
+
+
+class WatchedStripe(LocalStripe):
+    def __init__(self, sessions: TrackedSessions):
+        super().__init__()
+        self.sessions = sessions
+        self.open_during_capture = []
+
+    async def capture(self, amount, payment_token, idempotency_key):
+        self.open_during_capture.append(self.sessions.open)
+        return await super().capture(amount, payment_token, idempotency_key)
+
+
+async def test_booking_is_pending_until_captured(client, catalog):
+    payload = {"package_id": catalog["package"], "user_id": "alice", "payment_token": "tok_visa"}
+    # The booking and its outbox row; the capture happens later, off the request
+    with assert_max_queries(3):
+        response = await client.post(f"{API}/bookings", json=payload)
+    assert response.status_code == 200
+    booking = response.json()
+    assert booking["status"] == "pending"
+
+    with assert_max_queries(1):
+        response = await client.get(f"{API}/bookings/{booking['id']}")
+    assert response.status_code == 200
+    assert response.json() == booking
+
+
+async def test_captures_hold_no_session(client, catalog):
+    bookings = []
+    for token in ("tok_visa", "tok_chargeDeclined"):
+        payload = {"package_id": catalog["package"], "user_id": "alice", "payment_token": token}
+        bookings.append((await client.post(f"{API}/bookings", json=payload)).json()["id"])
+
+    sessions = TrackedSessions()
+    provider = WatchedStripe(sessions)
+    workers = OutboxWorkers(
+        sessions,
+        provider,
+        workers=0,
+        batch_size=10,
+        poll_interval=1,
+        lease_seconds=60,
+        max_attempts=3,
+        retry_base=1,
+    )
+    assert await workers.run_once() == 2
+    assert provider.open_during_capture == [0, 0]
+    assert sessions.open == 0
+    assert workers.processed == {"confirmed": 1, "payment_failed": 1, "retried": 0, "skipped": 0}
+
+    statuses = [(await client.get(f"{API}/bookings/{booking_id}")).json()["status"] for booking_id in bookings]
+    assert statuses == ["confirmed", "payment_failed"]
+    assert await workers.run_once() == 0
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from app.db.instrumentation import assert_max_queries
+from tests.conftest import API
+
+pytestmark = pytest.mark.anyio
+
+
+def _url(catalog) -> str:
+    return f"{API}/packages/{catalog['package']}"
+
+
+async def test_package_patch(client, catalog):
+    payload = {"add_event_ids": ["event-2"], "remove_event_ids": ["event-0"]}
+    with assert_max_queries(7):
+        response = await client.patch(_url(catalog), json=payload)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["version"] == 2
+    assert sorted(event["id"] for event in body["events"]) == ["event-1", "event-2"]
+    assert response.headers["etag"] == (await client.get(_url(catalog))).headers["etag"]
+
+
+async def test_etag_follows_the_body(client, catalog, admin):
+    first = await client.get(_url(catalog))
+    etag = first.headers["etag"]
+    assert etag.startswith('"1-')
+    assert (await client.get(_url(catalog), headers={"If-None-Match": etag})).status_code == 304
+
+    # A catalog price change is not an edit: the version stays, the served body and tag move
+    lodging = {"id": "lodging-1", "name": "Lodging 1", "location": "Austin", "price": 250}
+    assert (await client.post(f"{API}/admin/lodgings", json=lodging, headers=admin)).status_code == 200
+    second = await client.get(_url(catalog), headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.json()["version"] == 1
+    assert second.json()["lodging"]["price"] == 250
+    assert second.headers["etag"] != etag
+
+
+async def test_if_match_compares_the_version(client, catalog, admin):
+    etag = (await client.get(_url(catalog))).headers["etag"]
+    lodging = {"id": "lodging-1", "name": "Lodging 1", "location": "Austin", "price": 250}
+    assert (await client.post(f"{API}/admin/lodgings", json=lodging, headers=admin)).status_code == 200
+
+    # The tag from before the price change still names version 1
+    payload = {"add_event_ids": ["event-2"]}
+    response = await client.patch(_url(catalog), json=payload, headers={"If-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+
+    payload = {"lodging_id": "lodging-2", "event_ids": []}
+    response = await client.put(_url(catalog), json=payload, headers={"If-Match": response.headers["etag"]})
+    assert response.status_code == 200
+    assert response.json()["version"] == 3
+    assert (await client.put(_url(catalog), json=payload, headers={"If-Match": "*"})).status_code == 200
+
+
+async def test_stale_if_match_conflicts(client, catalog):
+    stale = (await client.get(_url(catalog))).headers["etag"]
+    assert (await client.patch(_url(catalog), json={"add_event_ids": ["event-2"]})).status_code == 200
+
+    response = await client.patch(_url(catalog), json={"remove_event_ids": ["event-0"]}, headers={"If-Match": stale})
+    assert response.status_code == 409
+    assert response.headers["etag"] == '"2"'
+    payload = {"lodging_id": "lodging-2", "event_ids": []}
+    assert (await client.put(_url(catalog), json=payload, headers={"If-Match": stale})).status_code == 409
+    # The 409's tag is good for the retry
+    retry = await client.put(_url(catalog), json=payload, headers={"If-Match": response.headers["etag"]})
+    assert retry.status_code == 200
+
+    missing = await client.put(f"{API}/packages/nope", json=payload, headers={"If-Match": stale})
+    assert missing.status_code == 409
+
+
+async def test_concurrent_edits_of_one_version(client, catalog):
+    etag = (await client.get(_url(catalog))).headers["etag"]
+    headers = {"If-Match": etag}
+    responses = await asyncio.gather(
+        client.patch(_url(catalog), json={"add_event_ids": ["event-2"]}, headers=headers),
+        client.put(_url(catalog), json={"lodging_id": "lodging-2", "event_ids": []}, headers=headers),
+    )
+    assert sorted(response.status_code for response in responses) == [200, 409]
+    assert (await client.get(_url(catalog))).json()["version"] == 2
+
+
+async def test_concurrent_creates_of_one_id(client, catalog):
+    payload = {"lodging_id": "lodging-2", "event_ids": ["event-0"]}
+    responses = await asyncio.gather(*(client.put(f"{API}/packages/new", json=payload) for _ in range(2)))
+    assert sorted(response.status_code for response in responses) == [200, 409]
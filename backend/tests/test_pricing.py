@@ -0,0 +1,89 @@
+from datetime import date
+
+import pytest
+
+from app.core.config import settings
+from app.core.pricing import QuoteInputs, addon_total, quote_batch
+from tests.conftest import API
+
+pytestmark = pytest.mark.anyio
+
+# package-1 in the catalog fixture: lodging-1 (200/night) over event-0 and event-1
+PACKAGE_1 = {
+    "package_id": "package-1",
+    "nights": 2,
+    "lodging": 400.0,
+    "events": 41.0,
+    "addons": 0.0,
+    "markup": 44.1,
+    "tax": 38.81,
+    "total": 523.91,
+}
+
+
+def test_addon_total():
+    addons = {"parking": 25, "tour": {"price": 10, "quantity": 3}, "late_checkout": True, "note": "window"}
+    assert addon_total(addons) == 55
+    assert addon_total({"cake": {"price": 12, "quantity": "two"}}) == 12
+    assert addon_total(None) == 0
+
+
+def test_quote_batch():
+    inputs = QuoteInputs()
+    stay = inputs.add_package("stay", 100.0, {"parking": 25, "tour": {"price": 10, "quantity": 3}})
+    inputs.add_event(stay, 50.0, date(2026, 5, 3))
+    inputs.add_event(stay, 30.0, date(2026, 5, 1))
+    inputs.add_package("lodging-only", 60.0, None)
+    inputs.add_package("empty", None, None)
+
+    batch = quote_batch(inputs, markup_rate=0.1, tax_rate=0.08)
+    stay_row, lodging_only, empty = batch.rows()
+    # First event day through the night of the last: 3 nights, on 435.00 before markup
+    assert stay_row == {
+        "package_id": "stay",
+        "nights": 3,
+        "lodging": 300.0,
+        "events": 80.0,
+        "addons": 55.0,
+        "markup": 43.5,
+        "tax": 38.28,
+        "total": 516.78,
+    }
+    nights = settings.quote_default_nights
+    assert lodging_only["nights"] == nights
+    assert lodging_only["total"] == round(60 * nights * 1.1 * 1.08, 2)
+    assert empty["total"] == 0
+
+
+async def test_quote_endpoint(client, catalog):
+    payload = {"package_ids": ["package-1", "nope", "package-1"]}
+    response = await client.post(f"{API}/packages/quotes", json=payload)
+    assert response.status_code == 200
+    assert response.json() == {"quotes": [PACKAGE_1], "missing": ["nope"]}
+
+
+async def _quoted_total(client) -> float:
+    return (await client.get(f"{API}/packages/package-1")).json()["quoted_total"]
+
+
+async def test_lodging_price_change_requotes(client, catalog, admin):
+    lodging = {"id": "lodging-1", "name": "City Hotel", "location": "Austin", "price": 250}
+    assert (await client.post(f"{API}/admin/lodgings", json=lodging, headers=admin)).status_code == 200
+    [quote] = (await client.post(f"{API}/packages/quotes", json={"package_ids": ["package-1"]})).json()["quotes"]
+    assert quote["lodging"] == 500
+    assert await _quoted_total(client) == quote["total"]
+
+
+async def test_event_price_change_requotes(client, catalog, admin):
+    event = {"id": "event-0", "title": "Show 0", "city": "Austin", "venue": "Hall", "date": "2026-05-01"}
+    response = await client.post(f"{API}/admin/events", json={**event, "tags": ["music"], "price": 45}, headers=admin)
+    assert response.status_code == 200
+    [quote] = (await client.post(f"{API}/packages/quotes", json={"package_ids": ["package-1"]})).json()["quotes"]
+    assert quote["events"] == 66
+    assert await _quoted_total(client) == quote["total"]
+
+
+async def test_unrelated_write_leaves_quotes_alone(client, catalog, admin):
+    lodging = {"id": "lodging-2", "name": "Hostel", "location": "Austin", "price": 70}
+    assert (await client.post(f"{API}/admin/lodgings", json=lodging, headers=admin)).status_code == 200
+    assert await _quoted_total(client) is None
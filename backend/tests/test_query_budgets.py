@@ -0,0 +1,53 @@
+"""Query ceilings per endpoint, so an N+1 regression fails here rather than in production.
+
+The limits are the routes' declared query_budget values; the middleware would also
+fail the request with ENFORCE_QUERY_BUDGETS on, but asserting here names the endpoint
+and prints the statements.
+"""
+import pytest
+
+from app.db.instrumentation import assert_max_queries
+from tests.conftest import API
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_package_get(client, catalog):
+    with assert_max_queries(4):
+        response = await client.get(f"{API}/packages/{catalog['package']}")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["lodging"]["id"] == "lodging-1"
+    assert sorted(event["id"] for event in body["events"]) == ["event-0", "event-1"]
+
+
+async def test_package_get_does_not_grow_with_events(client, catalog):
+    payload = {"lodging_id": "lodging-2", "event_ids": catalog["events"]}
+    assert (await client.put(f"{API}/packages/{catalog['package']}", json=payload)).status_code == 200
+    with assert_max_queries(4) as counter:
+        response = await client.get(f"{API}/packages/{catalog['package']}")
+    assert response.status_code == 200
+    assert len(response.json()["events"]) == 3
+    assert response.headers["x-query-count"] == str(counter.count)
+
+
+async def test_package_put(client, catalog):
+    payload = {"lodging_id": "lodging-2", "event_ids": catalog["events"][1:]}
+    with assert_max_queries(8):
+        response = await client.put(f"{API}/packages/{catalog['package']}", json=payload)
+    assert response.status_code == 200
+    assert sorted(event["id"] for event in response.json()["events"]) == ["event-1", "event-2"]
+
+
+async def test_booking_for_missing_package(client, catalog):
+    payload = {"package_id": "nope", "user_id": "alice", "payment_token": "tok_visa"}
+    with assert_max_queries(3):
+        response = await client.post(f"{API}/bookings", json=payload)
+    assert response.status_code == 404
+
+
+async def test_events_list(client, catalog):
+    with assert_max_queries(1):
+        response = await client.get(f"{API}/events", params={"city": "Austin"})
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 3
@@ -0,0 +1,90 @@
+"""Read-your-writes across workers, with a second SQLite database as the replica.
+
+The replica is never written to, so it stands for one lagging arbitrarily far behind:
+a read that finds the package came from the primary.
+"""
+import os
+import time
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.db.replicas import WRITE_COOKIE, ReadYourWritesMiddleware
+from app.db.session import replicas
+from app.main import app
+from app.models.base import Base
+from tests.conftest import API
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def replica(client, catalog, scratch_dir, monkeypatch):
+    path = os.path.join(scratch_dir, "replica.db")
+    if os.path.exists(path):
+        os.remove(path)
+    replica_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with replica_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    monkeypatch.setattr(replicas, "engines", [replica_engine])
+    monkeypatch.setattr(replicas, "_down_until", [0.0])
+    monkeypatch.setattr(replicas, "_writers", replicas._writers.__class__())
+    monkeypatch.setattr(replicas, "_pinned_until", 0.0)
+    yield replica_engine
+    await replica_engine.dispose()
+
+
+def _worker() -> httpx.AsyncClient:
+    """A client of the app as deployed with replicas, with its own cookie jar."""
+    sticky = ReadYourWritesMiddleware(app, sticky_seconds=settings.db_read_your_writes_seconds)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=sticky), base_url="http://test")
+
+
+def _forget_writers():
+    # What another worker knows of this caller's writes: nothing
+    replicas._writers.clear()
+    replicas._pinned_until = 0.0
+
+
+async def test_reads_go_to_the_replica(replica, catalog):
+    async with _worker() as http:
+        response = await http.get(f"{API}/packages/{catalog['package']}")
+    assert response.status_code == 404
+    assert WRITE_COOKIE not in response.cookies
+
+
+async def test_write_cookie_sends_reads_to_the_primary_on_any_worker(replica, catalog):
+    package = f"{API}/packages/{catalog['package']}"
+    async with _worker() as writer, _worker() as stranger:
+        response = await writer.put(package, json={"lodging_id": "lodging-2", "event_ids": []})
+        assert response.status_code == 200
+        wrote_at = float(response.cookies[WRITE_COOKIE])
+        assert abs(wrote_at - time.time()) < 5
+        _forget_writers()
+
+        assert (await writer.get(package)).status_code == 200
+        assert (await stranger.get(package)).status_code == 404
+        assert replicas.reads["sticky"] >= 1
+
+
+@pytest.mark.parametrize(
+    "age, status",
+    [(0, 200), (3600, 404), (-3600, 404), ("nan", 404), ("inf", 404), ("not-a-time", 404), ("", 404)],
+    ids=["fresh", "expired", "future", "nan", "inf", "garbage", "empty"],
+)
+async def test_only_a_fresh_cookie_reads_the_primary(replica, catalog, age, status):
+    async with _worker() as http:
+        http.cookies.set(WRITE_COOKIE, str(time.time() - age) if isinstance(age, int) else age)
+        response = await http.get(f"{API}/packages/{catalog['package']}")
+    assert response.status_code == status
+
+
+async def test_replica_down_falls_back_to_the_primary(replica, catalog, monkeypatch):
+    down = create_async_engine("sqlite+aiosqlite:////nonexistent/dir/replica.db")
+    monkeypatch.setattr(replicas, "engines", [down])
+    async with _worker() as http:
+        assert (await http.get(f"{API}/packages/{catalog['package']}")).status_code == 200
+    assert not replicas.stats()["replicas"][0]["up"]
+    await down.dispose()
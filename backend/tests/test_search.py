@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from app.db import search
+from app.db.catalog import page_cache
+from app.db.search import HotCityIndexes
+from app.db.session import SessionLocal
+from tests.conftest import API
+
+pytestmark = pytest.mark.anyio
+
+EVENTS = [
+    ("e-1", "Austin", "2026-05-01", ["music", "outdoor"]),
+    ("e-2", "Austin", "2026-05-02", ["music"]),
+    ("e-3", "Austin", "2026-06-01", ["food"]),
+    ("e-4", "Denver", "2026-05-09", ["music"]),
+]
+
+
+@pytest.fixture
+async def tagged(client, admin):
+    body = "\n".join(
+        json.dumps({"id": i, "title": i, "city": city, "venue": "v", "date": day, "price": 10, "tags": tags})
+        for i, city, day, tags in EVENTS
+    )
+    response = await client.post(f"{API}/admin/events:bulk", content=body, headers=admin)
+    assert response.json()["upserted"] == len(EVENTS)
+
+
+async def test_unfiltered_facets_come_from_the_rollups(client, tagged):
+    response = await client.get(f"{API}/events/search")
+    body = response.json()
+    assert response.headers["x-query-count"] == "3"
+    assert body["total"] == 4
+    assert body["facets"] == {
+        "city": {"Austin": 3, "Denver": 1},
+        "tag": {"music": 3, "food": 1, "outdoor": 1},
+        "month": {"2026-05": 3, "2026-06": 1},
+    }
+
+    response = await client.get(f"{API}/events/search", params={"city": "Austin", "date_to": "2026-05-31"})
+    assert response.json()["facets"]["tag"] == {"music": 2, "outdoor": 1}
+
+
+async def test_rollup_facets_match_the_city_index(client, tagged, monkeypatch):
+    params = {"city": "Austin", "date_from": "2026-05-02"}
+    from_sql = (await client.get(f"{API}/events/search", params=params)).json()
+    page_cache.clear()
+    monkeypatch.setattr(search.hot_cities, "pinned", {"Austin"})
+    response = await client.get(f"{API}/events/search", params=params)
+    assert response.headers["x-query-count"] == "1"
+    assert response.json() == from_sql
+
+
+def test_search_counts_stay_bounded(monkeypatch):
+    monkeypatch.setattr(search, "MAX_TRACKED_CITIES", 50)
+    indexes = HotCityIndexes(pinned=[], threshold=3, max_cities=4)
+    for i in range(1000):
+        indexes.is_hot(f"nowhere-{i}")
+        indexes.is_hot("Austin")
+    # One-off cities are forgotten; a city searched all along keeps its count
+    assert len(indexes._searches) <= 50
+    assert indexes.is_hot("Austin") and not indexes.is_hot("nowhere-0")
+
+
+async def test_unknown_city_is_not_indexed(client, tagged):
+    indexes = HotCityIndexes(pinned=[], threshold=1, max_cities=1)
+    async with SessionLocal() as db:
+        assert indexes.is_hot("Nowhere")
+        assert (await indexes.get(db, "Nowhere")).events == []
+        assert indexes.stats() == {} and "Nowhere" not in indexes._searches
+        assert indexes.is_hot("Austin")
+        assert len((await indexes.get(db, "Austin")).events) == 3
+    assert list(indexes.stats()) == ["Austin"]
+
+
+async def test_city_index_outlives_writes_elsewhere(client, tagged, admin):
+    indexes = HotCityIndexes(pinned=["Austin"], threshold=1, max_cities=4)
+    event = {"title": "late", "venue": "v", "date": "2026-05-03", "price": 10, "tags": ["late"]}
+    async with SessionLocal() as db:
+        austin = await indexes.get(db, "Austin")
+        # e-4 moves out of Denver; Austin's events are untouched
+        moved = {**event, "id": "e-4", "city": "Boulder"}
+        assert (await client.post(f"{API}/admin/events", json=moved, headers=admin)).status_code == 200
+        assert await indexes.get(db, "Austin") is austin
+
+        body = json.dumps({**event, "id": "e-5", "city": "Austin"})
+        assert (await client.post(f"{API}/admin/events:bulk", content=body, headers=admin)).status_code == 200
+        rebuilt = await indexes.get(db, "Austin")
+    assert rebuilt is not austin
+    assert [event.id for event in rebuilt.events] == ["e-1", "e-2", "e-5", "e-3"]
+
+
+async def test_moving_an_event_retires_both_cities(client, tagged, admin):
+    indexes = HotCityIndexes(pinned=["Austin", "Denver"], threshold=1, max_cities=4)
+    moved = {"id": "e-4", "title": "e-4", "city": "Austin", "venue": "v", "date": "2026-05-09", "price": 10}
+    async with SessionLocal() as db:
+        await indexes.get(db, "Austin")
+        await indexes.get(db, "Denver")
+        response = await client.post(f"{API}/admin/events", json={**moved, "tags": ["music"]}, headers=admin)
+        assert response.status_code == 200
+        assert (await indexes.get(db, "Denver")).events == []
+        assert len((await indexes.get(db, "Austin")).events) == 4
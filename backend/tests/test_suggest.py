@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from app.db.session import SessionLocal
+from app.db.suggest import CityCatalog, CityCatalogs
+from app.schemas.models import LodgingOut
+from tests.conftest import API
+
+pytestmark = pytest.mark.anyio
+
+
+def _scan(catalog: CityCatalog, tickets: float, nights: int, budget: float, multiplier: float):
+    for option in reversed(catalog.lodgings):
+        if (tickets + option.price * nights) * multiplier <= budget:
+            return option
+    return None
+
+
+def test_best_lodging_matches_a_linear_scan():
+    rng = random.Random(7)
+    lodgings = [
+        LodgingOut(id=f"l-{i}", name="n", location="Austin", price=round(rng.uniform(20, 400), rng.choice([0, 2])))
+        for i in range(60)
+    ]
+    catalog = CityCatalog([], lodgings)
+    for _ in range(2000):
+        args = (rng.uniform(0, 300), rng.randint(1, 4), rng.uniform(10, 2000), rng.choice([1.0, 1.1 * 1.0825]))
+        assert catalog.best_lodging(*args) == _scan(catalog, *args)
+    # Exactly at the budget
+    assert catalog.best_lodging(0, 1, catalog.lodgings[5].price, 1.0) == _scan(
+        catalog, 0, 1, catalog.lodgings[5].price, 1.0
+    )
+    assert CityCatalog([], []).best_lodging(0, 1, 100, 1.0) is None
+
+
+async def test_city_catalogs_are_bounded(client, catalog):
+    catalogs = CityCatalogs(maxsize=1)
+    async with SessionLocal() as db:
+        for city in ("Nowhere", "Elsewhere"):
+            assert (await catalogs.get(db, city)).events == []
+        assert not catalogs._catalogs and not catalogs._locks
+        assert len((await catalogs.get(db, "Austin")).lodgings) == 2
+        assert list(catalogs._catalogs) == list(catalogs._locks) == ["Austin"]
+
+
+
+async def test_city_catalog_outlives_writes_elsewhere(client, catalog, admin):
+    catalogs = CityCatalogs()
+    event = {"id": "e-denver", "title": "t", "city": "Denver", "venue": "v", "date": "2026-05-01", "price": 10}
+    lodging = {"id": "l-denver", "name": "Inn", "location": "Denver", "price": 90}
+    async with SessionLocal() as db:
+        austin = await catalogs.get(db, "Austin")
+        assert (await client.post(f"{API}/admin/events", json={**event, "tags": []}, headers=admin)).status_code == 200
+        assert (await client.post(f"{API}/admin/lodgings", json=lodging, headers=admin)).status_code == 200
+        assert await catalogs.get(db, "Austin") is austin
+
+        # A lodging moving into Austin retires the catalog
+        moved = {**lodging, "location": "Austin"}
+        assert (await client.post(f"{API}/admin/lodgings", json=moved, headers=admin)).status_code == 200
+        rebuilt = await catalogs.get(db, "Austin")
+    assert rebuilt is not austin
+    assert [option.id for option in rebuilt.lodgings] == ["lodging-2", "l-denver", "lodging-1"]
+
+
+async def test_suggest_picks_the_dearest_lodging_that_fits(client, catalog):
+    payload = {"city": "Austin", "date_from": "2026-05-01", "date_to": "2026-05-01", "budget": 150, "k": 1}
+    response = await client.post(f"{API}/packages/suggest", json=payload)
+    assert response.status_code == 200
+    [suggestion] = response.json()["suggestions"]
+    assert suggestion["lodging"]["id"] == "lodging-2"
+    payload["budget"] = 400
+    [suggestion] = (await client.post(f"{API}/packages/suggest", json=payload)).json()["suggestions"]
+    assert suggestion["lodging"]["id"] == "lodging-1"